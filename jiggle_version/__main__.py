@@ -6,8 +6,9 @@ augmented with logging at DEBUG/INFO/WARNING/ERROR levels to trace execution,
 argument parsing, config precedence, and failure points.
 
 Key changes vs. your draft:
-- SAFE two‑stage parsing: extract --config with a tiny pre‑parser ONLY.
-  (Avoids early SystemExit from the full parser swallowing subparser state.)
+- SAFE two‑stage parsing: a plain token scan finds --config and the
+  subcommand; only that subcommand's parser is built, and Rich help
+  formatting is imported only when help is actually printed.
 - Subparsers now have dest="command" and required=True for explicit routing.
 - Defaults application: hardcoded < config file < CLI — applied only to `bump`.
 - Guard parse_known_args / parse_args with try/except SystemExit to log.
@@ -20,49 +21,72 @@ Key changes vs. your draft:
 from __future__ import annotations
 
 import argparse
+import functools
+import io
+import json
 import logging
 import subprocess
 import sys
+import threading
+import time
+import tokenize
 from collections.abc import Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Any
-
-from rich_argparse import RichHelpFormatter
+from typing import Any, Callable
 
 # Project imports
-from jiggle_version import __about__, git
+from jiggle_version import __about__, daemon, git, instrument
 from jiggle_version.auto import (
     determine_auto_increment,
     get_current_symbols,
+    render_digest_data,
     write_digest_data,
 )
 from jiggle_version.bump import bump_version
 from jiggle_version.config import load_config_from_path
-from jiggle_version.discover import find_source_files
+from jiggle_version.diff import unified_diff_from_edits
+from jiggle_version.discover import find_project_files
 from jiggle_version.git import get_latest_tag
-from jiggle_version.parsers.ast_parser import parse_python_module, parse_setup_py
-from jiggle_version.parsers.config_parser import parse_pyproject_toml, parse_setup_cfg
-from jiggle_version.pypi import (
-    UnpublishedVersionError,
-    check_pypi_publication,
-    get_package_name,
+from jiggle_version.parsers.config_parser import parse_pyproject_toml
+from jiggle_version.pypi_cache import cache_from_config
+from jiggle_version.pypi_index import BACKENDS, indexes_from_settings
+from jiggle_version.scan import (
+    ScanCache,
+    ScanResult,
+    SourceVersion,
+    scan_project,
+    set_scan_cache,
 )
-from jiggle_version.update import (
-    update_pyproject_toml,
-    update_python_file,
-    update_setup_cfg,
+from jiggle_version.transaction import (
+    TransactionError,
+    WriteTransaction,
+    default_worker_count,
 )
+from jiggle_version.update import locate_edits, render_file
 from jiggle_version.utils.cli_suggestions import SmartParser
 from jiggle_version.utils.console import harden_standard_streams
 from jiggle_version.utils.logging_config import configure_logging
 
 
-class CustomFormatter(RichHelpFormatter):
-    """Custom help formatter to tweak the aesthetics."""
+@functools.lru_cache(maxsize=None)
+def _custom_formatter_class() -> type[argparse.HelpFormatter]:
+    """The Rich help formatter, imported the first time help is rendered."""
+    from rich_argparse import RichHelpFormatter
+
+    class CustomFormatter(RichHelpFormatter):
+        """Custom help formatter to tweak the aesthetics."""
+
+        RichHelpFormatter.styles["argparse.args"] = "cyan"
+        RichHelpFormatter.styles["argparse.groups"] = "magenta"
+        RichHelpFormatter.styles["argparse.help"] = "default"
+
+    return CustomFormatter
+
 
-    RichHelpFormatter.styles["argparse.args"] = "cyan"
-    RichHelpFormatter.styles["argparse.groups"] = "magenta"
-    RichHelpFormatter.styles["argparse.help"] = "default"
+def lazy_help_formatter(prog: str, **kwargs: Any) -> argparse.HelpFormatter:
+    """``formatter_class`` that defers importing rich_argparse to first use."""
+    return _custom_formatter_class()(prog, **kwargs)
 
 
 # ----------------------------------------------------------------------------
@@ -76,6 +100,11 @@ def quiet_enabled(args: argparse.Namespace) -> bool:
     return bool(getattr(args, "quiet", False))
 
 
+def ndjson_enabled(args: argparse.Namespace) -> bool:
+    """Return whether `--format ndjson` was requested."""
+    return getattr(args, "format", "text") == "ndjson"
+
+
 def out(args: argparse.Namespace, message: str = "") -> None:
     """Print a normal stdout message unless quiet mode suppresses it."""
     if quiet_enabled(args):
@@ -115,58 +144,127 @@ def handle_check(args: argparse.Namespace) -> int:
     """Handler for the 'check' command."""
     LOGGER.info("Running check… project_root=%s", args.project_root)
 
-    project_root = Path(args.project_root)
-    found_versions = []
-
-    # Map specific filenames to their specialized parsers.
-    # Any other .py file will use the generic module parser.
-    parser_map = {
-        "pyproject.toml": parse_pyproject_toml,
-        "setup.cfg": parse_setup_cfg,
-        "setup.py": parse_setup_py,
-    }
+    # 1. Discover and parse all potential source files
+    scan = _scan_or_report(args, "❌ Discovery failed")
+    if scan is None:
+        return DISCOVERY_ERROR
+    if ndjson_enabled(args):
+        rc = _report_ndjson(args, scan)
+    else:
+        rc = _report_check(args, scan)
+    if getattr(args, "watch", False):
+        return _watch_check(args, scan, rc)
+    return rc
+
 
-    # 1. Discover all potential source files
+def _scan_or_report(args: argparse.Namespace, prefix: str) -> ScanResult | None:
+    """Runs the shared scan; a discovery failure is reported and gives None."""
     try:
-        source_files = find_source_files(project_root, args.ignore)
+        if getattr(args, "staged", False):
+            from jiggle_version.staged import scan_staged
+
+            return scan_staged(
+                Path(args.project_root), args.ignore, spans=ndjson_enabled(args)
+            )
+        return scan_project(
+            Path(args.project_root), args.ignore, spans=ndjson_enabled(args)
+        )
     except Exception as e:
         LOGGER.error("Discovery failed: %s", e, exc_info=args.verbose > 0)
-        err(f"❌ Discovery failed: {e}")
-        return DISCOVERY_ERROR
+        err(f"{prefix}: {e}")
+        if ndjson_enabled(args):
+            _write_ndjson(
+                [
+                    {
+                        "type": "summary",
+                        "command": args.command,
+                        "status": "discovery_error",
+                        "error": str(e),
+                        "exit_code": DISCOVERY_ERROR,
+                    }
+                ]
+            )
+        return None
 
-    out(args, f"Found {len(source_files)} potential source file(s).")
-    LOGGER.debug("Discovered files: %s", [str(p) for p in source_files])
 
-    # 2. Parse each discovered file
-    for file_path in source_files:
-        relative_path = file_path.relative_to(project_root)
-        out(args, f"-> Checking for version in '{relative_path}'…")
+def _write_ndjson(records: list[dict[str, Any]]) -> None:
+    """Writes the records, one JSON object per line, in a single write."""
+    sys.stdout.write(
+        "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+    )
+    sys.stdout.flush()
 
-        # Choose the correct parser for the file
-        parser_func = parser_map.get(file_path.name, parse_python_module)
 
-        if file_path.suffix == ".py" and file_path.name not in parser_map:
-            parser_func = parse_python_module
-        elif file_path.name not in parser_map:
-            # Skip unknown file types
-            LOGGER.debug("Skipping non‑version file: %s", file_path)
-            continue
+def _report_ndjson(
+    args: argparse.Namespace,
+    scan: ScanResult,
+    sources: list[SourceVersion] | None = None,
+    check_tag: bool = True,
+) -> int:
+    """
+    ``--format ndjson``: one record per discovered source, then a summary.
 
+    The summary's ``status`` and ``exit_code`` follow the text report:
+    ``ok``, ``no_version``, ``conflict`` or (``check --git-tag``)
+    ``tag_mismatch``. When git is unavailable the tag check is skipped:
+    ``git_tag`` is null and ``git_tag_error`` says why. ``sources`` limits the per-source records (``--watch``
+    reports only what changed).
+    """
+    records = [
+        source.to_dict() for source in (scan.sources if sources is None else sources)
+    ]
+    unique_versions = scan.unique_versions
+    summary: dict[str, Any] = {
+        "type": "summary",
+        "command": args.command,
+        **scan.counters,
+        "versions": sorted(unique_versions),
+        "version": scan.agreed_version,
+    }
+    if not scan.found:
+        status, rc = "no_version", NO_VERSION_FOUND
+    elif len(unique_versions) > 1:
+        status, rc = "conflict", VERSION_DISAGREEMENT
+    else:
+        status, rc = "ok", 0
+    if rc == 0 and check_tag and getattr(args, "git_tag", False):
         try:
-            version = parser_func(file_path)
-        except Exception as e:
-            LOGGER.warning(
-                "Failed to parse %s: %s", file_path, e, exc_info=args.verbose > 1
-            )
-            out(args, f"⚪ Parse failed for {relative_path}: {e}")
+            tag = get_latest_tag(scan.project_root)
+        except RuntimeError as e:
+            # git is not installed: the tag check is skipped, as with no tags.
+            LOGGER.warning("Git tag check skipped: %s", e)
+            tag = None
+            summary["git_tag_error"] = str(e)
+        summary["git_tag"] = tag
+        if tag is not None and tag.lstrip("vV") != scan.agreed_version:
+            status, rc = "tag_mismatch", VERSION_DISAGREEMENT
+    if getattr(args, "stats", False):
+        summary["discovery"] = scan.discovery_stats.to_dict()
+    summary["status"] = status
+    summary["exit_code"] = rc
+    records.append(summary)
+    _write_ndjson(records)
+    return rc
+
+
+def _report_check(args: argparse.Namespace, scan: ScanResult) -> int:
+    """Prints the per-file results and agreement verdict of a finished scan."""
+    project_root = scan.project_root
+    out(args, f"Found {len(scan.files)} potential source file(s).")
+
+    # 2. Report each parsed file
+    for source in scan.sources:
+        if not source.parsed:
             continue
-
-        if version:
-            out(args, f"✅ Found version: {version}")
-            found_versions.append({"source": str(relative_path), "version": version})
+        out(args, f"-> Checking for version in '{source.relative_path}'…")
+        if source.error is not None:
+            out(args, f"⚪ Parse failed for {source.relative_path}: {source.error}")
+        elif source.version:
+            out(args, f"✅ Found version: {source.version}")
         else:
             out(args, "⚪ No version found.")
 
+    found_versions = scan.found
     if not found_versions:
         err("❌ No version declarations were found.")
         LOGGER.error("No version declarations found in project.")
@@ -175,11 +273,10 @@ def handle_check(args: argparse.Namespace) -> int:
     if not quiet_enabled(args):
         print("\n--- Discovery Summary ---")
         for item in found_versions:
-            print(f"Source: {item['source']:<25} Version: {item['version']}")
+            print(f"Source: {item.source:<25} Version: {item.version}")
         print("\n--- Agreement Check ---")
 
-    # TODO: Add scheme-based normalization (PEP 440, SemVer) before comparison.
-    unique_versions = set(item["version"] for item in found_versions)
+    unique_versions = scan.unique_versions
 
     if len(unique_versions) > 1:
         versions = ", ".join(sorted(unique_versions))
@@ -198,7 +295,12 @@ def handle_check(args: argparse.Namespace) -> int:
     if getattr(args, "git_tag", False):
         if not quiet_enabled(args):
             print("\n--- Git Tag Check ---")
-        tag = get_latest_tag(project_root)
+        try:
+            tag = get_latest_tag(project_root)
+        except RuntimeError as e:
+            LOGGER.warning("Git tag check skipped: %s", e)
+            err(f"🟡 Warning: skipping tag check: {e}")
+            return 0
         if tag is None:
             out(args, "⚪ No git tags found; skipping tag check.")
         else:
@@ -215,8 +317,91 @@ def handle_check(args: argparse.Namespace) -> int:
     return 0
 
 
+def _timed_render(file_path: Path, target_version: str) -> tuple[bytes | None, float]:
+    """Render one file for the write phase and time it."""
+    started = time.perf_counter()
+    rendered = render_file(file_path, target_version)
+    return rendered, time.perf_counter() - started
+
+
+def _print_version_diffs(
+    project_root: Path, files: list[Path], target_version: str
+) -> None:
+    """Stream a unified diff of the pending version edits, one file at a time."""
+    for file_path in files:
+        raw, edits = locate_edits(file_path, target_version)
+        if not edits:
+            continue
+        encoding = "utf-8"
+        if file_path.suffix == ".py":
+            encoding, _ = tokenize.detect_encoding(io.BytesIO(raw).readline)
+        relative = file_path.relative_to(project_root).as_posix()
+        sys.stdout.writelines(
+            unified_diff_from_edits(
+                raw, edits, f"a/{relative}", f"b/{relative}", encoding=encoding
+            )
+        )
+
+
+def _pypi_preflight(
+    args: argparse.Namespace, project_root: Path, announce: Callable[[str], None]
+) -> tuple[str | None, str | None]:
+    """Look up the package name and its latest published version (worker thread)."""
+    # jiggle_version.pypi pulls in requests; only load it when a check runs.
+    from jiggle_version.pypi import get_package_name, lookup_latest_version
+
+    package_name = get_package_name(project_root)
+    if not package_name:
+        return None, None
+    latest = lookup_latest_version(
+        package_name,
+        indexes_from_settings(
+            getattr(args, "pypi_index_url", None),
+            getattr(args, "pypi_backend", None),
+        ),
+        cache=cache_from_config(vars(args)),
+        mode=_pypi_cache_mode(args),
+        announce=announce,
+    )
+    return package_name, latest
+
+
+def _start_preflight(
+    args: argparse.Namespace, project_root: Path, announce: Callable[[str], None]
+) -> Future[tuple[str | None, str | None]]:
+    """
+    Runs :func:`_pypi_preflight` on a daemon thread.
+
+    The bump may still stop early (no version, a conflict, a failed analysis)
+    without asking for the answer. A daemon thread lets the process exit then,
+    instead of waiting out the lookup's deadline the way an executor worker
+    would.
+    """
+    future: Future[tuple[str | None, str | None]] = Future()
+    future.set_running_or_notify_cancel()
+
+    def run() -> None:
+        try:
+            future.set_result(_pypi_preflight(args, project_root, announce))
+        except BaseException as exc:  # noqa: BLE001 - re-raised by future.result()
+            future.set_exception(exc)
+
+    threading.Thread(target=run, name="pypi-preflight", daemon=True).start()
+    return future
+
+
+def _pypi_cache_mode(args: argparse.Namespace) -> str:
+    """pypi_cache_mode from config, unless --strict-pypi forces blocking lookups."""
+    if getattr(args, "strict_pypi", False):
+        return "blocking"
+    return getattr(args, "pypi_cache_mode", None) or "blocking"
+
+
 def handle_bump(args: argparse.Namespace) -> int:
     """Handler for the 'bump' command."""
+    if getattr(args, "diff", False):
+        # A diff only describes edits that were not made.
+        args.dry_run = True
     LOGGER.info(
         "Running bump… increment=%s scheme=%s dry_run=%s autogit=%s",
         args.increment,
@@ -225,7 +410,7 @@ def handle_bump(args: argparse.Namespace) -> int:
         args.autogit,
     )
 
-    # --- 1. Discover and check for agreement (similar to 'check' command) ---
+    # --- 1. Discover and check for agreement (the same scan as 'check') ---
     project_root = Path(args.project_root)
 
     if args.autogit != "off":
@@ -239,6 +424,13 @@ def handle_bump(args: argparse.Namespace) -> int:
                 "Failed to check repo dirtiness: %s", e, exc_info=args.verbose > 1
             )
 
+    # The PyPI lookup does not depend on anything below, so start it now and
+    # let the network wait overlap with discovery and parsing (joined at 2.5).
+    preflight: Future[tuple[str | None, str | None]] | None = None
+    preflight_messages: list[str] = []
+    if not args.no_check_pypi and not args.dry_run:
+        preflight = _start_preflight(args, project_root, preflight_messages.append)
+
     # --- Determine increment (normalize once) ---
     increment = args.increment
     digest_path = Path(args.project_root) / ".jiggle_version.config"
@@ -254,40 +446,19 @@ def handle_bump(args: argparse.Namespace) -> int:
             err(f"❌ Error during auto-increment analysis: {e}")
             return AUTOINCREMENT_ERROR
 
-    found_versions: list[str] = []
-    parser_map = {
-        "pyproject.toml": parse_pyproject_toml,
-        "setup.cfg": parse_setup_cfg,
-        "setup.py": parse_setup_py,
-    }
-
-    try:
-        source_files = find_source_files(project_root, args.ignore)
-    except Exception as e:
-        LOGGER.error("Discovery failed: %s", e, exc_info=args.verbose > 0)
-        err(f"❌ Discovery failed: {e}")
+    scan = _scan_or_report(args, "❌ Discovery failed")
+    if scan is None:
         return DISCOVERY_ERROR
 
-    source_files_with_versions: list[Path] = []
-    for file_path in source_files:
-        parser_func = parser_map.get(file_path.name, parse_python_module)
-        try:
-            version = parser_func(file_path)
-        except Exception as e:
-            LOGGER.warning(
-                "Parsing error in %s: %s", file_path, e, exc_info=args.verbose > 1
-            )
-            continue
-        if version:
-            found_versions.append(version)
-            source_files_with_versions.append(file_path)
+    found_versions = scan.versions
+    source_files_with_versions = [source.path for source in scan.found]
 
     if not found_versions:
         LOGGER.error("No version declarations found to bump.")
         err("❌ No version declarations found to bump.")
         return NO_VERSION_FOUND
 
-    unique_versions = set(found_versions)
+    unique_versions = scan.unique_versions
     if len(unique_versions) > 1 and not args.force_write:
         LOGGER.error(
             "Version conflict prevents bump. versions=%s", sorted(unique_versions)
@@ -325,17 +496,26 @@ def handle_bump(args: argparse.Namespace) -> int:
         return VERSION_BUMP_ERROR
 
     # --- 2.5. PyPI Publication Pre-flight Check ---
-    if not args.no_check_pypi and not args.dry_run:
+    if preflight is not None:
+        import requests
+
+        from jiggle_version.pypi import UnpublishedVersionError, evaluate_publication
+
         try:
-            package_name = get_package_name(project_root)
+            # Join the lookup started at the top of the command.
+            package_name, latest_published = preflight.result()
             if package_name:
                 out(args, "\nConducting PyPI publication check…")
-                check_pypi_publication(
+                # Collected on the worker thread; shown here, in order, and
+                # silenced by --quiet like the rest of the bump's output.
+                for message in preflight_messages:
+                    out(args, message)
+                evaluate_publication(
                     package_name=package_name,
+                    latest_published_str=latest_published,
                     current_version=current_version,
                     new_version=target_version,
-                    # >>> PASS THE CONFIG PATH
-                    config_path=digest_path,
+                    announce=lambda message: out(args, message),
                 )
             else:
                 LOGGER.info("Skipping PyPI check: no package name in pyproject.toml.")
@@ -351,8 +531,17 @@ def handle_bump(args: argparse.Namespace) -> int:
                 "Hint: If this is a private package, use --no-check-pypi to bypass this check."
             )
             return PYPI_CHECK_FAILED
+        except requests.RequestException as e:
+            # Fail closed: an unreachable index could be hiding an unpublished
+            # version, so the bump is blocked unless the check is switched off.
+            LOGGER.error(
+                "PyPI pre-flight lookup failed: %s", e, exc_info=args.verbose > 1
+            )
+            err(f"\n❌ Could not complete PyPI check: {e}")
+            err("Hint: To bump without the check, use --no-check-pypi.")
+            return PYPI_CHECK_FAILED
         except Exception as e:
-            # Catch other potential errors like network issues
+            # Catch other potential errors like an unparseable published version
             LOGGER.warning(
                 "PyPI check could not complete: %s", e, exc_info=args.verbose > 1
             )
@@ -364,35 +553,73 @@ def handle_bump(args: argparse.Namespace) -> int:
             print(f"{current_version} -> {target_version}")
         else:
             print("\n--dry-run enabled, no files will be changed.")
+        if getattr(args, "diff", False):
+            try:
+                _print_version_diffs(
+                    project_root, source_files_with_versions, target_version
+                )
+            except Exception as e:
+                LOGGER.error("Failed to render diff: %s", e, exc_info=args.verbose > 0)
+                err(f"❌ Failed to render diff: {e}")
+                return FILE_UPDATE_ERROR
     else:
         out(args, "\nUpdating files…")
-        updater_map = {
-            "pyproject.toml": update_pyproject_toml,
-            "setup.cfg": update_setup_cfg,
-            "setup.py": update_python_file,
-        }
-        for file_path in source_files_with_versions:
+        jobs = getattr(args, "jobs", 0) or default_worker_count()
+        # Render every new file content first (concurrently); nothing touches
+        # disk until all renders succeed, then the transaction swaps them in.
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(jobs, len(source_files_with_versions)))
+        ) as pool:
+            renders = [
+                (file_path, pool.submit(_timed_render, file_path, target_version))
+                for file_path in source_files_with_versions
+            ]
+        transaction = WriteTransaction(max_workers=jobs)
+        render_latency: dict[Path, float] = {}
+        for file_path, future in renders:
             relative_path = file_path.relative_to(project_root)
-            updater_func = updater_map.get(file_path.name, update_python_file)
             try:
-                updater_func(file_path, target_version)
-                out(args, f"✅ Updated {relative_path}")
+                rendered, render_latency[file_path] = future.result()
+                if rendered is not None:
+                    transaction.stage(file_path, rendered)
             except Exception as e:
                 LOGGER.error(
                     "Failed to update %s: %s", file_path, e, exc_info=args.verbose > 0
                 )
                 err(f"❌ Failed to update {relative_path}: {e}")
                 return FILE_UPDATE_ERROR
+        digest_staged = False
         if args.increment == "auto":
-            out(args, "\nUpdating API digest file…")
+            # Staged with the version edits so an interrupted bump keeps neither.
             try:
                 current_symbols = get_current_symbols(project_root, args.ignore)
-                write_digest_data(digest_path, current_symbols)
-                out(args, "✅ Updated .jiggle_version.config")
+                transaction.stage(
+                    digest_path, render_digest_data(current_symbols).encode("utf-8")
+                )
+                digest_staged = True
             except Exception as e:
                 LOGGER.warning(
                     "Failed updating digest: %s", e, exc_info=args.verbose > 0
                 )
+        written = set(transaction.paths)
+        try:
+            transaction.commit()
+        except TransactionError as e:
+            LOGGER.error("Failed to write files: %s", e, exc_info=args.verbose > 0)
+            err(f"❌ Failed to update files, no changes were kept: {e}")
+            return FILE_UPDATE_ERROR
+        for file_path in source_files_with_versions:
+            relative_path = file_path.relative_to(project_root)
+            latency_ms = 1000 * (
+                render_latency[file_path] + transaction.latencies.get(file_path, 0.0)
+            )
+            if file_path in written:
+                out(args, f"✅ Updated {relative_path} ({latency_ms:.1f} ms)")
+            else:
+                out(args, f"⚪ Unchanged {relative_path} ({latency_ms:.1f} ms)")
+        if digest_staged:
+            out(args, "\nUpdating API digest file…")
+            out(args, "✅ Updated .jiggle_version.config")
 
     # --- 4. Autogit ---
     if args.autogit != "off" and not args.dry_run:
@@ -432,42 +659,65 @@ def handle_bump(args: argparse.Namespace) -> int:
     return 0
 
 
+def _watch_check(args: argparse.Namespace, scan: ScanResult, rc: int) -> int:
+    """``check --watch``: re-check agreement whenever a version source changes."""
+    from jiggle_version.watch import SourceWatcher
+
+    watcher = SourceWatcher(
+        scan, interval=args.watch_interval, spans=ndjson_enabled(args)
+    )
+    if not ndjson_enabled(args):
+        out(
+            args,
+            f"\nWatching {len(watcher.stamps)} version source(s) for changes "
+            "(Ctrl-C to stop)…",
+        )
+    last_rc = rc
+
+    def on_change(before: list[SourceVersion], after: list[SourceVersion]) -> None:
+        nonlocal last_rc
+        if ndjson_enabled(args):
+            last_rc = _report_ndjson(args, scan, sources=after, check_tag=False)
+            return
+        stamp = time.strftime("%H:%M:%S")
+        for old, new in zip(before, after):
+            was = old.version or "no version"
+            now = new.version or ("parse failed" if new.error else "no version")
+            out(args, f"[{stamp}] {new.relative_path}: {was} -> {now}")
+        unique_versions = scan.unique_versions
+        if not unique_versions:
+            err("❌ No version declarations were found.")
+            last_rc = NO_VERSION_FOUND
+        elif len(unique_versions) > 1:
+            err(
+                f"❌ Version conflict detected: {len(unique_versions)} versions found "
+                f"({', '.join(sorted(unique_versions))})"
+            )
+            last_rc = VERSION_DISAGREEMENT
+        else:
+            out(args, f"✅ All discovered versions agree on {scan.agreed_version}.")
+            last_rc = 0
+
+    try:
+        watcher.watch(on_change)
+    except KeyboardInterrupt:
+        out(args, "\nStopped watching.")
+    return last_rc
+
+
 def handle_print(args: argparse.Namespace) -> int:
     """Handler for the 'print' command."""
     LOGGER.info("Running print… project_root=%s", args.project_root)
-    project_root = Path(args.project_root)
-    found_versions = []
-    parser_map = {
-        "pyproject.toml": parse_pyproject_toml,
-        "setup.cfg": parse_setup_cfg,
-        "setup.py": parse_setup_py,
-    }
-    # Pass the ignore argument to the discovery function
-    try:
-        source_files = find_source_files(project_root, args.ignore)
-    except Exception as e:
-        LOGGER.error("Discovery failed: %s", e, exc_info=args.verbose > 0)
-        err(f"Error: Discovery failed: {e}")
+    scan = _scan_or_report(args, "Error: Discovery failed")
+    if scan is None:
         return DISCOVERY_ERROR
-
-    for file_path in source_files:
-        parser_func = parser_map.get(file_path.name, parse_python_module)
-        try:
-            version = parser_func(file_path)
-        except Exception as e:
-            LOGGER.warning(
-                "Parse failed for %s: %s", file_path, e, exc_info=args.verbose > 1
-            )
-            continue
-        if version:
-            found_versions.append(
-                {"source": str(file_path.relative_to(project_root)), "version": version}
-            )
-    if not found_versions:
+    if ndjson_enabled(args):
+        return _report_ndjson(args, scan)
+    if not scan.found:
         LOGGER.error("No version found for print.")
         err("Error: No version found.")
         return NO_VERSION_FOUND
-    unique_versions = set(item["version"] for item in found_versions)
+    unique_versions = scan.unique_versions
     if len(unique_versions) > 1:
         LOGGER.error("Version conflict on print: %s", sorted(unique_versions))
         err(
@@ -482,26 +732,153 @@ def handle_inspect(args: argparse.Namespace) -> int:
     """Handler for the 'inspect' command."""
     LOGGER.info("Running inspect… project_root=%s", args.project_root)
     project_root = Path(args.project_root)
-    if not quiet_enabled(args):
+    if not quiet_enabled(args) and not ndjson_enabled(args):
         print(f"Inspecting project at: {project_root.resolve()}")
-    # Pass the ignore argument to the discovery function
-    try:
-        source_files = find_source_files(project_root, args.ignore)
-    except Exception as e:
-        LOGGER.error("Discovery failed: %s", e, exc_info=args.verbose > 0)
-        err(f"Error: Discovery failed: {e}")
+    # One scan serves both the file listing and the check report.
+    scan = _scan_or_report(args, "Error: Discovery failed")
+    if scan is None:
         return DISCOVERY_ERROR
+    if ndjson_enabled(args):
+        return _report_ndjson(args, scan)
 
     if quiet_enabled(args):
-        check_rc = handle_check(args)
+        check_rc = _report_check(args, scan)
         if check_rc == 0:
-            print(f"inspect: {len(source_files)} files")
+            print(f"inspect: {len(scan.files)} files")
+        if getattr(args, "stats", False):
+            _print_discovery_stats(scan)
         return check_rc
 
-    print(f"\nFound {len(source_files)} potential source file(s):")
-    for file in source_files:
+    print(f"\nFound {len(scan.files)} potential source file(s):")
+    for file in scan.files:
         print(f"  - {file.relative_to(project_root)}")
-    return handle_check(args)
+    if getattr(args, "stats", False):
+        _print_discovery_stats(scan)
+    return _report_check(args, scan)
+
+
+def _print_discovery_stats(scan: ScanResult) -> None:
+    """The ``inspect --stats`` table."""
+    stats = scan.discovery_stats
+    rows = [
+        ("Directories listed", stats.directories_listed),
+        ("Entries examined", stats.entries_examined),
+        ("Pruned (default ignores)", stats.pruned_default),
+        ("Pruned (.gitignore)", stats.pruned_gitignore),
+        ("Pruned (explicit ignore)", stats.pruned_explicit),
+        ("Venv roots skipped", stats.venv_roots_skipped),
+        ("Unreadable paths", stats.unreadable),
+        ("Stat calls", stats.stat_calls),
+        ("Path resolutions", stats.path_resolutions),
+    ]
+    print("\n--- Discovery Statistics ---")
+    for label, value in rows:
+        print(f"{label + ':':<27}{value}")
+    print(f"{'Wall time:':<27}{stats.seconds * 1000:.1f} ms")
+
+
+def handle_check_pypi(args: argparse.Namespace) -> int:
+    """Handler for the 'check-pypi' command."""
+    LOGGER.info(
+        "Running check-pypi… project_root=%s all=%s", args.project_root, args.all
+    )
+    project_root = Path(args.project_root)
+    try:
+        if args.all:
+            project_files = find_project_files(project_root, args.ignore)
+        else:
+            project_files = [project_root / "pyproject.toml"]
+    except Exception as e:
+        LOGGER.error("Discovery failed: %s", e, exc_info=args.verbose > 0)
+        err(f"Error: Discovery failed: {e}")
+        return DISCOVERY_ERROR
+
+    from jiggle_version.pypi import check_publications, get_package_name
+
+    packages: list[tuple[str, str | None]] = []
+    for pyproject_path in project_files:
+        package_name = get_package_name(pyproject_path.parent)
+        if not package_name:
+            LOGGER.info("No [project].name in %s; skipping.", pyproject_path)
+            continue
+        try:
+            local_version = parse_pyproject_toml(pyproject_path)
+        except (OSError, UnicodeDecodeError, AttributeError) as e:
+            # Unreadable, not UTF-8, or [project] that is not a table.
+            LOGGER.warning("Parse failed for %s: %s", pyproject_path, e)
+            local_version = None
+        packages.append((package_name, local_version))
+    if not packages:
+        err("Error: No projects with a [project].name found.")
+        return NO_CONFIG_FOUND
+
+    try:
+        results = check_publications(
+            packages,
+            indexes=indexes_from_settings(
+                getattr(args, "pypi_index_url", None),
+                getattr(args, "pypi_backend", None),
+            ),
+            cache=cache_from_config(vars(args)),
+            mode=_pypi_cache_mode(args),
+            max_workers=max(1, args.jobs),
+        )
+    except ValueError as e:
+        err(f"Error: {e}")
+        return PYPI_CHECK_FAILED
+
+    failed = [result for result in results if not result.ok]
+    if not quiet_enabled(args):
+        width = max(len(result.package_name) for result in results)
+        for result in results:
+            latest = result.latest_version or (
+                f"({result.error})" if result.error else "-"
+            )
+            print(
+                f"{result.package_name:<{width}}  {result.local_version or '-':<12} "
+                f"{latest:<12} {result.status}"
+            )
+    print(f"check-pypi: {len(results) - len(failed)}/{len(results)} found")
+    return PYPI_CHECK_FAILED if failed else 0
+
+
+def handle_serve(args: argparse.Namespace) -> int:
+    """Handler for the 'serve' command."""
+    import signal
+
+    socket_path = Path(args.socket) if args.socket else daemon.default_socket_path()
+    if args.stop:
+        if daemon.send_op("stop", socket_path):
+            out(args, f"Stopped the daemon on {socket_path}.")
+            return 0
+        err(f"No daemon is listening on {socket_path}.")
+        return UNEXPECTED_ERROR
+
+    def interrupt(_signum: int, _frame: object) -> None:
+        raise KeyboardInterrupt
+
+    def accepts(argv: list[str]) -> bool:
+        command, _ = scan_command_line(argv)
+        return command in daemon.DAEMON_COMMANDS and not daemon.runs_locally(argv)
+
+    signal.signal(signal.SIGTERM, interrupt)
+    set_scan_cache(ScanCache())
+    server = daemon.Daemon(
+        socket_path, run=lambda argv: main(argv, use_daemon=False), accepts=accepts
+    )
+    try:
+        server.serve_forever(
+            ready=lambda: out(args, f"Serving check/print on {socket_path}")
+        )
+    except daemon.DaemonError as e:
+        err(f"❌ {e}")
+        return UNEXPECTED_ERROR
+    except KeyboardInterrupt:
+        pass
+    finally:
+        set_scan_cache(None)
+    out(args, f"Daemon stopped after {server.requests} request(s).")
+    return 0
 
 
 def handle_hash_all(args: argparse.Namespace) -> int:
@@ -560,6 +937,80 @@ default_increment = "patch"
 # --- New: isolated bump subparser factory (from-scratch) ---
 
 
+def add_pypi_arguments(p: argparse.ArgumentParser) -> None:
+    """Index selection and cache flags shared by `bump` and `check-pypi`."""
+    p.add_argument(
+        "--pypi-backend",
+        choices=list(BACKENDS),
+        default=None,
+        help="Index API for the PyPI check: json (default) or the PEP 691 simple API.",
+    )
+    p.add_argument(
+        "--pypi-index-url",
+        action="append",
+        default=None,
+        help="Index root for the PyPI check; repeat to query several indexes "
+        "concurrently. file:// directories are read as simple indexes.",
+    )
+    p.add_argument(
+        "--strict-pypi",
+        action="store_true",
+        default=False,
+        help="Always wait for the index when the PyPI cache has expired "
+        "(ignores pypi_cache_mode).",
+    )
+
+
+def add_instrumentation_arguments(p: argparse.ArgumentParser) -> None:
+    """Diagnostics flags shared by every subcommand."""
+    g = p.add_argument_group("diagnostics")
+    g.add_argument(
+        "--timings",
+        nargs="?",
+        const="text",
+        choices=["text", "json"],
+        default=None,
+        help="Print a per-phase time breakdown to stderr (--timings=json for JSON).",
+    )
+    g.add_argument(
+        "--trace-file",
+        default=None,
+        metavar="PATH",
+        help="Write a Chrome Trace Event file of the run (open in Perfetto).",
+    )
+    g.add_argument(
+        "--profile",
+        choices=["cpu", "mem"],
+        default=None,
+        help="Profile the command: cpu writes a pstats file, mem a tracemalloc "
+        "snapshot; a summary is printed to stderr.",
+    )
+    g.add_argument(
+        "--profile-output",
+        default=None,
+        metavar="PATH",
+        help="Where --profile writes its file "
+        "(default: ./jiggle_version-<command>.pstats or .tracemalloc).",
+    )
+    g.add_argument(
+        "--metrics-file",
+        default=None,
+        metavar="PATH",
+        help="Write Prometheus textfile metrics for the run (e.g. jiggle_version.prom).",
+    )
+
+
+def add_format_argument(p: argparse.ArgumentParser) -> None:
+    """``--format`` for the read-only reporting commands."""
+    p.add_argument(
+        "--format",
+        choices=["text", "ndjson"],
+        default="text",
+        help="Output format: text, or ndjson (one JSON record per source plus a "
+        "summary record).",
+    )
+
+
 def build_bump_subparser(
     subparsers: argparse._SubParsersAction,
 ) -> argparse.ArgumentParser:
@@ -569,7 +1020,7 @@ def build_bump_subparser(
     then load pyproject.toml, then *override* selected fields from config.
     This keeps precedence explicit: CONFIG > CLI > hardcoded fallback.
     """
-    p = subparsers.add_parser("bump", help="Bump the project version.")
+    p = subparsers.add_parser("bump", help=COMMAND_HELP["bump"])
     p.add_argument(
         "--increment",
         choices=["major", "minor", "patch", "auto"],
@@ -583,6 +1034,12 @@ def build_bump_subparser(
     p.add_argument(
         "--dry-run", action="store_true", help="Simulate without writing files."
     )
+    p.add_argument(
+        "--diff",
+        action="store_true",
+        default=False,
+        help="Print a unified diff of the edits that would be made (implies --dry-run).",
+    )
     p.add_argument(
         "--set",
         dest="set_version",
@@ -597,12 +1054,20 @@ def build_bump_subparser(
         help="Write even on disagreement.",
     )
 
+    p.add_argument(
+        "--jobs",
+        type=int,
+        default=0,
+        help="Worker threads for rendering and writing files (0 = auto).",
+    )
+
     p.add_argument(
         "--no-check-pypi",
         action="store_true",
         default=False,
         help="Disable the pre-flight check against pypi.org.",
     )
+    add_pypi_arguments(p)
 
     # Autogit group (all optional; config may override later)
     g = p.add_argument_group("autogit options")
@@ -625,22 +1090,232 @@ def build_bump_subparser(
         help="Allow autogit even if repo has uncommitted changes.",
     )
 
+    add_instrumentation_arguments(p)
     p.set_defaults(func=handle_bump)
     return p
 
 
+def build_check_subparser(
+    subparsers: argparse._SubParsersAction,
+) -> argparse.ArgumentParser:
+    p = subparsers.add_parser("check", help=COMMAND_HELP["check"])
+    p.add_argument(
+        "--git-tag",
+        action="store_true",
+        default=False,
+        dest="git_tag",
+        help="Also compare the agreed version against the most recent git tag.",
+    )
+    mode = p.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--watch",
+        action="store_true",
+        default=False,
+        help="Keep running and re-check whenever a discovered version source changes.",
+    )
+    mode.add_argument(
+        "--staged",
+        action="store_true",
+        default=False,
+        help="Check the versions staged for the next commit (for pre-commit hooks); "
+        "untouched sources come from a cache instead of a walk.",
+    )
+    p.add_argument(
+        "--watch-interval",
+        type=float,
+        default=0.5,
+        metavar="SECONDS",
+        help="How often --watch polls the version sources (default: 0.5).",
+    )
+    add_format_argument(p)
+    add_instrumentation_arguments(p)
+    p.set_defaults(func=handle_check)
+    return p
+
+
+def build_print_subparser(
+    subparsers: argparse._SubParsersAction,
+) -> argparse.ArgumentParser:
+    p = subparsers.add_parser("print", help=COMMAND_HELP["print"])
+    add_format_argument(p)
+    add_instrumentation_arguments(p)
+    p.set_defaults(func=handle_print)
+    return p
+
+
+def build_inspect_subparser(
+    subparsers: argparse._SubParsersAction,
+) -> argparse.ArgumentParser:
+    p = subparsers.add_parser("inspect", help=COMMAND_HELP["inspect"])
+    p.add_argument(
+        "--stats",
+        action="store_true",
+        default=False,
+        help="Also report what discovery cost: directories, entries, pruning, stat calls.",
+    )
+    add_format_argument(p)
+    add_instrumentation_arguments(p)
+    p.set_defaults(func=handle_inspect)
+    return p
+
+
+def build_serve_subparser(
+    subparsers: argparse._SubParsersAction,
+) -> argparse.ArgumentParser:
+    p = subparsers.add_parser("serve", help=COMMAND_HELP["serve"])
+    p.add_argument(
+        "--socket",
+        default=None,
+        metavar="PATH",
+        help="Unix socket to listen on (default: $JIGGLE_VERSION_SOCKET, else "
+        "jiggle_version.sock in $XDG_RUNTIME_DIR or the user cache directory).",
+    )
+    p.add_argument(
+        "--stop",
+        action="store_true",
+        default=False,
+        help="Stop the daemon listening on the socket instead of starting one.",
+    )
+    p.set_defaults(func=handle_serve)
+    return p
+
+
+def build_check_pypi_subparser(
+    subparsers: argparse._SubParsersAction,
+) -> argparse.ArgumentParser:
+    p = subparsers.add_parser("check-pypi", help=COMMAND_HELP["check-pypi"])
+    p.add_argument(
+        "--all",
+        action="store_true",
+        default=False,
+        help="Check every project (pyproject.toml) under the project root.",
+    )
+    p.add_argument(
+        "--jobs",
+        type=int,
+        default=8,
+        help="Maximum concurrent index lookups.",
+    )
+    add_pypi_arguments(p)
+    add_instrumentation_arguments(p)
+    p.set_defaults(func=handle_check_pypi)
+    return p
+
+
+def build_hash_all_subparser(
+    subparsers: argparse._SubParsersAction,
+) -> argparse.ArgumentParser:
+    p = subparsers.add_parser("hash-all", help=COMMAND_HELP["hash-all"])
+    add_instrumentation_arguments(p)
+    p.set_defaults(func=handle_hash_all)
+    return p
+
+
+def build_init_subparser(
+    subparsers: argparse._SubParsersAction,
+) -> argparse.ArgumentParser:
+    p = subparsers.add_parser("init", help=COMMAND_HELP["init"])
+    add_instrumentation_arguments(p)
+    p.set_defaults(func=handle_init)
+    return p
+
+
+COMMAND_HELP = {
+    "check": "Check that discovered version declarations agree.",
+    "bump": "Bump the project version.",
+    "print": "Print the discovered normalized project version.",
+    "inspect": "Show a detailed report of discovered version sources.",
+    "check-pypi": "Report the publication status of one or many projects.",
+    "hash-all": "Compute and store __all__ digests without bumping.",
+    "init": "Create default [tool.jiggle_version] config in pyproject.toml.",
+    "serve": "Answer check/print from a warm daemon over a Unix socket.",
+}
+
+SUBPARSER_BUILDERS: dict[
+    str, Callable[[argparse._SubParsersAction], argparse.ArgumentParser]
+] = {
+    "check": build_check_subparser,
+    "bump": build_bump_subparser,
+    "print": build_print_subparser,
+    "inspect": build_inspect_subparser,
+    "check-pypi": build_check_pypi_subparser,
+    "hash-all": build_hash_all_subparser,
+    "init": build_init_subparser,
+    "serve": build_serve_subparser,
+}
+
+# Global options that consume the next token, and the one that consumes every
+# bare token up to the next option (nargs="+").
+_GLOBAL_VALUE_OPTIONS = ("--config", "--log-level", "--project-root")
+_GLOBAL_GREEDY_OPTIONS = ("--ignore",)
+_GLOBAL_FLAGS = (
+    "-h",
+    "--help",
+    "--version",
+    "--verbose",
+    "--no-color",
+    "-q",
+    "--quiet",
+)
+
+
+def scan_command_line(cli_args: Sequence[str]) -> tuple[str | None, str]:
+    """Finds the subcommand and ``--config`` path without building a parser.
+
+    Walks the global options the way argparse reads them; the first bare
+    token after them is the subcommand. Anything it does not recognize
+    (abbreviated or unknown options, ``--``) makes the command ``None`` so
+    the caller falls back to the full parser, which is always correct.
+
+    Returns:
+        (command or None, config path)
+    """
+    config = "pyproject.toml"
+    tokens = list(cli_args)
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        name, has_value, value = token.partition("=")
+        if token == "--":
+            return None, config
+        if name in _GLOBAL_VALUE_OPTIONS:
+            if not has_value:
+                index += 1
+                if index >= len(tokens):
+                    return None, config
+                value = tokens[index]
+            if name == "--config":
+                config = value
+        elif name in _GLOBAL_GREEDY_OPTIONS:
+            while index + 1 < len(tokens) and not tokens[index + 1].startswith("-"):
+                index += 1
+        elif token.startswith("-") and len(token) > 1:
+            # -vv and friends are counted flags; anything else is ambiguous.
+            if token not in _GLOBAL_FLAGS and set(token[1:]) != {"v"}:
+                return None, config
+        else:
+            return (token if token in SUBPARSER_BUILDERS else None), config
+        index += 1
+    return None, config
+
+
 def _build_parser(
-    config_defaults: dict[str, str], use_smart: bool = True
+    config_defaults: dict[str, str],
+    use_smart: bool = True,
+    command: str | None = None,
 ) -> tuple[argparse.ArgumentParser, argparse._SubParsersAction]:
     """Construct the main parser. `config_defaults` no longer affects construction.
 
     We apply config late after initial parse to know the correct --config path.
+
+    When ``command`` is known (see :func:`scan_command_line`) only that
+    subcommand's arguments are defined; the others are registered by name
+    and help text alone so usage and error messages still list them.
     """
     ParserClass = SmartParser if use_smart else argparse.ArgumentParser
     parser = ParserClass(
         prog="jiggle_version",
         description="A safe, zero-import, config-first version bumper.",
-        formatter_class=CustomFormatter,
         add_help=False,
     )
     try:
@@ -688,46 +1363,15 @@ def _build_parser(
         dest="command", required=True, help="Sub-commands"
     )
 
-    # check
-    parser_check = subparsers.add_parser(
-        "check", help="Check that discovered version declarations agree."
-    )
-    parser_check.add_argument(
-        "--git-tag",
-        action="store_true",
-        default=False,
-        dest="git_tag",
-        help="Also compare the agreed version against the most recent git tag.",
-    )
-    parser_check.set_defaults(func=handle_check)
-
-    # bump (built via dedicated function)
-    build_bump_subparser(subparsers)
-
-    # print
-    parser_print = subparsers.add_parser(
-        "print", help="Print the discovered normalized project version."
-    )
-    parser_print.set_defaults(func=handle_print)
-
-    # inspect
-    parser_inspect = subparsers.add_parser(
-        "inspect", help="Show a detailed report of discovered version sources."
-    )
-    parser_inspect.set_defaults(func=handle_inspect)
-
-    # hash-all
-    parser_hash_all = subparsers.add_parser(
-        "hash-all", help="Compute and store __all__ digests without bumping."
-    )
-    parser_hash_all.set_defaults(func=handle_hash_all)
-
-    # init
-    parser_init = subparsers.add_parser(
-        "init", help="Create default [tool.jiggle_version] config in pyproject.toml."
-    )
-    parser_init.set_defaults(func=handle_init)
+    for name, build in SUBPARSER_BUILDERS.items():
+        if command is None or name == command:
+            build(subparsers)
+        else:
+            subparsers.add_parser(name, help=COMMAND_HELP[name])
 
+    # argparse instantiates the formatter on every add_argument (to validate
+    # metavars), so Rich is only switched in once construction is done.
+    parser.formatter_class = lazy_help_formatter
     return parser, subparsers
 
 
@@ -744,6 +1388,12 @@ BUMP_OVERRIDES = {
     "autogit": "autogit",
     "commit_message": "commit_message",
     "allow_dirty": "allow_dirty",
+    "pypi_backend": "pypi_backend",
+    "pypi_index_url": "pypi_index_url",
+    "pypi_cache_ttl": "pypi_cache_ttl",
+    "pypi_cache_miss_ttl": "pypi_cache_miss_ttl",
+    "pypi_cache_grace": "pypi_cache_grace",
+    "pypi_cache_mode": "pypi_cache_mode",
     # You can add more if you support them in config later:
     # "force_write": "force_write",
     # "set_version": "set_version",
@@ -778,7 +1428,7 @@ def apply_bump_overrides(args: argparse.Namespace, cfg: dict[str, str]) -> None:
     """
     if not hasattr(args, "command"):
         return
-    if args.command != "bump":
+    if args.command not in ("bump", "check-pypi"):
         return
     # Normalize: config loader already maps default_increment->increment.
     for k, attr in BUMP_OVERRIDES.items():
@@ -796,43 +1446,43 @@ def apply_bump_overrides(args: argparse.Namespace, cfg: dict[str, str]) -> None:
         setattr(args, "autogit", "off")
 
 
-def main(argv: Sequence[str] | None = None) -> int:
-    """Main CLI entry point."""
+def main(argv: Sequence[str] | None = None, use_daemon: bool = True) -> int:
+    """Main CLI entry point.
+
+    ``use_daemon=False`` always runs the command in this process; the daemon
+    itself runs requests that way.
+    """
     harden_standard_streams()
     cli_args = sys.argv[1:] if argv is None else list(argv)
 
-    # 0) Pre-parse ONLY --config using a minimal parser to avoid early exits
-    pre = argparse.ArgumentParser(add_help=False)
-    pre.add_argument("--config", default="pyproject.toml")
-    try:
-        pre_ns, _ = pre.parse_known_args(cli_args)
-    except SystemExit:
-        # Extremely unlikely, but log it.
-        print("❌ Early exit while reading --config", file=sys.stderr)
-        return ARGPARSE_ERROR
+    # 0) Find the subcommand and --config path with a plain token scan; no
+    #    throwaway pre-parser, and only the chosen subcommand gets built.
+    command, config_arg = scan_command_line(cli_args)
 
-    config_path = Path(pre_ns.config)
+    # 0.5) check/print go to a running `serve` daemon, if there is one.
+    if use_daemon and command in daemon.DAEMON_COMMANDS:
+        remote_exit_code = daemon.run_remote(cli_args)
+        if remote_exit_code is not None:
+            return remote_exit_code
+    config_path = Path(config_arg)
     config_from_file = load_config_from_path(config_path)
 
-    apply_global_overrides(pre_ns, config_from_file)
-    apply_bump_overrides(pre_ns, config_from_file)
-
-    # 1) Build the full parser (no config defaults baked in)
-    parser, _ = _build_parser(config_from_file, use_smart=False)
-    apply_global_overrides(pre_ns, config_from_file)
+    # 1) Build the parser (no config defaults baked in)
+    parser, _ = _build_parser(config_from_file, use_smart=False, command=command)
 
     # 2) Now parse the full CLI safely, logging parse issues
     try:
         args = parser.parse_args(cli_args)
-        apply_bump_overrides(args, config_from_file)
-        apply_global_overrides(args, config_from_file)
     except SystemExit as _e:
         # Argparse printed help/errors itself; add a debug breadcrumb and exit.
         # sys.stderr.write(f"[DEBUG] argparse SystemExit code={e.code} args={cli_args}")
         return ARGPARSE_ERROR
 
-    # 2.5) Load config (now that we trust --config path) and apply late overrides for bump
-    config_from_file = load_config_from_path(Path(args.config))
+    # 2.5) The scan only misses --config when it is spelled unusually; reload then.
+    if args.config != config_arg:
+        config_path = Path(args.config)
+        config_from_file = load_config_from_path(config_path)
+    apply_global_overrides(args, config_from_file)
     apply_bump_overrides(args, config_from_file)
 
     # 3) Configure logging as early as possible after parse
@@ -848,6 +1498,38 @@ def main(argv: Sequence[str] | None = None) -> int:
     )
 
     # 4) Dispatch
+    recorder = None
+    if (
+        getattr(args, "timings", None)
+        or getattr(args, "trace_file", None)
+        or getattr(args, "metrics_file", None)
+    ):
+        recorder = instrument.enable()
+    exit_code = ARGPARSE_ERROR
+    try:
+        with instrument.span(args.command, "command"):
+            if getattr(args, "profile", None):
+                exit_code = _dispatch_profiled(args, parser)
+            else:
+                exit_code = _dispatch(args, parser)
+        return exit_code
+    finally:
+        # Persist any stale-while-revalidate refresh before the process exits.
+        pypi = sys.modules.get("jiggle_version.pypi")
+        if pypi is not None:
+            pypi.wait_for_background_refreshes()
+        if recorder is not None:
+            instrument.disable()
+            if getattr(args, "trace_file", None):
+                _write_trace_file(args.trace_file, recorder)
+            if getattr(args, "timings", None):
+                _report_timings(args, recorder, exit_code)
+            if getattr(args, "metrics_file", None):
+                _write_metrics_file(args, recorder, exit_code)
+
+
+def _dispatch(args: argparse.Namespace, parser: argparse.ArgumentParser) -> int:
+    """Runs the selected subcommand handler."""
     try:
         if hasattr(args, "func"):
             return args.func(args)
@@ -862,5 +1544,59 @@ def main(argv: Sequence[str] | None = None) -> int:
         return ARGPARSE_ERROR
 
 
+def _dispatch_profiled(
+    args: argparse.Namespace, parser: argparse.ArgumentParser
+) -> int:
+    """Runs the handler under ``--profile`` (cProfile or tracemalloc)."""
+    from jiggle_version.profiling import default_output, run_profiled
+
+    output = (
+        Path(args.profile_output)
+        if args.profile_output
+        else default_output(args.profile, args.command)
+    )
+    return run_profiled(
+        args.profile, lambda: _dispatch(args, parser), output, report=err
+    )
+
+
+def _report_timings(
+    args: argparse.Namespace, recorder: instrument.Recorder, exit_code: int
+) -> None:
+    """Writes the --timings breakdown to stderr, keeping stdout for results."""
+    if args.timings == "json":
+        data = instrument.timings_to_dict(
+            recorder, command=args.command, exit_code=exit_code
+        )
+        print(json.dumps(data), file=sys.stderr)
+    else:
+        print(instrument.format_timings(recorder), file=sys.stderr)
+
+
+def _write_trace_file(path: str, recorder: instrument.Recorder) -> None:
+    """Writes the recorded spans as a Chrome Trace Event file."""
+    try:
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(instrument.trace_events(recorder), handle)
+    except OSError as e:
+        LOGGER.error("Could not write trace file %s: %s", path, e)
+        err(f"❌ Could not write trace file {path}: {e}")
+
+
+def _write_metrics_file(
+    args: argparse.Namespace, recorder: instrument.Recorder, exit_code: int
+) -> None:
+    """Writes the run's Prometheus textfile metrics."""
+    from jiggle_version.metrics import render_textfile, write_textfile
+
+    project = Path(args.project_root).resolve().name
+    text = render_textfile(recorder, args.command, exit_code, project=project)
+    try:
+        write_textfile(Path(args.metrics_file), text)
+    except OSError as e:
+        LOGGER.error("Could not write metrics file %s: %s", args.metrics_file, e)
+        err(f"❌ Could not write metrics file {args.metrics_file}: {e}")
+
+
 if __name__ == "__main__":
     sys.exit(main())
@@ -8,8 +8,6 @@ import hashlib
 from pathlib import Path
 from typing import Any
 
-import tomlkit
-
 from .gitignore import (
     collect_default_spec,
     is_path_explicitly_ignored,
@@ -47,22 +45,31 @@ def read_digest_data(digest_path: Path) -> dict[str, Any]:
     """Reads the stored digest data from the config file."""
     if not digest_path.is_file():
         return {}
+    import tomlkit  # deferred: only auto mode and hash-all touch the digest
+
     return tomlkit.parse(digest_path.read_text(encoding="utf-8"))
 
 
-def write_digest_data(digest_path: Path, symbols: set[str]) -> None:
-    """Writes the current symbols to the digest file."""
+def render_digest_data(symbols: set[str]) -> str:
+    """The digest file contents for ``symbols``."""
     sorted_symbols = sorted(list(symbols))
 
     # Per the PEP, we store the symbols themselves to allow for comparison.
     # A composite digest is also stored for quick checks.
     sha256 = hashlib.sha256("".join(sorted_symbols).encode("utf-8")).hexdigest()
 
+    import tomlkit  # deferred: only auto mode and hash-all touch the digest
+
     doc = tomlkit.document()
     doc.add("digest", f"sha256:{sha256}")  # type: ignore[arg-type]
     doc.add("symbols", sorted_symbols)  # type: ignore[arg-type]
 
-    digest_path.write_text(tomlkit.dumps(doc), encoding="utf-8")
+    return tomlkit.dumps(doc)
+
+
+def write_digest_data(digest_path: Path, symbols: set[str]) -> None:
+    """Writes the current symbols to the digest file."""
+    digest_path.write_text(render_digest_data(symbols), encoding="utf-8")
 
 
 def determine_auto_increment(
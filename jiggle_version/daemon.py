@@ -0,0 +1,336 @@
+# jiggle_version/daemon.py
+"""
+``jiggle_version serve``: answer ``check`` and ``print`` from a warm process.
+
+Editor integrations and pre-commit hooks run ``check`` many times a minute,
+and every run pays interpreter startup, imports, the ignore spec build and a
+full walk. The daemon pays them once: it installs a
+:class:`~jiggle_version.scan.ScanCache` and runs each request's command line
+through ``main`` in-process, so only what changed since the last request
+(by mtime) is walked or parsed again.
+
+The protocol is one JSON object per connection in each direction, over a
+Unix domain socket::
+
+    -> {"argv": ["check", "--git-tag"], "cwd": "/work/project",
+        "version": "2.2.0", "prefix": "/work/project/.venv", "env": {...}}
+    <- {"exit_code": 0, "stdout": "...", "stderr": "..."}
+
+``{"op": "ping"}`` and ``{"op": "stop"}`` check on and shut down the daemon.
+
+A daemon declines requests from a client of another jiggle_version version or
+another environment (``sys.prefix``), so an upgrade or a second virtualenv
+never gets answers computed by stale code. It also declines when the
+environment variables that affect a command (:func:`relevant_environment`)
+differ from its own: the command would run with the daemon's values. A command that fails inside the
+daemon is reported like it would be locally: exit code 1 and the traceback on
+stderr.
+
+``main`` forwards ``check`` and ``print`` command lines to a daemon listening
+on :func:`default_socket_path`; every other command runs locally without
+touching the socket. When the daemon declines, or no daemon answers, the
+command runs locally as usual. Set ``JIGGLE_VERSION_NO_DAEMON=1`` to always
+run locally.
+
+Requests are handled one at a time: each one changes the working directory
+and captures the standard streams for the duration of the command.
+"""
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import logging
+import os
+import sys
+import traceback
+from pathlib import Path
+from typing import Any, Callable
+
+from jiggle_version.__about__ import __version__
+
+LOGGER = logging.getLogger(__name__)
+
+SOCKET_ENV = "JIGGLE_VERSION_SOCKET"
+NO_DAEMON_ENV = "JIGGLE_VERSION_NO_DAEMON"
+SOCKET_NAME = "jiggle_version.sock"
+# Commands main() forwards; both are read-only.
+DAEMON_COMMANDS = ("check", "print")
+# Options that make a command long-running; those always run in the caller.
+LOCAL_ONLY_OPTIONS = ("--watch",)
+# How long the client waits for an answer before running the command itself.
+CLIENT_TIMEOUT = 30.0
+_MAX_REQUEST = 1024 * 1024
+# Environment variables that change what a command reads or computes (caches,
+# config locations, git's repository and index). The client's values must
+# match the daemon's. The daemon-selection variables are left out.
+ENV_PREFIXES = ("JIGGLE_VERSION_", "GIT_", "XDG_")
+ENV_NAMES = ("HOME", "PATH")
+_SELECTION_ENV = (SOCKET_ENV, NO_DAEMON_ENV)
+
+
+def relevant_environment() -> dict[str, str]:
+    """The environment variables a daemon and its client must agree on."""
+    return {
+        name: value
+        for name, value in os.environ.items()
+        if (name.startswith(ENV_PREFIXES) or name in ENV_NAMES)
+        and name not in _SELECTION_ENV
+    }
+
+
+class DaemonError(Exception):
+    """Raised when the daemon cannot start (socket in use, no AF_UNIX)."""
+
+
+def default_socket_path() -> Path:
+    """
+    Where ``serve`` listens and the client looks:
+
+    ``$JIGGLE_VERSION_SOCKET``, else ``$XDG_RUNTIME_DIR/jiggle_version.sock``,
+    else ``jiggle_version.sock`` in the user cache directory.
+    """
+    override = os.environ.get(SOCKET_ENV)
+    if override:
+        return Path(override)
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / SOCKET_NAME
+    from jiggle_version.pypi_cache import user_cache_dir
+
+    return user_cache_dir() / SOCKET_NAME
+
+
+def _read_message(conn: Any) -> dict[str, Any]:
+    """Reads one JSON message (everything until the peer stops sending)."""
+    chunks = []
+    size = 0
+    while True:
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > _MAX_REQUEST:
+            raise ValueError("message too large")
+        chunks.append(chunk)
+    return json.loads(b"".join(chunks).decode("utf-8"))
+
+
+def _exchange(socket_path: Path, message: dict[str, Any], timeout: float) -> Any:
+    """Sends ``message`` and returns the decoded reply."""
+    import socket
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.settimeout(timeout)
+        conn.connect(str(socket_path))
+        conn.sendall(json.dumps(message).encode("utf-8"))
+        conn.shutdown(socket.SHUT_WR)
+        return _read_message(conn)
+
+
+def runs_locally(argv: list[str]) -> bool:
+    """True for command lines the daemon must not take (``check --watch``)."""
+    return any(arg in LOCAL_ONLY_OPTIONS for arg in argv)
+
+
+def run_remote(
+    argv: list[str],
+    socket_path: Path | None = None,
+    timeout: float = CLIENT_TIMEOUT,
+) -> int | None:
+    """
+    Runs ``argv`` in the daemon and replays its output locally.
+
+    Returns:
+        The command's exit code, or None when no daemon answered (the caller
+        then runs the command itself).
+    """
+    if os.environ.get(NO_DAEMON_ENV) or runs_locally(argv):
+        return None
+    socket_path = socket_path or default_socket_path()
+    # The common case: no daemon. One stat, and the socket module stays unloaded.
+    if not socket_path.exists():
+        return None
+    try:
+        reply = _exchange(
+            socket_path,
+            {
+                "argv": list(argv),
+                "cwd": os.getcwd(),
+                "version": __version__,
+                "prefix": sys.prefix,
+                "env": relevant_environment(),
+            },
+            timeout,
+        )
+        if reply.get("declined"):
+            LOGGER.debug(
+                "Daemon at %s declined (%s); running locally",
+                socket_path,
+                reply.get("reason", "unsupported command"),
+            )
+            return None
+        exit_code = int(reply["exit_code"])
+        stdout, stderr = str(reply["stdout"]), str(reply["stderr"])
+    except (OSError, ValueError, KeyError, TypeError) as exc:
+        LOGGER.debug(
+            "Daemon at %s did not answer (%s); running locally", socket_path, exc
+        )
+        return None
+    sys.stdout.write(stdout)
+    sys.stdout.flush()
+    sys.stderr.write(stderr)
+    sys.stderr.flush()
+    return exit_code
+
+
+def send_op(op: str, socket_path: Path | None = None, timeout: float = 5.0) -> bool:
+    """Sends ``ping`` or ``stop``; True when a daemon acknowledged it."""
+    try:
+        reply = _exchange(socket_path or default_socket_path(), {"op": op}, timeout)
+    except (OSError, ValueError):
+        return False
+    return isinstance(reply, dict) and bool(reply.get("ok"))
+
+
+class Daemon:
+    """Serves command lines over a Unix socket, one request at a time."""
+
+    def __init__(
+        self,
+        socket_path: Path,
+        run: Callable[[list[str]], int],
+        accepts: Callable[[list[str]], bool] = lambda argv: True,
+        version: str = __version__,
+        prefix: str = sys.prefix,
+    ):
+        self.socket_path = socket_path
+        # Runs one command line in-process and returns its exit code.
+        self.run = run
+        # Whether a command line is one the daemon answers.
+        self.accepts = accepts
+        # Requests from another version or environment are declined.
+        self.version = version
+        self.prefix = prefix
+        self.requests = 0
+        self._stopping = False
+
+    def handle(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Answers one decoded request."""
+        op = request.get("op", "run")
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid(), "requests": self.requests}
+        if op == "stop":
+            self._stopping = True
+            return {"ok": True}
+        if op != "run":
+            return {"ok": False, "error": f"unknown op {op!r}"}
+        argv = [str(arg) for arg in request["argv"]]
+        if request.get("version") != self.version:
+            return {"declined": True, "reason": f"daemon runs {self.version}"}
+        if request.get("prefix") != self.prefix:
+            return {"declined": True, "reason": f"daemon runs in {self.prefix}"}
+        client_env = request.get("env")
+        if not isinstance(client_env, dict):
+            return {"declined": True, "reason": "no environment sent"}
+        own_env = relevant_environment()
+        differing = sorted(
+            name
+            for name in set(client_env) | set(own_env)
+            if client_env.get(name) != own_env.get(name)
+        )
+        if differing:
+            return {
+                "declined": True,
+                "reason": f"environment differs: {', '.join(differing)}",
+            }
+        if not self.accepts(argv):
+            return {"declined": True}
+        self.requests += 1
+        return self._run(argv, request.get("cwd") or os.getcwd())
+
+    def _run(self, argv: list[str], cwd: str) -> dict[str, Any]:
+        stdout, stderr = io.StringIO(), io.StringIO()
+        previous_dir = os.getcwd()
+        # main() reconfigures the root logger for each command; put ours back after.
+        root = logging.getLogger()
+        handlers, level = list(root.handlers), root.level
+        try:
+            os.chdir(cwd)
+        except OSError as exc:
+            return {"exit_code": 1, "stdout": "", "stderr": f"daemon: {exc}\n"}
+        try:
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                try:
+                    exit_code = self.run(argv)
+                except SystemExit as exc:
+                    exit_code = exc.code if isinstance(exc.code, int) else 1
+                except Exception:  # noqa: BLE001
+                    # What the command would have printed running locally.
+                    traceback.print_exc()
+                    exit_code = 1
+        finally:
+            os.chdir(previous_dir)
+            root.handlers[:] = handlers
+            root.setLevel(level)
+        return {
+            "exit_code": exit_code,
+            "stdout": stdout.getvalue(),
+            "stderr": stderr.getvalue(),
+        }
+
+    def _bind(self) -> Any:
+        import socket
+
+        if not hasattr(socket, "AF_UNIX"):
+            raise DaemonError("serve needs Unix domain sockets (AF_UNIX)")
+        if self.socket_path.exists():
+            if send_op("ping", self.socket_path):
+                raise DaemonError(
+                    f"A daemon is already listening on {self.socket_path}"
+                )
+            # Left behind by a daemon that did not shut down cleanly.
+            self.socket_path.unlink()
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            # Only the owner may connect; the daemon runs commands as them.
+            old_umask = os.umask(0o177)
+            try:
+                server.bind(str(self.socket_path))
+            finally:
+                os.umask(old_umask)
+            server.listen()
+        except OSError:
+            server.close()
+            raise
+        return server
+
+    def serve_forever(self, ready: Callable[[], None] | None = None) -> None:
+        """Accepts requests until a ``stop`` request or KeyboardInterrupt."""
+        server = self._bind()
+        LOGGER.info("Listening on %s", self.socket_path)
+        try:
+            if ready is not None:
+                ready()
+            while not self._stopping:
+                conn, _ = server.accept()
+                with conn:
+                    conn.settimeout(CLIENT_TIMEOUT)
+                    try:
+                        request = _read_message(conn)
+                        reply = self.handle(request)
+                    except (ValueError, KeyError, TypeError) as exc:
+                        # Only protocol errors get here; _run reports command failures.
+                        reply = {"ok": False, "error": f"bad request: {exc}"}
+                    except OSError as exc:
+                        LOGGER.debug("Dropping request: %s", exc)
+                        continue
+                    try:
+                        conn.sendall(json.dumps(reply).encode("utf-8"))
+                    except OSError as exc:
+                        LOGGER.debug("Client went away: %s", exc)
+        finally:
+            server.close()
+            with contextlib.suppress(OSError):
+                self.socket_path.unlink()
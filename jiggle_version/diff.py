@@ -0,0 +1,134 @@
+# jiggle_version/diff.py
+"""
+Unified diffs built straight from located version edits.
+
+`bump --dry-run --diff` already knows the exact byte spans it would rewrite,
+so there is no need to materialize a copy of the tree or run a general
+sequence matcher over whole files. :func:`unified_diff_from_edits` walks only
+the lines that contain an edit plus their context and yields output in the same
+format as :func:`difflib.unified_diff`.
+"""
+from __future__ import annotations
+
+from bisect import bisect_right
+from typing import Iterator
+
+_NO_NEWLINE = "\\ No newline at end of file\n"
+
+
+def _format_range(start: int, length: int) -> str:
+    """Format a hunk range the way difflib does (1-based, omitting a length of 1)."""
+    if length == 1:
+        return f"{start + 1}"
+    if length == 0:
+        return f"{start},0"
+    return f"{start + 1},{length}"
+
+
+def _diff_line(tag: str, line: bytes, encoding: str) -> Iterator[str]:
+    """Render one diff body line, marking a missing trailing newline."""
+    text = line.decode(encoding, errors="replace")
+    if text.endswith("\r\n"):
+        yield f"{tag}{text[:-2]}\n"
+    elif text.endswith(("\n", "\r")):
+        yield f"{tag}{text[:-1]}\n"
+    else:
+        yield f"{tag}{text}\n"
+        yield _NO_NEWLINE
+
+
+def unified_diff_from_edits(
+    old: bytes,
+    edits: list[tuple[int, int, bytes]],
+    fromfile: str,
+    tofile: str,
+    *,
+    context: int = 3,
+    encoding: str = "utf-8",
+) -> Iterator[str]:
+    """
+    Yields a unified diff for applying ``edits`` to ``old``.
+
+    Args:
+        old: The current file bytes.
+        edits: Sorted, non-overlapping ``(start, end, replacement)`` byte edits.
+        fromfile: Label for the ``---`` header.
+        tofile: Label for the ``+++`` header.
+        context: Unchanged lines shown around each change.
+        encoding: Used to decode lines for display.
+
+    Yields:
+        Diff lines, each ending in a newline. Nothing when ``edits`` is empty.
+    """
+    if not edits:
+        return
+    lines = old.splitlines(keepends=True)
+    starts = [0]
+    for line in lines:
+        starts.append(starts[-1] + len(line))
+    last_line = max(len(lines) - 1, 0)
+
+    def line_of(offset: int) -> int:
+        return min(max(bisect_right(starts, offset) - 1, 0), last_line)
+
+    # 1. Group edits into blocks of whole changed lines: (first, last, new_bytes).
+    # Edits on adjacent lines share a block, so a run of changed lines is shown
+    # as all its removals followed by all its additions, as difflib does.
+    blocks: list[tuple[int, int, list[tuple[int, int, bytes]]]] = []
+    for start, end, replacement in edits:
+        first = line_of(start)
+        last = line_of(max(end - 1, start))
+        if blocks and first <= blocks[-1][1] + 1:
+            prev_first, prev_last, prev_edits = blocks[-1]
+            blocks[-1] = (
+                prev_first,
+                max(prev_last, last),
+                prev_edits + [(start, end, replacement)],
+            )
+        else:
+            blocks.append((first, last, [(start, end, replacement)]))
+
+    changes: list[tuple[int, int, list[bytes]]] = []
+    for first, last, block_edits in blocks:
+        region_start, region_end = starts[first], starts[last + 1]
+        pieces: list[bytes] = []
+        position = region_start
+        for start, end, replacement in block_edits:
+            pieces.append(old[position:start])
+            pieces.append(replacement)
+            position = end
+        pieces.append(old[position:region_end])
+        changes.append((first, last, b"".join(pieces).splitlines(keepends=True)))
+
+    # 2. Group changes whose context windows touch into hunks.
+    hunks: list[list[tuple[int, int, list[bytes]]]] = []
+    for change in changes:
+        if hunks and change[0] - hunks[-1][-1][1] - 1 <= 2 * context:
+            hunks[-1].append(change)
+        else:
+            hunks.append([change])
+
+    yield f"--- {fromfile}\n"
+    yield f"+++ {tofile}\n"
+    offset = 0
+    for hunk in hunks:
+        hunk_first = max(hunk[0][0] - context, 0)
+        hunk_last = min(hunk[-1][1] + context, len(lines) - 1)
+        old_length = hunk_last - hunk_first + 1
+        growth = sum(len(new) - (last - first + 1) for first, last, new in hunk)
+        yield (
+            f"@@ -{_format_range(hunk_first, old_length)}"
+            f" +{_format_range(hunk_first + offset, old_length + growth)} @@\n"
+        )
+        index = hunk_first
+        for first, last, new_lines in hunk:
+            for line in lines[index:first]:
+                yield from _diff_line(" ", line, encoding)
+            for line in lines[first : last + 1]:
+                yield from _diff_line("-", line, encoding)
+            for line in new_lines:
+                yield from _diff_line("+", line, encoding)
+            index = last + 1
+        for line in lines[index : hunk_last + 1]:
+            yield from _diff_line(" ", line, encoding)
+        offset += growth
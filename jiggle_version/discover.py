@@ -6,14 +6,16 @@ while respecting .gitignore and default ignore patterns.
 from __future__ import annotations
 
 import logging
-from pathlib import Path
+import time
+from pathlib import Path, PurePath
+from typing import TYPE_CHECKING, Callable
 
 # Use the new gitignore API
-from .gitignore import (
-    collect_default_spec,
-    is_path_explicitly_ignored,
-    is_path_gitignored,
-)
+from .gitignore import collect_default_spec
+from .instrument import span
+
+if TYPE_CHECKING:
+    from pathspec import PathSpec
 
 # Files to search for recursively in the project root.
 RECURSIVE_SEARCH_FILES = ["_version.py", "__version__.py", "__about__.py"]
@@ -39,8 +41,95 @@ VENV_MARKER_FILES = {"pyvenv.cfg"}
 LOGGER = logging.getLogger(__name__)
 
 
+class DiscoveryStats:
+    """What one discovery walk cost, for tuning ``ignore`` (``inspect --stats``)."""
+
+    def __init__(self) -> None:
+        self.directories_listed = 0
+        self.entries_examined = 0
+        self.pruned_default = 0
+        self.pruned_gitignore = 0
+        self.pruned_explicit = 0
+        self.venv_roots_skipped = 0
+        self.unreadable = 0
+        # is_dir / is_file probes made by the walker, counted as they are made
+        # (a probe that raises still counts; the ones after it do not).
+        self.stat_calls = 0
+        # Path.resolve() calls made while matching ignore rules, one per entry
+        # that reaches them; each one walks the path's components on disk.
+        self.path_resolutions = 0
+        self.seconds = 0.0
+
+    def to_dict(self) -> dict[str, float]:
+        return dict(vars(self))
+
+
+class IgnoreRules:
+    """
+    The ignore rules of one project: default directory names, ``.gitignore``,
+    explicit ``ignore`` paths and virtual environment roots.
+
+    The walker and :func:`is_version_source` both decide with these, so a
+    path is a version source by the same rules however it was found. Every
+    check is counted in ``stats``.
+    """
+
+    def __init__(
+        self,
+        project_root: Path,
+        ignore_paths: list[str] | None = None,
+        spec: PathSpec | None = None,
+        stats: DiscoveryStats | None = None,
+    ):
+        self.project_root = project_root
+        self.stats = stats if stats is not None else DiscoveryStats()
+        # Build a single PathSpec with repo/global ignores and any future extras
+        self.spec = spec if spec is not None else collect_default_spec(project_root)
+        # Resolve user-provided ignore paths to absolute form for reliable comparison
+        self.explicit_ignore_set = {
+            (project_root / p).resolve() for p in (ignore_paths or [])
+        }
+        self.stats.path_resolutions += 1
+        self.resolved_root = project_root.resolve()
+
+    def prunes(self, path: Path) -> bool:
+        """
+        True when ``path`` (a file or directory) is ignored by name, by
+        ``.gitignore`` or explicitly.
+
+        The path is resolved once, and both the ``.gitignore`` spec and the
+        explicit ignores (already resolved) are matched against that one path.
+        """
+        stats = self.stats
+        if path.name in DEFAULT_IGNORE_DIRS:
+            stats.pruned_default += 1
+            return True
+        stats.path_resolutions += 1
+        resolved = path.resolve()
+        if self.spec.match_file(resolved.relative_to(self.resolved_root).as_posix()):
+            stats.pruned_gitignore += 1
+            return True
+        explicit = self.explicit_ignore_set
+        if resolved in explicit or not explicit.isdisjoint(resolved.parents):
+            stats.pruned_explicit += 1
+            return True
+        return False
+
+    def is_venv_root(self, directory: Path) -> bool:
+        """True for a virtual environment root (installed packages, not sources)."""
+        if any(_probe(directory / marker, self.stats) for marker in VENV_MARKER_FILES):
+            LOGGER.debug("Skipping venv root: %s", directory)
+            self.stats.venv_roots_skipped += 1
+            return True
+        return False
+
+
 def find_source_files(
-    project_root: Path, ignore_paths: list[str] | None = None
+    project_root: Path,
+    ignore_paths: list[str] | None = None,
+    stats: DiscoveryStats | None = None,
+    spec: PathSpec | None = None,
+    visited: list[Path] | None = None,
 ) -> list[Path]:
     """
     Scans a project directory and returns a list of all potential version
@@ -49,90 +138,147 @@ def find_source_files(
     Args:
         project_root: The root directory of the project to scan.
         ignore_paths: A list of relative paths to explicitly ignore.
+        stats: Filled in with walk counters and wall time, if given.
+        spec: A prebuilt ignore spec; built from the project's ignore files
+            when omitted.
+        visited: Receives every directory that was listed, so a caller can
+            tell from their mtimes whether the result is still current.
 
     Returns:
         A sorted list of Path objects for all found source files.
     """
     LOGGER.debug("project root %s, ignore_paths %s", project_root, ignore_paths)
+    started = time.perf_counter()
+    rules = IgnoreRules(project_root, ignore_paths, spec=spec, stats=stats)
     found_files: set[Path] = set()
 
-    # Build a single PathSpec with repo/global ignores and any future extras
-    spec = collect_default_spec(project_root)
-
-    # Resolve user-provided ignore paths to absolute form for reliable comparison
-    explicit_ignore_set = {(project_root / p).resolve() for p in (ignore_paths or [])}
-
-    _walk_and_discover(
+    _discover_in_directory(
         current_dir=project_root,
-        project_root=project_root,
         found_files=found_files,
-        spec=spec,
-        explicit_ignore_set=explicit_ignore_set,
+        select=is_version_source_path,
+        rules=rules,
+        visited=visited,
     )
 
+    rules.stats.seconds = time.perf_counter() - started
     return sorted(found_files)
 
 
-def _walk_and_discover(
+def _discover_in_directory(
     *,
     current_dir: Path,
-    project_root: Path,
     found_files: set[Path],
-    spec,
-    explicit_ignore_set: set[Path],
+    select: Callable[[PurePath], bool],
+    rules: IgnoreRules,
+    visited: list[Path] | None,
 ) -> None:
-    """Recursively walk directories to find source files."""
-    try:
-        items = list(current_dir.iterdir())
-    except OSError as exc:
-        LOGGER.warning("Skipping unreadable directory %s: %s", current_dir, exc)
-        return
-
-    for item in items:
-        # Check against default, .gitignore (via PathSpec), and user-specified ignore paths
-        if (
-            item.name in DEFAULT_IGNORE_DIRS
-            or is_path_gitignored(item, project_root, spec)
-            or is_path_explicitly_ignored(item, explicit_ignore_set)
-        ):
-            continue
+    """
+    Examines one directory's entries, recursing into subdirectories.
 
+    Every file that survives ``rules`` is offered to ``select`` by its path
+    relative to the project root; the ones it accepts are collected.
+    """
+    stats = rules.stats
+    with span("walk", "discovery", path=current_dir):
         try:
-            is_dir = item.is_dir()
-            is_file = item.is_file()
+            items = list(current_dir.iterdir())
         except OSError as exc:
-            LOGGER.warning("Skipping unreadable path %s: %s", item, exc)
-            continue
+            LOGGER.warning("Skipping unreadable directory %s: %s", current_dir, exc)
+            stats.unreadable += 1
+            return
+        stats.directories_listed += 1
+        if visited is not None:
+            visited.append(current_dir)
 
-        if is_dir:
-            # Skip virtual environment roots (contain installed packages, not project versions).
-            if any((item / marker).is_file() for marker in VENV_MARKER_FILES):
-                LOGGER.debug("Skipping venv root: %s", item)
+        for item in items:
+            stats.entries_examined += 1
+            if rules.prunes(item):
                 continue
 
-            # If top-level package dir has __init__.py, include it
-            init_file = item / "__init__.py"
             try:
-                has_init = init_file.is_file()
+                stats.stat_calls += 1
+                is_dir = item.is_dir()
+                stats.stat_calls += 1
+                is_file = item.is_file()
             except OSError as exc:
-                LOGGER.warning("Skipping unreadable path %s: %s", init_file, exc)
-                has_init = False
-
-            if has_init and current_dir == project_root:
-                found_files.add(init_file)
-
-            _walk_and_discover(
-                current_dir=item,
-                project_root=project_root,
-                found_files=found_files,
-                spec=spec,
-                explicit_ignore_set=explicit_ignore_set,
-            )
-
-        elif is_file:
-            # Root-only statics
-            if item.name in STATIC_SEARCH_FILES and item.parent == project_root:
-                found_files.add(item)
-            # Recursive targets
-            elif item.name in RECURSIVE_SEARCH_FILES:
+                LOGGER.warning("Skipping unreadable path %s: %s", item, exc)
+                stats.unreadable += 1
+                continue
+
+            if is_dir:
+                if rules.is_venv_root(item):
+                    continue
+                _discover_in_directory(
+                    current_dir=item,
+                    found_files=found_files,
+                    select=select,
+                    rules=rules,
+                    visited=visited,
+                )
+            elif is_file and select(item.relative_to(rules.project_root)):
                 found_files.add(item)
+
+
+def _probe(path: Path, stats: DiscoveryStats) -> bool:
+    """``path.is_file()``, counted."""
+    stats.stat_calls += 1
+    return path.is_file()
+
+
+def is_version_source_path(relative_path: PurePath) -> bool:
+    """
+    The naming rule for version sources: root-level statics, the
+    ``_version.py`` family anywhere, and top-level ``<package>/__init__.py``.
+
+    ``relative_path`` is relative to the project root. Ignore rules and venv
+    roots are not consulted; see :func:`is_version_source`.
+    """
+    parts = relative_path.parts
+    if not parts:
+        return False
+    name = parts[-1]
+    if len(parts) == 1:
+        return name in STATIC_SEARCH_FILES or name in RECURSIVE_SEARCH_FILES
+    if len(parts) == 2 and name == "__init__.py":
+        return True
+    return name in RECURSIVE_SEARCH_FILES
+
+
+def is_version_source(relative_path: PurePath, rules: IgnoreRules) -> bool:
+    """
+    Whether :func:`find_source_files` would report the file at
+    ``relative_path``, decided without a walk.
+
+    Applies the same checks the walker makes on the way down: every ancestor
+    directory must survive ``rules`` and not be a venv root, the file must
+    survive ``rules``, and its name must pass :func:`is_version_source_path`.
+    The file itself need not exist (a staged deletion, say).
+    """
+    if not is_version_source_path(relative_path):
+        return False
+    path = rules.project_root
+    for part in relative_path.parts[:-1]:
+        path = path / part
+        if rules.prunes(path) or rules.is_venv_root(path):
+            return False
+    return not rules.prunes(rules.project_root / relative_path)
+
+
+def find_project_files(
+    project_root: Path, ignore_paths: list[str] | None = None
+) -> list[Path]:
+    """
+    Returns the pyproject.toml of every project under ``project_root``.
+
+    Unlike :func:`find_source_files`, nested projects count too, so a
+    monorepo yields one file per member. The same walk and ignore rules apply.
+    """
+    found: set[Path] = set()
+    _discover_in_directory(
+        current_dir=project_root,
+        found_files=found,
+        select=lambda relative: relative.name == "pyproject.toml",
+        rules=IgnoreRules(project_root, ignore_paths),
+        visited=None,
+    )
+    return sorted(found)
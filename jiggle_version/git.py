@@ -8,23 +8,31 @@ import shutil
 import subprocess  # nosec
 from pathlib import Path
 
+from jiggle_version.instrument import span
 from jiggle_version.utils.files import decode_text_output
 
 
-def _run_git_command(args: list[str], cwd: Path) -> str:
-    """Helper to run a Git command and return its output."""
+def _run_git_raw(args: list[str], cwd: Path, stdin: bytes | None = None) -> bytes:
+    """Helper to run a Git command and return its raw stdout."""
     if not shutil.which("git"):
         raise RuntimeError(
             "Git command not found. Please ensure Git is installed and in your PATH."
         )
 
-    result = subprocess.run(  # nosec
-        ["git", *args],
-        cwd=cwd,
-        capture_output=True,
-        check=True,  # Raise an exception if the command fails
-    )
-    return decode_text_output(result.stdout).strip()
+    with span(f"git {args[0]}", "git", argv=args):
+        result = subprocess.run(  # nosec
+            ["git", *args],
+            cwd=cwd,
+            input=stdin,
+            capture_output=True,
+            check=True,  # Raise an exception if the command fails
+        )
+    return result.stdout
+
+
+def _run_git_command(args: list[str], cwd: Path) -> str:
+    """Helper to run a Git command and return its output."""
+    return decode_text_output(_run_git_raw(args, cwd)).strip()
 
 
 def is_repo_dirty(project_root: Path) -> bool:
@@ -64,3 +72,110 @@ def get_latest_tag(project_root: Path) -> str | None:
         return _run_git_command(["describe", "--tags", "--abbrev=0"], project_root)
     except subprocess.CalledProcessError:
         return None
+
+
+def _split_names(output: bytes) -> list[str]:
+    """The paths in ``-z`` output."""
+    return [
+        name.decode("utf-8", errors="surrogateescape")
+        for name in output.split(b"\0")
+        if name
+    ]
+
+
+def get_staged_files(project_root: Path) -> list[str]:
+    """
+    Paths staged for the next commit, relative to ``project_root``.
+
+    Uses one ``git diff --cached --name-only -z --relative``; paths outside
+    ``project_root`` are left out, and deletions are included.
+    """
+    return _split_names(
+        _run_git_raw(
+            ["diff", "--cached", "--name-only", "-z", "--relative"], project_root
+        )
+    )
+
+
+def get_head_tree(project_root: Path) -> str | None:
+    """The tree id of ``HEAD``, or None on a branch with no commits yet."""
+    try:
+        return (
+            _run_git_command(
+                ["rev-parse", "--verify", "--quiet", "HEAD^{tree}"], project_root
+            )
+            or None
+        )
+    except subprocess.CalledProcessError:
+        return None
+
+
+def get_changed_files(project_root: Path, old_tree: str, new_tree: str) -> list[str]:
+    """
+    Paths that differ between two trees, relative to ``project_root``.
+
+    Raises:
+        subprocess.CalledProcessError: When either tree is unknown (for
+            example, garbage collected).
+    """
+    return _split_names(
+        _run_git_raw(
+            ["diff", "--name-only", "-z", "--relative", old_tree, new_tree],
+            project_root,
+        )
+    )
+
+
+def read_index_blob_ids(project_root: Path, paths: list[str]) -> dict[str, str]:
+    """
+    The blob ids the index holds for ``paths``, relative to ``project_root``.
+
+    Uses one ``git ls-files -s -z``. Paths that are not in the index (untracked
+    or deleted) and unmerged paths are left out.
+    """
+    if not paths:
+        return {}
+    output = _run_git_raw(
+        ["ls-files", "-s", "-z", "--", *(f":(literal){path}" for path in paths)],
+        project_root,
+    )
+    blob_ids: dict[str, str] = {}
+    for record in output.split(b"\0"):
+        if not record:
+            continue
+        # "<mode> <object> <stage>\t<path>"
+        info, _, name = record.partition(b"\t")
+        fields = info.split()
+        if len(fields) == 3 and fields[2] == b"0":
+            path = name.decode("utf-8", errors="surrogateescape")
+            blob_ids[path] = fields[1].decode("ascii")
+    return blob_ids
+
+
+def read_index_blobs(project_root: Path, paths: list[str]) -> dict[str, bytes | None]:
+    """
+    The staged (index) contents of ``paths``, relative to ``project_root``.
+
+    All blobs are read by a single ``git cat-file --batch``. A path that is
+    not in the index (a staged deletion) maps to None.
+    """
+    if not paths:
+        return {}
+    specs = b"".join(
+        f":./{path}\n".encode("utf-8", errors="surrogateescape") for path in paths
+    )
+    output = _run_git_raw(["cat-file", "--batch"], project_root, stdin=specs)
+    blobs: dict[str, bytes | None] = {}
+    offset = 0
+    for path in paths:
+        header_end = output.index(b"\n", offset)
+        header = output[offset:header_end].split()
+        offset = header_end + 1
+        if len(header) == 3 and header[1] == b"blob":
+            size = int(header[2])
+            blobs[path] = output[offset : offset + size]
+            offset += size + 1  # contents are followed by a newline
+        else:
+            # "<spec> missing" (or "ambiguous"): nothing staged under that path.
+            blobs[path] = None
+    return blobs
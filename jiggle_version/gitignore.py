@@ -60,6 +60,19 @@ def _candidate_global_ignores() -> list[Path]:
     ]
 
 
+def ignore_files(project_root: Path) -> list[Path]:
+    """Every file :func:`build_gitignore_spec` reads, whether or not it exists.
+
+    Callers that keep a compiled spec around compare these files' mtimes to
+    decide when to rebuild it.
+    """
+    return [
+        project_root / ".gitignore",
+        project_root / ".git" / "info" / "exclude",
+        *_candidate_global_ignores(),
+    ]
+
+
 # ----------------------------- core build -----------------------------
 
 
@@ -0,0 +1,251 @@
+# jiggle_version/instrument.py
+"""
+Hot-path instrumentation behind ``--timings``.
+
+Code on the hot path wraps its work in :func:`span`::
+
+    with span("find_source_files", "discovery"):
+        ...
+
+Each span belongs to a phase (``discovery``, ``parse``, ``pypi``, ``write``,
+``git``). While no recorder is enabled, :func:`span` hands back one shared
+no-op context manager, so instrumented code pays a global lookup and nothing
+else. With a recorder enabled, spans are recorded with their thread, and
+:meth:`Recorder.phase_totals` sums them per phase. Spans nested inside a span
+of the same phase are kept but not counted twice; spans in other phases
+(such as the ``command`` span around the whole handler) are traced only.
+
+:func:`count` bumps a named counter on the active recorder (files parsed,
+cache hits, ...) for the metrics export, and is equally free when disabled.
+
+:func:`trace_events` renders the spans in Chrome Trace Event Format for
+``--trace-file``, which Perfetto and ``chrome://tracing`` load directly.
+"""
+from __future__ import annotations
+
+import contextlib
+import os
+import threading
+import time
+from typing import Any, ContextManager
+
+PHASES = ("discovery", "parse", "pypi", "write", "git")
+
+_NULL_SPAN: ContextManager[None] = contextlib.nullcontext()
+
+
+class Span:
+    """One timed piece of work."""
+
+    def __init__(
+        self,
+        name: str,
+        phase: str,
+        start: float,
+        duration: float,
+        thread_id: int,
+        nested: bool = False,
+        args: dict[str, Any] | None = None,
+        thread_name: str = "",
+    ):
+        self.name = name
+        self.phase = phase
+        # Seconds since the recorder started.
+        self.start = start
+        self.duration = duration
+        self.thread_id = thread_id
+        self.thread_name = thread_name
+        # True when an enclosing span on the same thread has the same phase.
+        self.nested = nested
+        self.args = args or {}
+
+    def __repr__(self) -> str:
+        return f"Span({self.name!r}, {self.phase!r}, {self.duration * 1000:.2f} ms)"
+
+
+class Recorder:
+    """Collects spans from every thread for one command invocation."""
+
+    def __init__(self) -> None:
+        self.origin = time.perf_counter()
+        self.spans: list[Span] = []
+        self.counters: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def elapsed(self) -> float:
+        """Wall time since the recorder was created."""
+        return time.perf_counter() - self.origin
+
+    def _stack(self) -> list[str]:
+        stack = getattr(self._local, "phases", None)
+        if stack is None:
+            stack = self._local.phases = []
+        return stack
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def phase_totals(self) -> dict[str, dict[str, float]]:
+        """``{phase: {"count": n, "seconds": s}}`` for every phase, in PHASES order."""
+        totals = {phase: {"count": 0, "seconds": 0.0} for phase in PHASES}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            if span.nested or span.phase not in totals:
+                continue
+            entry = totals[span.phase]
+            entry["count"] += 1
+            entry["seconds"] += span.duration
+        return totals
+
+
+class _ActiveSpan:
+    """Context manager that records one span into a recorder."""
+
+    __slots__ = ("args", "name", "nested", "phase", "recorder", "started")
+
+    def __init__(self, recorder: Recorder, name: str, phase: str, args: dict[str, Any]):
+        self.recorder = recorder
+        self.name = name
+        self.phase = phase
+        self.args = args
+
+    def __enter__(self) -> None:
+        stack = self.recorder._stack()
+        self.nested = self.phase in stack
+        stack.append(self.phase)
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info: object) -> None:
+        finished = time.perf_counter()
+        self.recorder._stack().pop()
+        self.recorder.add(
+            Span(
+                self.name,
+                self.phase,
+                start=self.started - self.recorder.origin,
+                duration=finished - self.started,
+                thread_id=threading.get_ident(),
+                nested=self.nested,
+                args=self.args,
+                thread_name=threading.current_thread().name,
+            )
+        )
+
+
+_RECORDER: Recorder | None = None
+
+
+def enable() -> Recorder:
+    """Starts recording spans process-wide and returns the recorder."""
+    global _RECORDER
+    _RECORDER = Recorder()
+    return _RECORDER
+
+
+def disable() -> Recorder | None:
+    """Stops recording and returns the recorder that was active, if any."""
+    global _RECORDER
+    recorder, _RECORDER = _RECORDER, None
+    return recorder
+
+
+def active() -> Recorder | None:
+    return _RECORDER
+
+
+def span(name: str, phase: str, **args: Any) -> ContextManager[None]:
+    """Times the enclosed block as ``name`` in ``phase`` (a no-op when disabled)."""
+    recorder = _RECORDER
+    if recorder is None:
+        return _NULL_SPAN
+    return _ActiveSpan(recorder, name, phase, args)
+
+
+def count(name: str, value: float = 1) -> None:
+    """Adds ``value`` to counter ``name`` (a no-op when disabled)."""
+    recorder = _RECORDER
+    if recorder is not None:
+        recorder.increment(name, value)
+
+
+def format_timings(recorder: Recorder) -> str:
+    """Human-readable phase breakdown for ``--timings``."""
+    lines = ["--- Timings ---"]
+    for phase, entry in recorder.phase_totals().items():
+        count = int(entry["count"])
+        lines.append(
+            f"{phase:<10} {entry['seconds'] * 1000:>9.1f} ms  "
+            f"{count} call{'' if count == 1 else 's'}"
+        )
+    lines.append(f"{'total':<10} {recorder.elapsed() * 1000:>9.1f} ms  (wall)")
+    return "\n".join(lines)
+
+
+def timings_to_dict(recorder: Recorder, **extra: Any) -> dict[str, Any]:
+    """Machine-readable phase breakdown for ``--timings=json``."""
+    return {
+        **extra,
+        "total_ms": round(recorder.elapsed() * 1000, 3),
+        "phases": {
+            phase: {
+                "count": int(entry["count"]),
+                "ms": round(entry["seconds"] * 1000, 3),
+            }
+            for phase, entry in recorder.phase_totals().items()
+        },
+    }
+
+
+def trace_events(recorder: Recorder) -> dict[str, Any]:
+    """
+    The recorded spans as a Chrome Trace Event Format document.
+
+    Every span becomes a complete (``"ph": "X"``) event on its thread's
+    track, with timestamps in microseconds from the start of the command.
+    Thread names are emitted as metadata events so worker pools are labeled.
+    """
+    pid = os.getpid()
+    with recorder._lock:
+        spans = sorted(recorder.spans, key=lambda item: item.start)
+    events: list[dict[str, Any]] = []
+    named: set[int] = set()
+    for item in spans:
+        if item.thread_id not in named:
+            named.add(item.thread_id)
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": item.thread_id,
+                    "args": {"name": item.thread_name},
+                }
+            )
+        events.append(
+            {
+                "name": item.name,
+                "cat": item.phase,
+                "ph": "X",
+                "ts": round(item.start * 1_000_000, 3),
+                "dur": round(item.duration * 1_000_000, 3),
+                "pid": pid,
+                "tid": item.thread_id,
+                "args": {key: _json_safe(value) for key, value in item.args.items()},
+            }
+        )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def _json_safe(value: Any) -> Any:
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    return str(value)
@@ -0,0 +1,199 @@
+# jiggle_version/metrics.py
+"""
+Prometheus textfile export for ``--metrics-file``.
+
+node-exporter's textfile collector reads every ``*.prom`` file in a
+directory on each scrape. :func:`render_textfile` turns one run's recorder
+into that exposition format and :func:`write_textfile` replaces the file
+atomically, so a scrape never sees half a file.
+
+Every series carries ``command`` and ``project`` labels (the project label is
+the project root's directory name) so a fleet of repositories can share one
+collector directory. Every series is a gauge, counts included: the file is
+overwritten by each run and holds that run's values only, so a series can go
+down between scrapes, which Prometheus counters must never do.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterable
+
+from .instrument import Recorder
+
+LOGGER = logging.getLogger(__name__)
+
+PREFIX = "jiggle_version"
+
+# Recorder counters exported as-is: (counter name, help text).
+SCAN_COUNTERS = (
+    ("files_discovered", "Files discovery considered as version sources."),
+    ("files_parsed", "Discovered files a parser ran on."),
+    ("parse_errors", "Discovered files whose parser failed."),
+    ("versions_found", "Sources that declared a version."),
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict[str, str]) -> str:
+    return ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items())
+
+
+def _format_value(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(round(float(value), 6))
+
+
+class _Writer:
+    """Accumulates metric families in exposition format."""
+
+    def __init__(self, labels: dict[str, str]):
+        self.labels = labels
+        self.lines: list[str] = []
+
+    def family(
+        self,
+        name: str,
+        kind: str,
+        help_text: str,
+        samples: Iterable[tuple[dict[str, str], float]],
+    ) -> None:
+        full_name = f"{PREFIX}_{name}"
+        self.lines.append(f"# HELP {full_name} {help_text}")
+        self.lines.append(f"# TYPE {full_name} {kind}")
+        for extra, value in samples:
+            labels = _labels({**self.labels, **extra})
+            self.lines.append(f"{full_name}{{{labels}}} {_format_value(value)}")
+
+    def single(self, name: str, kind: str, help_text: str, value: float) -> None:
+        self.family(name, kind, help_text, [({}, value)])
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def render_textfile(
+    recorder: Recorder,
+    command: str,
+    exit_code: int,
+    project: str = "",
+    timestamp: float | None = None,
+) -> str:
+    """
+    One run's metrics in Prometheus text exposition format.
+
+    Args:
+        recorder: The recorder that was active for the run.
+        command: The subcommand, used as the ``command`` label.
+        exit_code: What ``main`` is about to return.
+        project: The ``project`` label (usually the project root's name).
+        timestamp: Unix time of the run; now by default.
+    """
+    out = _Writer({"command": command, "project": project})
+    totals = recorder.phase_totals()
+    counters = dict(recorder.counters)
+
+    out.single(
+        "duration_seconds", "gauge", "Wall time of the command.", recorder.elapsed()
+    )
+    out.family(
+        "phase_duration_seconds",
+        "gauge",
+        "Time spent per phase, without double-counting nested spans.",
+        [({"phase": phase}, entry["seconds"]) for phase, entry in totals.items()],
+    )
+    out.family(
+        "phase_calls",
+        "gauge",
+        "Top-level spans recorded per phase.",
+        [({"phase": phase}, entry["count"]) for phase, entry in totals.items()],
+    )
+    for name, help_text in SCAN_COUNTERS:
+        out.single(name, "gauge", help_text, counters.get(name, 0))
+
+    hits = counters.get("pypi_cache_hits", 0)
+    stale = counters.get("pypi_cache_stale_hits", 0)
+    misses = counters.get("pypi_cache_misses", 0)
+    out.family(
+        "pypi_cache_lookups",
+        "gauge",
+        "PyPI cache lookups by result.",
+        [
+            ({"result": "hit"}, hits),
+            ({"result": "stale"}, stale),
+            ({"result": "miss"}, misses),
+        ],
+    )
+    lookups = hits + stale + misses
+    out.single(
+        "pypi_cache_hit_ratio",
+        "gauge",
+        "Share of PyPI lookups answered from the cache (fresh or stale).",
+        (hits + stale) / lookups if lookups else 0,
+    )
+
+    with recorder._lock:
+        spans = list(recorder.spans)
+    fetches = [
+        item.duration for item in spans if item.phase == "pypi" and item.name == "fetch"
+    ]
+    out.single("pypi_fetches", "gauge", "PyPI HTTP requests made.", len(fetches))
+    out.single(
+        "pypi_fetch_duration_seconds",
+        "gauge",
+        "Total time spent in PyPI HTTP requests.",
+        sum(fetches),
+    )
+    out.single(
+        "pypi_fetch_max_duration_seconds",
+        "gauge",
+        "Slowest PyPI HTTP request.",
+        max(fetches, default=0),
+    )
+    out.single(
+        "git_subprocesses",
+        "gauge",
+        "git subprocesses started.",
+        sum(1 for item in spans if item.phase == "git"),
+    )
+    out.single("exit_code", "gauge", "Exit code of the command.", exit_code)
+    out.single(
+        "last_run_timestamp_seconds",
+        "gauge",
+        "Unix time the command finished.",
+        time.time() if timestamp is None else timestamp,
+    )
+    return out.text()
+
+
+def write_textfile(path: Path, text: str) -> None:
+    """
+    Atomically replaces ``path`` with ``text``.
+
+    The temp file starts with a dot and ends in ``.tmp`` so the textfile
+    collector, which only reads ``*.prom``, never picks it up.
+
+    Raises:
+        OSError: When the file cannot be written.
+    """
+    directory = path.parent
+    fd, temp_name = tempfile.mkstemp(
+        prefix=f".{path.name}.", suffix=".tmp", dir=directory
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as handle:
+            handle.write(text)
+        # mkstemp creates 0600; the collector usually runs as another user.
+        os.chmod(temp_name, 0o644)
+        os.replace(temp_name, path)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
+    LOGGER.debug("Wrote metrics to %s", path)
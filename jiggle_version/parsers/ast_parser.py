@@ -5,7 +5,9 @@ Parsers for Python source files using the `ast` module.
 from __future__ import annotations
 
 import ast
+import io
 import sys
+import tokenize
 from pathlib import Path
 
 from jiggle_version.utils.files import read_python_source
@@ -16,8 +18,11 @@ class SetupCallVisitor(ast.NodeVisitor):
     An AST visitor that looks for a `setup()` call and extracts literal keyword arguments.
     """
 
-    def __init__(self):
+    def __init__(self, warn: bool = True):
         self.version: str | None = None
+        self.warn = warn
+        # Literal `version=` value nodes, in source order, for span-based updates.
+        self.value_nodes: list[ast.expr] = []
 
     def visit_Call(self, node: ast.Call):
         """Visit a Call node in the AST."""
@@ -38,11 +43,13 @@ class SetupCallVisitor(ast.NodeVisitor):
                         # node, but it only works for literals (strings, numbers, etc.)
                         # If the version is a variable, this will raise an error.
                         self.version = ast.literal_eval(keyword.value)
+                        self.value_nodes.append(keyword.value)
                     except ValueError:
                         # The version is not a literal, so we ignore it per the PEP.
-                        print(
-                            "Warning: Could not statically parse 'version' in setup.py; it is not a literal."
-                        )
+                        if self.warn:
+                            print(
+                                "Warning: Could not statically parse 'version' in setup.py; it is not a literal."
+                            )
                     # We found the version keyword, no need to check others
                     break
 
@@ -55,8 +62,11 @@ class VersionVisitor(ast.NodeVisitor):
     An AST visitor that looks for a `__version__ = "..."` assignment.
     """
 
-    def __init__(self):
+    def __init__(self, warn: bool = True):
         self.version: str | None = None
+        self.warn = warn
+        # Literal `__version__` value nodes, in source order, for span-based updates.
+        self.value_nodes: list[ast.expr] = []
 
     def visit_Assign(self, node: ast.Assign):
         """Visit an assignment node."""
@@ -68,10 +78,12 @@ class VersionVisitor(ast.NodeVisitor):
             if isinstance(target, ast.Name) and target.id == "__version__":
                 try:
                     self.version = ast.literal_eval(node.value)
+                    self.value_nodes.append(node.value)
                 except ValueError:
-                    print(
-                        "Warning: Found `__version__` but its value was not a literal."
-                    )
+                    if self.warn:
+                        print(
+                            "Warning: Found `__version__` but its value was not a literal."
+                        )
         self.generic_visit(node)
 
 
@@ -165,3 +177,67 @@ def parse_dunder_all(file_path: Path) -> set[str]:
     except (SyntaxError, ValueError):
         # Ignore files that can't be parsed
         return set()
+
+
+def _line_starts(source: bytes) -> list[int]:
+    """Byte offset of the start of every line (plus one past the end)."""
+    starts = [0]
+    for line in source.splitlines(keepends=True):
+        starts.append(starts[-1] + len(line))
+    return starts
+
+
+def find_version_spans(source: bytes, filename: str = "<unknown>") -> list[tuple[int, int]]:
+    """
+    Locates every literal version string in Python source, as raw byte offsets.
+
+    Covers `__version__ = "..."` assignments and literal `version=` keywords of
+    `setup()` calls. Offsets index into ``source`` itself, so they respect the
+    file's PEP 263 encoding and any UTF-8 BOM, and each span covers the whole
+    string literal including prefix and quotes.
+
+    Args:
+        source: The raw bytes of a Python file.
+        filename: Used in SyntaxError messages only.
+
+    Returns:
+        Sorted ``(start, end)`` byte offsets of each version literal.
+
+    Raises:
+        SyntaxError: If the source cannot be parsed.
+    """
+    tree = ast.parse(source, filename=filename)
+    version_visitor = VersionVisitor(warn=False)
+    version_visitor.visit(tree)
+    setup_visitor = SetupCallVisitor(warn=False)
+    setup_visitor.visit(tree)
+    nodes = [
+        node
+        for node in version_visitor.value_nodes + setup_visitor.value_nodes
+        if isinstance(node, ast.Constant) and isinstance(node.value, str)
+    ]
+    if not nodes:
+        return []
+
+    encoding, _ = tokenize.detect_encoding(io.BytesIO(source).readline)
+    # ast reports columns as UTF-8 byte offsets into the decoded line, without BOM.
+    bom_length = 3 if encoding == "utf-8-sig" else 0
+    same_bytes = encoding in ("utf-8", "utf-8-sig")
+    starts = _line_starts(source)
+
+    def to_offset(lineno: int, col: int) -> int:
+        line_start = starts[lineno - 1] + (bom_length if lineno == 1 else 0)
+        if same_bytes:
+            return line_start + col
+        line_text = source[line_start : starts[lineno]].decode(encoding)
+        prefix = line_text.encode("utf-8")[:col].decode("utf-8")
+        return line_start + len(prefix.encode(encoding))
+
+    spans = {
+        (
+            to_offset(node.lineno, node.col_offset),
+            to_offset(node.end_lineno, node.end_col_offset),  # type: ignore[arg-type]
+        )
+        for node in nodes
+    }
+    return sorted(spans)
@@ -0,0 +1,158 @@
+# jiggle_version/profiling.py
+"""
+Built-in profiling for ``--profile cpu|mem``.
+
+Profiling from outside is awkward because of the console-script wrapper, so
+``main`` can profile the dispatched handler itself:
+
+- ``cpu``: runs the handler under :mod:`cProfile`, writes the stats to a
+  pstats file (load with ``python -m pstats`` or snakeviz) and prints the
+  top functions by cumulative time.
+- ``mem``: runs the handler under :mod:`tracemalloc`, writes the final
+  snapshot (load with ``tracemalloc.Snapshot.load``) and prints peak memory
+  plus the allocation sites that grew the most.
+
+cProfile only sees the calling thread; work on worker threads shows up as
+the time spent waiting for it.
+
+An output file that cannot be written is reported and the summary still
+printed; it never replaces the handler's own result or exception.
+"""
+from __future__ import annotations
+
+import logging
+import sys
+from pathlib import Path
+from typing import Callable, TextIO, TypeVar
+
+LOGGER = logging.getLogger(__name__)
+
+PROFILE_KINDS = ("cpu", "mem")
+TOP_N = 20
+# Frames kept per allocation; more makes tracemalloc slower and larger.
+TRACEMALLOC_FRAMES = 10
+
+T = TypeVar("T")
+
+
+def default_output(kind: str, command: str) -> Path:
+    """``jiggle_version-<command>.pstats`` or ``.tracemalloc`` in the working directory."""
+    suffix = "pstats" if kind == "cpu" else "tracemalloc"
+    return Path(f"jiggle_version-{command}.{suffix}")
+
+
+def _dump(
+    write: Callable[[str], None], output: Path, report: Callable[[str], None]
+) -> bool:
+    """Calls ``write(str(output))``; an OSError is logged and reported, not raised."""
+    try:
+        write(str(output))
+    except OSError as exc:
+        LOGGER.error("Could not write profile %s: %s", output, exc)
+        report(f"❌ Could not write profile {output}: {exc}")
+        return False
+    return True
+
+
+def profile_cpu(
+    func: Callable[[], T],
+    output: Path,
+    stream: TextIO,
+    top_n: int = TOP_N,
+    report: Callable[[str], None] | None = None,
+) -> T:
+    """Runs ``func`` under cProfile, dumps the stats and prints the top entries."""
+    import cProfile
+    import pstats
+
+    report = report or (lambda message: print(message, file=stream))
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func)
+    finally:
+        written = _dump(profiler.dump_stats, output, report)
+        print(f"\n--- CPU profile (top {top_n} by cumulative time) ---", file=stream)
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top_n)
+        if written:
+            print(f"Profile written to {output}", file=stream)
+
+
+def profile_memory(
+    func: Callable[[], T],
+    output: Path,
+    stream: TextIO,
+    top_n: int = TOP_N,
+    report: Callable[[str], None] | None = None,
+) -> T:
+    """Runs ``func`` under tracemalloc, dumps the final snapshot and prints the growth."""
+    import tracemalloc
+
+    report = report or (lambda message: print(message, file=stream))
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    elif hasattr(tracemalloc, "reset_peak"):  # Python 3.9+
+        tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    try:
+        return func()
+    finally:
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if not already_tracing:
+            tracemalloc.stop()
+        written = _dump(after.dump, output, report)
+        print(f"\n--- Memory profile (top {top_n} allocation sites) ---", file=stream)
+        print(
+            f"Peak traced memory: {_format_bytes(peak)}; "
+            f"still allocated at exit: {_format_bytes(current)}",
+            file=stream,
+        )
+        # Leave out the snapshot bookkeeping itself.
+        own = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        growth = after.filter_traces(own).compare_to(
+            before.filter_traces(own), "lineno"
+        )
+        for stat in growth[:top_n]:
+            print(stat, file=stream)
+        if written:
+            print(f"Snapshot written to {output}", file=stream)
+
+
+def _format_bytes(size: int) -> str:
+    value = float(size)
+    for unit in ("B", "KiB", "MiB"):
+        if abs(value) < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GiB"
+
+
+def run_profiled(
+    kind: str,
+    func: Callable[[], T],
+    output: Path,
+    stream: TextIO | None = None,
+    report: Callable[[str], None] | None = None,
+) -> T:
+    """
+    Calls ``func`` under the chosen profiler.
+
+    Args:
+        kind: ``"cpu"`` or ``"mem"``.
+        func: The work to profile (the dispatched handler).
+        output: Where the pstats file or tracemalloc snapshot goes.
+        stream: Where the summary is printed; stderr by default.
+        report: Receives the error message when ``output`` cannot be
+            written; printed to ``stream`` by default.
+    """
+    if kind not in PROFILE_KINDS:
+        raise ValueError(
+            f"Unknown profile kind '{kind}'. Choose from: {', '.join(PROFILE_KINDS)}"
+        )
+    stream = stream or sys.stderr
+    LOGGER.debug("Profiling (%s) into %s", kind, output)
+    if kind == "cpu":
+        return profile_cpu(func, output, stream, report=report)
+    return profile_memory(func, output, stream, report=report)
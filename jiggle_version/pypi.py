@@ -2,16 +2,29 @@
 """
 Implements a pre-flight check against PyPI to prevent bumping an unpublished version.
 """
+
 from __future__ import annotations
 
+import logging
+import random
 import sys
-from datetime import datetime, timedelta, timezone
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Callable
 
 import requests
-import tomlkit
-from packaging.version import Version
+from packaging.version import InvalidVersion, Version
+from requests.adapters import HTTPAdapter
 
+from jiggle_version import __about__
+from jiggle_version.instrument import count, span
+from jiggle_version.pypi_cache import CacheEntry, PyPICache
+from jiggle_version.pypi_index import PackageIndex
+from jiggle_version.transaction import map_concurrently
 from jiggle_version.utils.files import read_utf8_text
 
 # Handle Python < 3.11 needing tomli
@@ -26,8 +39,131 @@ class UnpublishedVersionError(Exception):
     """Raised when attempting to bump a version that is unpublished on PyPI."""
 
 
-# --- Caching Configuration ---
-CACHE_TTL = timedelta(days=1)
+# --- HTTP Configuration ---
+USER_AGENT = f"jiggle_version/{__about__.__version__}"
+# Overall budget for one lookup, across every attempt and backoff sleep.
+REQUEST_DEADLINE = 10.0
+# Upper bound for a single attempt; a slow first try still leaves room to retry.
+ATTEMPT_TIMEOUT = 4.0
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 0.25
+BACKOFF_CAP = 2.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# How an expired cache entry is handled; see get_latest_published_version.
+CACHE_MODES = ("blocking", "stale-while-revalidate")
+
+LOGGER = logging.getLogger(__name__)
+
+_BACKGROUND: list[threading.Thread] = []
+_BACKGROUND_LOCK = threading.Lock()
+_SESSION: requests.Session | None = None
+_SESSION_LOCK = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the shared, lazily created HTTP session.
+
+    One pooled session keeps TLS connections alive across lookups instead of
+    paying a fresh handshake for every request.
+    """
+    global _SESSION  # pylint: disable=global-statement
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            session = requests.Session()
+            # Retries are handled by request_with_retry so they share one deadline.
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["User-Agent"] = USER_AGENT
+            _SESSION = session
+        return _SESSION
+
+
+def reset_session() -> None:
+    """Closes and forgets the shared session (e.g. in tests or after a fork)."""
+    global _SESSION  # pylint: disable=global-statement
+    with _SESSION_LOCK:
+        if _SESSION is not None:
+            _SESSION.close()
+        _SESSION = None
+
+
+def _retry_after_seconds(response: requests.Response) -> float | None:
+    """Parses a numeric Retry-After header, if present."""
+    value = response.headers.get("Retry-After", "")
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
+
+
+def request_with_retry(
+    url: str,
+    *,
+    headers: dict[str, str] | None = None,
+    deadline: float = REQUEST_DEADLINE,
+    max_attempts: int = MAX_ATTEMPTS,
+    sleep: Callable[[float], None] = time.sleep,
+    stream: bool = False,
+) -> requests.Response:
+    """
+    GETs ``url`` on the shared session, retrying transient failures.
+
+    Connection errors, timeouts and 429/5xx responses are retried with full
+    jitter exponential backoff (honoring a numeric Retry-After). Every attempt
+    and sleep fits inside ``deadline`` seconds in total.
+
+    Returns:
+        The final response, which may still carry a retryable status if the
+        attempts or the deadline ran out.
+
+    Raises:
+        requests.RequestException: If no response could be obtained at all.
+    """
+    session = get_session()
+    started = time.monotonic()
+    last_error: requests.RequestException | None = None
+    last_response: requests.Response | None = None
+    for attempt in range(max_attempts):
+        if attempt:
+            delay = random.uniform(
+                0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** (attempt - 1))
+            )
+            if last_response is not None:
+                delay = max(delay, _retry_after_seconds(last_response) or 0.0)
+            if delay >= deadline - (time.monotonic() - started):
+                break
+            sleep(delay)
+        remaining = deadline - (time.monotonic() - started)
+        if remaining <= 0:
+            break
+        try:
+            response = session.get(
+                url,
+                headers=headers,
+                timeout=min(ATTEMPT_TIMEOUT, remaining),
+                stream=stream,
+            )
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            LOGGER.debug("Attempt %d for %s failed: %s", attempt + 1, url, exc)
+            last_error = exc
+            continue
+        if response.status_code not in RETRY_STATUSES:
+            return response
+        LOGGER.debug(
+            "Attempt %d for %s got HTTP %d", attempt + 1, url, response.status_code
+        )
+        if last_response is not None:
+            last_response.close()
+        last_response = response
+
+    if last_response is not None:
+        return last_response
+    raise last_error or requests.Timeout(
+        f"Deadline of {deadline:.1f}s exceeded for {url}"
+    )
 
 
 def get_package_name(project_root: Path) -> str | None:
@@ -44,70 +180,352 @@ def get_package_name(project_root: Path) -> str | None:
         return None
 
 
-def get_latest_published_version(package_name: str, config_path: Path) -> str | None:
+def _fetch_and_store(
+    package_name: str,
+    index: PackageIndex,
+    cache: PyPICache,
+    cached: CacheEntry | None,
+) -> str | None:
     """
-    Fetches the latest published version of a package from PyPI, caching the
-    result in the project's .jiggle_version.config file.
+    Queries the index (conditionally, if ``cached`` has validators) and
+    records the answer in ``cache``.
     """
-    # --- Read from TOML cache ---
-    doc = (
-        tomlkit.parse(read_utf8_text(config_path))
-        if config_path.is_file()
-        else tomlkit.document()
-    )
-    jiggle_tool_config = doc.get("tool", {}).get("jiggle_version", {})
-    pypi_cache = jiggle_tool_config.get("pypi_cache", {})
-    last_checked_str = pypi_cache.get("timestamp")
-
-    if last_checked_str:
-        last_checked = datetime.fromisoformat(last_checked_str)
-        if datetime.now(timezone.utc) - last_checked < CACHE_TTL:
-            print(
-                f"   (from cache created at {last_checked.strftime('%Y-%m-%d %H:%M')})"
-            )
-            return pypi_cache.get("latest_version")
+    url = index.project_url(package_name)
+    headers = index.request_headers()
+    if cached is not None and cached.etag:
+        headers["If-None-Match"] = cached.etag
+    if cached is not None and cached.last_modified:
+        headers["If-Modified-Since"] = cached.last_modified
 
-    # --- Fetch from PyPI ---
-    print("   (querying pypi.org...)")
-    url = f"https://pypi.org/pypi/{package_name}/json"
     latest_version = None
     try:
-        response = requests.get(url, timeout=10)
-        if response.status_code == 404:
-            latest_version = None  # Package not on PyPI at all
-        elif response.status_code == 200:
-            data = response.json()
-            latest_version = data.get("info", {}).get("version")
-        # On other errors, we return None to skip the check gracefully
-
-        # --- Update TOML cache ---
-        cache_table = tomlkit.table()
-        cache_table.add("timestamp", datetime.now(timezone.utc).isoformat())
-        cache_table.add("latest_version", latest_version)
-
-        if "tool" not in doc:
-            doc.add("tool", tomlkit.table())
-        if "jiggle_version" not in doc.get("tool", {}):  # type: ignore
-            doc["tool"].add("jiggle_version", tomlkit.table())  # type: ignore
-
-        doc["tool"]["jiggle_version"]["pypi_cache"] = cache_table  # type: ignore
-        config_path.write_text(tomlkit.dumps(doc), encoding="utf-8")
-
-    except requests.RequestException:
-        # Network error, skip the check
-        pass
+        with span("fetch", "pypi", url=url):
+            response = request_with_retry(url, headers=headers, stream=index.streams)
+            try:
+                if response.status_code == 304 and cached is not None:
+                    # Unchanged since the cached copy: only the timestamp moves.
+                    LOGGER.debug("PyPI data for %s not modified", package_name)
+                    latest_version = cached.latest_version
+                elif response.status_code == 404:
+                    latest_version = None  # Package not on PyPI at all
+                elif response.status_code == 200:
+                    latest_version = index.parse_latest(response, package_name)
+                else:
+                    # Don't cache an outage as "not published"; let the caller warn.
+                    response.raise_for_status()
+            finally:
+                response.close()
+    except requests.RequestException as exc:
+        # Network error: surface it so the caller can block the bump and say why,
+        # rather than treating the package as unpublished.
+        LOGGER.warning("PyPI lookup for %s failed: %s", package_name, exc)
+        raise
 
+    if response.status_code == 304 and cached is not None:
+        etag, last_modified = cached.etag, cached.last_modified
+    else:
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+    cache.store(
+        CacheEntry(
+            url=url,
+            package=package_name,
+            timestamp=datetime.now(timezone.utc),
+            latest_version=str(latest_version) if latest_version else None,
+            etag=etag,
+            last_modified=last_modified,
+        )
+    )
     return latest_version
 
 
+def _refresh(
+    package_name: str, index: PackageIndex, cache: PyPICache, cached: CacheEntry
+) -> None:
+    """Background body of a stale-while-revalidate refresh; never raises."""
+    try:
+        _fetch_and_store(package_name, index, cache, cached)
+    except Exception as exc:  # noqa: BLE001
+        LOGGER.debug("Background PyPI refresh for %s failed: %s", package_name, exc)
+
+
+def refresh_in_background(
+    package_name: str, index: PackageIndex, cache: PyPICache, cached: CacheEntry
+) -> threading.Thread:
+    """
+    Starts refreshing a stale cache entry without blocking the caller.
+
+    The thread is not a daemon, and :func:`wait_for_background_refreshes`
+    joins it, so the refreshed entry is persisted before the process exits.
+    """
+    thread = threading.Thread(
+        target=_refresh,
+        args=(package_name, index, cache, cached),
+        name=f"pypi-refresh-{package_name}",
+    )
+    with _BACKGROUND_LOCK:
+        _BACKGROUND.append(thread)
+    thread.start()
+    return thread
+
+
+def wait_for_background_refreshes(timeout: float = REQUEST_DEADLINE) -> None:
+    """Joins every background refresh started so far, within ``timeout`` seconds."""
+    with _BACKGROUND_LOCK:
+        threads = list(_BACKGROUND)
+        _BACKGROUND.clear()
+    deadline = time.monotonic() + timeout
+    for thread in threads:
+        thread.join(max(deadline - time.monotonic(), 0.0))
+
+
+def get_latest_published_version(
+    package_name: str,
+    config_path: Path | None = None,
+    index: PackageIndex | None = None,
+    cache: PyPICache | None = None,
+    mode: str = "blocking",
+    announce: Callable[[str], None] = print,
+) -> str | None:
+    """
+    Fetches the latest published version of a package from its index, caching
+    the answer in the user-level PyPI cache.
+
+    The response's ETag / Last-Modified validators are cached too. Once the
+    entry expires, the next lookup revalidates with If-None-Match /
+    If-Modified-Since, and a 304 only refreshes the timestamp.
+
+    Args:
+        package_name: The distribution name, as in [project].name.
+        config_path: Deprecated and ignored. Answers used to be cached in this
+            file; they now live in ``cache``. Pass None.
+        index: Where and how to look; defaults to the PyPI JSON API.
+        cache: Where answers are kept; defaults to the user cache directory.
+        mode: ``"blocking"`` waits for the index whenever the cache has
+            expired. ``"stale-while-revalidate"`` answers from an expired
+            entry that is still inside the cache's grace window and
+            refreshes it in the background.
+        announce: Receives the one-line note on where the answer came from.
+    """
+    if config_path is not None:
+        warnings.warn(
+            "get_latest_published_version(config_path=...) is ignored; PyPI "
+            "answers are cached in the user cache directory (pass cache= instead)",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+    if mode not in CACHE_MODES:
+        raise ValueError(
+            f"Unknown pypi_cache_mode '{mode}'. Choose from: {', '.join(CACHE_MODES)}"
+        )
+    index = index or PackageIndex()
+    with span("lookup", "pypi", package=package_name, index=index.url):
+        if index.is_local:
+            # A local directory is as cheap to read as the cache; never cached.
+            announce(f"   (reading {index.display_name}...)")
+            return index.read_local(package_name)
+        cache = cache or PyPICache()
+
+        cached = cache.load(index.project_url(package_name))
+        if cached is not None and cache.is_fresh(cached):
+            count("pypi_cache_hits")
+            announce(
+                f"   (from cache created at {cached.timestamp.strftime('%Y-%m-%d %H:%M')})"
+            )
+            return cached.latest_version
+
+        # A stale "not published" would block the bump, so only hits are served stale.
+        if (
+            mode == "stale-while-revalidate"
+            and cached is not None
+            and cached.found
+            and cache.is_usable_stale(cached)
+        ):
+            announce(
+                f"   (stale cache from {cached.timestamp.strftime('%Y-%m-%d %H:%M')}, "
+                "refreshing in background)"
+            )
+            count("pypi_cache_stale_hits")
+            refresh_in_background(package_name, index, cache, cached)
+            return cached.latest_version
+
+        count("pypi_cache_misses")
+        announce(f"   (querying {index.display_name}...)")
+        return _fetch_and_store(package_name, index, cache, cached)
+
+
+def lookup_latest_version(
+    package_name: str,
+    indexes: list[PackageIndex],
+    cache: PyPICache | None = None,
+    mode: str = "blocking",
+    announce: Callable[[str], None] = print,
+) -> str | None:
+    """
+    Queries several indexes concurrently and returns the highest published version.
+
+    Every index is waited for (each lookup is bounded by REQUEST_DEADLINE), so
+    the answer does not depend on which index responds first: the versions
+    that were found are compared with ``packaging.version`` and the highest
+    wins. "Not found" is only returned once every index has said so. A failed
+    index, whatever the error, is left out; if no index found the package and
+    any of them failed, the first error (in ``indexes`` order) is raised,
+    because the package may live on the index that could not be reached.
+    """
+    if len(indexes) == 1:
+        return get_latest_published_version(
+            package_name, None, indexes[0], cache, mode, announce
+        )
+    with ThreadPoolExecutor(
+        max_workers=len(indexes), thread_name_prefix="pypi-index"
+    ) as pool:
+        futures = [
+            pool.submit(
+                get_latest_published_version,
+                package_name,
+                None,
+                index,
+                cache,
+                mode,
+                announce,
+            )
+            for index in indexes
+        ]
+    found: list[str] = []
+    first_error: Exception | None = None
+    for index, future in zip(indexes, futures):
+        try:
+            latest = future.result()
+        except Exception as exc:  # noqa: BLE001
+            LOGGER.warning("Lookup on %s failed: %s", index.display_name, exc)
+            first_error = first_error or exc
+            continue
+        if latest:
+            found.append(latest)
+    if found:
+        return max(found, key=_version_sort_key)
+    if first_error is not None:
+        raise first_error
+    return None
+
+
+def _version_sort_key(version: str) -> tuple[int, Version | str]:
+    """Orders PEP 440 versions properly; unparseable ones sort below them."""
+    try:
+        return 1, Version(version)
+    except InvalidVersion:
+        return 0, version
+
+
+class PublicationStatus:
+    """One package's row in a batch publication check."""
+
+    def __init__(
+        self,
+        package_name: str,
+        local_version: str | None,
+        latest_version: str | None = None,
+        error: Exception | None = None,
+    ):
+        self.package_name = package_name
+        self.local_version = local_version
+        self.latest_version = latest_version
+        self.error = error
+
+    @property
+    def status(self) -> str:
+        """error, missing, found, published, unpublished (ahead) or behind."""
+        if self.error is not None:
+            return "error"
+        if not self.latest_version:
+            return "missing"
+        if not self.local_version:
+            return "found"
+        try:
+            local, latest = Version(self.local_version), Version(self.latest_version)
+        except InvalidVersion:
+            return "found"
+        if local == latest:
+            return "published"
+        return "unpublished" if local > latest else "behind"
+
+    @property
+    def ok(self) -> bool:
+        """False when the package is not on any index or could not be checked."""
+        return self.status not in ("error", "missing")
+
+
+def check_publications(
+    packages: list[tuple[str, str | None]],
+    indexes: list[PackageIndex] | None = None,
+    cache: PyPICache | None = None,
+    mode: str = "blocking",
+    max_workers: int = 8,
+) -> list[PublicationStatus]:
+    """
+    Looks up many packages concurrently, at most ``max_workers`` at a time.
+
+    Cache updates are held until every lookup is done and then written in
+    one pass.
+
+    Args:
+        packages: ``(package_name, local_version)`` pairs.
+
+    Returns:
+        One :class:`PublicationStatus` per package, in input order.
+    """
+    indexes = indexes or [PackageIndex()]
+    cache = cache or PyPICache()
+
+    def check_one(package: tuple[str, str | None]) -> PublicationStatus:
+        name, local_version = package
+        try:
+            latest = lookup_latest_version(
+                name, indexes, cache, mode, announce=lambda _: None
+            )
+        except (requests.RequestException, ValueError) as exc:
+            return PublicationStatus(name, local_version, error=exc)
+        return PublicationStatus(name, local_version, latest)
+
+    with cache.batch():
+        return map_concurrently(check_one, packages, max_workers)
+
+
 def check_pypi_publication(
-    package_name: str, current_version: str, new_version: str, config_path: Path
+    package_name: str,
+    current_version: str,
+    new_version: str,
+    index: PackageIndex | None = None,
+    cache: PyPICache | None = None,
+    mode: str = "blocking",
 ) -> None:
     """
     Checks if the current version is published and allows bumping under specific rules.
     """
-    latest_published_str = get_latest_published_version(package_name, config_path)
+    latest_published_str = get_latest_published_version(
+        package_name, index=index, cache=cache, mode=mode
+    )
+    evaluate_publication(
+        package_name, latest_published_str, current_version, new_version
+    )
+
 
+def evaluate_publication(
+    package_name: str,
+    latest_published_str: str | None,
+    current_version: str,
+    new_version: str,
+    announce: Callable[[str], None] = print,
+) -> None:
+    """
+    Applies the bump rules to an already fetched latest published version.
+
+    ``announce`` receives the one-line verdict when the bump is allowed.
+
+    Raises:
+        UnpublishedVersionError: If the bump should be blocked.
+    """
     if not latest_published_str:
         # NEW BEHAVIOR: If the package has never been published, block the bump.
         raise UnpublishedVersionError(
@@ -120,7 +538,7 @@ def check_pypi_publication(
 
     if current_v > published_v:
         if new_v > current_v:
-            print(
+            announce(
                 f"🟡 Current version '{current_v}' is unpublished (PyPI has '{published_v}'). "
                 f"Allowing bump to '{new_v}'."
             )
@@ -130,7 +548,7 @@ def check_pypi_publication(
             "Cannot perform a redundant bump."
         )
     elif new_v > published_v:
-        print(f"✅ PyPI version is '{published_v}'. Bump to '{new_v}' is allowed.")
+        announce(f"✅ PyPI version is '{published_v}'. Bump to '{new_v}' is allowed.")
         return
     else:
         raise UnpublishedVersionError(
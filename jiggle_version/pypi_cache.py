@@ -0,0 +1,229 @@
+# jiggle_version/pypi_cache.py
+"""
+User-level cache for PyPI publication lookups.
+
+Lookups used to be cached inside each project's ``.jiggle_version.config``,
+which ``write_digest_data`` rewrites from scratch after every ``auto`` bump.
+The cache now lives in the user's cache directory instead, so it survives
+bumps and is shared by every checkout and worktree of a project:
+
+- ``$JIGGLE_VERSION_CACHE_DIR`` if set, else
+- ``$XDG_CACHE_HOME/jiggle_version``, else the platform default
+  (``~/.cache``, ``~/Library/Caches`` or ``%LOCALAPPDATA%``).
+
+Each (index URL, package) pair is one small JSON file under ``pypi/``, named
+by a hash of the project URL. Writes go to a temp file in the same directory
+followed by ``os.replace``, so concurrent processes never see a torn entry.
+Found and not-found (404) answers expire on separate TTLs.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+LOGGER = logging.getLogger(__name__)
+
+CACHE_DIR_ENV = "JIGGLE_VERSION_CACHE_DIR"
+# How long a found version is trusted before it is revalidated.
+DEFAULT_HIT_TTL = timedelta(days=1)
+# A 404 goes stale sooner: a first release should be noticed quickly.
+DEFAULT_MISS_TTL = timedelta(hours=1)
+# How long past its TTL an entry may still be served in stale-while-revalidate mode.
+DEFAULT_GRACE = timedelta(days=7)
+
+
+def user_cache_dir() -> Path:
+    """The per-user cache directory for jiggle_version."""
+    override = os.environ.get(CACHE_DIR_ENV)
+    if override:
+        return Path(override)
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    if xdg:
+        return Path(xdg) / "jiggle_version"
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA")
+        root = Path(base) if base else Path.home() / "AppData" / "Local"
+        return root / "jiggle_version" / "Cache"
+    if sys.platform == "darwin":
+        return Path.home() / "Library" / "Caches" / "jiggle_version"
+    return Path.home() / ".cache" / "jiggle_version"
+
+
+class CacheEntry:
+    """One cached lookup: what the index said about a package, and when."""
+
+    def __init__(
+        self,
+        url: str,
+        package: str,
+        timestamp: datetime,
+        latest_version: str | None = None,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ):
+        self.url = url
+        self.package = package
+        self.timestamp = timestamp
+        self.latest_version = latest_version
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def found(self) -> bool:
+        """False when the index answered 404 (no published version)."""
+        return self.latest_version is not None
+
+    def age(self, now: datetime | None = None) -> timedelta:
+        return (now or datetime.now(timezone.utc)) - self.timestamp
+
+    def to_dict(self) -> dict[str, Any]:
+        data = {
+            "url": self.url,
+            "package": self.package,
+            "timestamp": self.timestamp.isoformat(),
+            "latest_version": self.latest_version,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+        }
+        return {key: value for key, value in data.items() if value is not None}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> CacheEntry:
+        return cls(
+            url=data["url"],
+            package=data["package"],
+            timestamp=datetime.fromisoformat(data["timestamp"]),
+            latest_version=data.get("latest_version"),
+            etag=data.get("etag"),
+            last_modified=data.get("last_modified"),
+        )
+
+
+class PyPICache:
+    """File-per-entry cache of index lookups, safe to share between processes."""
+
+    def __init__(
+        self,
+        directory: Path | None = None,
+        hit_ttl: timedelta = DEFAULT_HIT_TTL,
+        miss_ttl: timedelta = DEFAULT_MISS_TTL,
+        grace: timedelta = DEFAULT_GRACE,
+    ):
+        self.directory = (directory or user_cache_dir()) / "pypi"
+        self.hit_ttl = hit_ttl
+        self.miss_ttl = miss_ttl
+        self.grace = grace
+        # While a batch() is open, stores are held here and written on exit.
+        self._pending: dict[str, CacheEntry] | None = None
+        self._lock = threading.Lock()
+
+    def path_for(self, url: str) -> Path:
+        """The entry file for a project URL (which already names index and package)."""
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+        return self.directory / f"{digest}.json"
+
+    def ttl_for(self, entry: CacheEntry) -> timedelta:
+        return self.hit_ttl if entry.found else self.miss_ttl
+
+    def is_fresh(self, entry: CacheEntry, now: datetime | None = None) -> bool:
+        return entry.age(now) < self.ttl_for(entry)
+
+    def is_usable_stale(self, entry: CacheEntry, now: datetime | None = None) -> bool:
+        """Expired, but still within the stale-while-revalidate grace window."""
+        return entry.age(now) < self.ttl_for(entry) + self.grace
+
+    def load(self, url: str) -> CacheEntry | None:
+        """Reads the entry for ``url``; a missing or unreadable entry is a miss."""
+        with self._lock:
+            if self._pending is not None and url in self._pending:
+                return self._pending[url]
+        path = self.path_for(url)
+        try:
+            entry = CacheEntry.from_dict(json.loads(path.read_text(encoding="utf-8")))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            LOGGER.debug("Ignoring unreadable PyPI cache entry %s: %s", path, exc)
+            return None
+        return entry if entry.url == url else None
+
+    def store(self, entry: CacheEntry) -> None:
+        """Atomically writes ``entry`` (or holds it, inside :meth:`batch`)."""
+        with self._lock:
+            if self._pending is not None:
+                self._pending[entry.url] = entry
+                return
+        self._write_entries([entry])
+
+    @contextmanager
+    def batch(self) -> Iterator[PyPICache]:
+        """
+        Holds every store made inside the block and writes them in one pass
+        on exit, instead of one write per lookup as results trickle in.
+        """
+        with self._lock:
+            self._pending = {}
+        try:
+            yield self
+        finally:
+            with self._lock:
+                entries, self._pending = list(self._pending.values()), None
+            self._write_entries(entries)
+
+    def _write_entries(self, entries: list[CacheEntry]) -> None:
+        """Atomically writes each entry. Failures are logged, never raised."""
+        if not entries:
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        except OSError as exc:
+            LOGGER.warning("Could not create PyPI cache %s: %s", self.directory, exc)
+            return
+        for entry in entries:
+            self._write_entry(entry)
+
+    def _write_entry(self, entry: CacheEntry) -> None:
+        path = self.path_for(entry.url)
+        try:
+            fd, temp_name = tempfile.mkstemp(
+                prefix=f".{path.name}.", suffix=".tmp", dir=path.parent
+            )
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                    json.dump(entry.to_dict(), handle)
+                os.replace(temp_name, path)
+            except BaseException:
+                Path(temp_name).unlink(missing_ok=True)
+                raise
+        except OSError as exc:
+            LOGGER.warning("Could not write PyPI cache entry %s: %s", path, exc)
+
+
+def _ttl(value: Any, default: timedelta) -> timedelta:
+    """A TTL in seconds from config, or ``default`` when unset."""
+    if value in (None, ""):
+        return default
+    return timedelta(seconds=float(value))
+
+
+def cache_from_config(settings: dict[str, Any]) -> PyPICache:
+    """
+    Builds the cache from ``[tool.jiggle_version]`` settings.
+
+    ``pypi_cache_ttl`` (found versions), ``pypi_cache_miss_ttl`` (404s) and
+    ``pypi_cache_grace`` (stale-while-revalidate window) are in seconds.
+    """
+    return PyPICache(
+        hit_ttl=_ttl(settings.get("pypi_cache_ttl"), DEFAULT_HIT_TTL),
+        miss_ttl=_ttl(settings.get("pypi_cache_miss_ttl"), DEFAULT_MISS_TTL),
+        grace=_ttl(settings.get("pypi_cache_grace"), DEFAULT_GRACE),
+    )
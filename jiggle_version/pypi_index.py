@@ -0,0 +1,291 @@
+# jiggle_version/pypi_index.py
+"""
+Package index backends for the PyPI publication check.
+
+The pre-flight check only needs one fact: the latest version a package has on
+its index. Two backends can answer that:
+
+- ``json``: the PyPI JSON API (``/pypi/<name>/json``). Simple to read
+  (``info.version``) but the document carries full metadata for every
+  release, so it grows with the project's history.
+- ``simple``: the PEP 691 JSON Simple API (``/simple/<name>/``), requested
+  with ``Accept: application/vnd.pypi.simple.v1+json``. The response is read
+  in chunks and scanned as it arrives: a PEP 700 ``versions`` key answers the
+  question outright and ends the download early; otherwise versions are taken
+  from the distribution file names. Indexes that ignore the Accept header and
+  send the PEP 503 HTML page are parsed the same way, from anchor text.
+
+An index URL may also be a ``file://`` directory laid out like a simple index
+(``<root>/<normalized-name>/``), for air-gapped CI. Such a directory is read
+directly: ``index.json`` (PEP 691), else ``index.html`` (PEP 503), else the
+distribution files themselves.
+"""
+from __future__ import annotations
+
+import html
+import json
+import logging
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable
+from urllib.parse import urlparse
+
+if TYPE_CHECKING:
+    import requests
+
+LOGGER = logging.getLogger(__name__)
+
+BACKENDS = ("json", "simple")
+DEFAULT_BACKEND = "json"
+# Default index roots per backend; tests point these at a local stand-in.
+DEFAULT_INDEX_URLS = {
+    "json": "https://pypi.org/pypi",
+    "simple": "https://pypi.org/simple",
+}
+SIMPLE_JSON_CONTENT_TYPE = "application/vnd.pypi.simple.v1+json"
+SIMPLE_ACCEPT = (
+    f"{SIMPLE_JSON_CONTENT_TYPE}, "
+    "application/vnd.pypi.simple.v1+html;q=0.2, text/html;q=0.01"
+)
+
+CHUNK_SIZE = 16 * 1024
+# Unmatched bytes kept between chunks; far longer than any file name entry.
+_SCAN_TAIL = 4096
+
+_SDIST_SUFFIXES = (".tar.gz", ".tar.bz2", ".tar.xz", ".tgz", ".zip", ".egg", ".exe")
+_JSON_FILENAME_RE = re.compile(rb'"filename"\s*:\s*"((?:[^"\\\r\n]|\\.){1,512})"')
+_HTML_FILENAME_RE = re.compile(
+    rb"<a\b[^>]{0,4096}>\s*([^<>\s]{1,512})\s*</a>", re.IGNORECASE
+)
+_JSON_VERSIONS_KEY = b'"versions"'
+_JSON_VERSIONS_RE = re.compile(rb'"versions"\s*:\s*(\[[^\]]*\])')
+
+
+def normalize_name(name: str) -> str:
+    """PEP 503 normalized project name (``Jiggle_Version`` -> ``jiggle-version``)."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def version_from_filename(filename: str, package_name: str) -> str | None:
+    """
+    Extracts the version from a distribution file name.
+
+    Wheels carry it as the second dash-separated field. For sdists and eggs
+    the project name prefix (in any of its spellings) and the extension are
+    stripped.
+
+    Returns:
+        The version string, or None if the name does not belong to the package.
+    """
+    if filename.endswith(".whl"):
+        parts = filename[: -len(".whl")].split("-")
+        if len(parts) < 5:
+            return None
+        if normalize_name(parts[0]) == normalize_name(package_name):
+            return parts[1]
+        return None
+    for suffix in _SDIST_SUFFIXES:
+        if filename.lower().endswith(suffix):
+            stem = filename[: -len(suffix)]
+            break
+    else:
+        return None
+    name_pattern = "[-_.]+".join(
+        re.escape(part) for part in normalize_name(package_name).split("-")
+    )
+    match = re.match(rf"(?i){name_pattern}-(.+)$", stem)
+    if not match:
+        return None
+    version = match.group(1)
+    if suffix in (".egg", ".exe"):
+        # foo-1.0-py3.8.egg / foo-1.0.win32.exe
+        version = version.split("-", 1)[0]
+    return version
+
+
+def pick_latest(versions: Iterable[str]) -> str | None:
+    """
+    Returns the highest version, preferring final releases over pre-releases.
+
+    Unparseable version strings are ignored.
+    """
+    from packaging.version import InvalidVersion, Version
+
+    finals: dict[Version, str] = {}
+    prereleases: dict[Version, str] = {}
+    for raw in versions:
+        try:
+            parsed = Version(raw)
+        except InvalidVersion:
+            LOGGER.debug("Ignoring unparseable version %r", raw)
+            continue
+        (prereleases if parsed.is_prerelease else finals)[parsed] = raw
+    pool = finals or prereleases
+    return pool[max(pool)] if pool else None
+
+
+def scan_simple_versions(
+    chunks: Iterable[bytes], package_name: str, is_json: bool = True
+) -> list[str]:
+    """
+    Collects versions from a Simple API page as its bytes arrive.
+
+    Args:
+        chunks: The response body, in any chunking.
+        package_name: Used to recognize the package's own file names.
+        is_json: True for a PEP 691 JSON page, False for PEP 503 HTML.
+
+    Returns:
+        The versions listed. When a JSON page has a ``versions`` key, that
+        list is returned as soon as it is complete and the rest is not read.
+    """
+    pattern = _JSON_FILENAME_RE if is_json else _HTML_FILENAME_RE
+    versions: list[str] = []
+    buffer = b""
+    for chunk in chunks:
+        buffer += chunk
+        if is_json and _JSON_VERSIONS_KEY in buffer:
+            match = _JSON_VERSIONS_RE.search(buffer)
+            if match:
+                return [str(item) for item in json.loads(match.group(1))]
+        consumed = 0
+        for match in pattern.finditer(buffer):
+            raw = match.group(1)
+            if is_json:
+                filename = json.loads(b'"' + raw + b'"')
+            else:
+                filename = html.unescape(raw.decode("utf-8", errors="replace"))
+            version = version_from_filename(filename, package_name)
+            if version:
+                versions.append(version)
+            consumed = match.end()
+        keep_from = max(consumed, len(buffer) - _SCAN_TAIL)
+        if is_json:
+            # Never cut into a versions array that is still arriving.
+            pending = buffer.find(_JSON_VERSIONS_KEY, consumed)
+            if pending != -1:
+                keep_from = min(keep_from, pending)
+        buffer = buffer[keep_from:]
+    return versions
+
+
+def _local_path(url: str) -> Path:
+    """Filesystem path of a ``file://`` URL."""
+    from urllib.request import url2pathname  # urllib.request is slow to import
+
+    return Path(url2pathname(urlparse(url).path))
+
+
+class PackageIndex:
+    """One package index and the backend used to query it.
+
+    ``file://`` URLs are always read as simple-index directories.
+    """
+
+    def __init__(self, url: str | None = None, backend: str = DEFAULT_BACKEND):
+        if backend not in BACKENDS:
+            raise ValueError(
+                f"Unknown PyPI backend '{backend}'. Choose from: {', '.join(BACKENDS)}"
+            )
+        self.url = (url or DEFAULT_INDEX_URLS[backend]).rstrip("/")
+        self.backend = "simple" if self.is_local else backend
+
+    def __repr__(self) -> str:
+        return f"PackageIndex({self.url!r}, backend={self.backend!r})"
+
+    @property
+    def is_local(self) -> bool:
+        """True for a ``file://`` index directory."""
+        return self.url.startswith("file:")
+
+    @property
+    def display_name(self) -> str:
+        """Short name for progress messages (host, or directory for file indexes)."""
+        parsed = urlparse(self.url)
+        return parsed.netloc or _local_path(self.url).as_posix()
+
+    @property
+    def streams(self) -> bool:
+        """Whether responses should be read incrementally."""
+        return self.backend == "simple"
+
+    def project_url(self, package_name: str) -> str:
+        """The URL that describes ``package_name`` on this index."""
+        if self.backend == "simple":
+            return f"{self.url}/{normalize_name(package_name)}/"
+        return f"{self.url}/{package_name}/json"
+
+    def request_headers(self) -> dict[str, str]:
+        """Headers to send with every lookup."""
+        if self.backend == "simple":
+            return {"Accept": SIMPLE_ACCEPT}
+        return {"Accept": "application/json"}
+
+    def parse_latest(
+        self, response: requests.Response, package_name: str
+    ) -> str | None:
+        """Reads the latest version out of a 200 response."""
+        if self.backend == "json":
+            return response.json().get("info", {}).get("version")
+        content_type = response.headers.get("Content-Type", "")
+        versions = scan_simple_versions(
+            response.iter_content(CHUNK_SIZE),
+            package_name,
+            is_json="json" in content_type,
+        )
+        return pick_latest(versions)
+
+    def read_local(self, package_name: str) -> str | None:
+        """
+        Latest version of ``package_name`` in a ``file://`` index directory.
+
+        Returns:
+            None when the project directory is missing or lists no versions
+            (the local equivalent of a 404).
+        """
+        project_dir = _local_path(self.url) / normalize_name(package_name)
+        if not project_dir.is_dir():
+            return None
+        for page, is_json in (("index.json", True), ("index.html", False)):
+            path = project_dir / page
+            if path.is_file():
+                with path.open("rb") as handle:
+                    chunks = iter(lambda: handle.read(CHUNK_SIZE), b"")
+                    return pick_latest(
+                        scan_simple_versions(chunks, package_name, is_json)
+                    )
+        return pick_latest(
+            version
+            for version in (
+                version_from_filename(entry.name, package_name)
+                for entry in project_dir.iterdir()
+            )
+            if version
+        )
+
+
+def indexes_from_settings(
+    entries: Any, backend: str | None = None
+) -> list[PackageIndex]:
+    """
+    Builds the index list from ``pypi_index_url`` config / CLI values.
+
+    Args:
+        entries: None (PyPI), one URL, or a list of URLs and
+            ``{url = ..., backend = ...}`` tables.
+        backend: Backend for entries that do not name one.
+    """
+    backend = backend or DEFAULT_BACKEND
+    if entries in (None, "", []):
+        return [PackageIndex(backend=backend)]
+    if isinstance(entries, (str, dict)):
+        entries = [entries]
+    indexes = []
+    for entry in entries:
+        if isinstance(entry, dict):
+            indexes.append(
+                PackageIndex(entry.get("url"), entry.get("backend", backend))
+            )
+        else:
+            indexes.append(PackageIndex(str(entry), backend))
+    return indexes
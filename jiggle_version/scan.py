@@ -0,0 +1,460 @@
+# jiggle_version/scan.py
+"""
+The discover -> parse -> agree pipeline shared by every read-only command.
+
+``check``, ``print``, ``inspect`` and ``bump`` all need the same facts: which
+files could declare a version, what each one declares, and whether they
+agree. :func:`scan_project` computes them once per invocation and the
+handlers only decide how to report them.
+
+A long-lived process (``serve``) installs a :class:`ScanCache` with
+:func:`set_scan_cache`, so repeated scans of the same project reuse the ignore
+spec, the file list and the parse results for as long as the mtimes say they
+are current.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from .discover import DiscoveryStats, find_source_files
+from .gitignore import collect_default_spec, ignore_files
+from .instrument import count, span
+from .parsers.ast_parser import (
+    find_version_spans,
+    parse_python_module,
+    parse_setup_py,
+)
+from .parsers.config_parser import parse_pyproject_toml, parse_setup_cfg
+
+LOGGER = logging.getLogger(__name__)
+
+# Map specific filenames to their specialized parsers.
+# Any other .py file will use the generic module parser.
+PARSER_MAP: dict[str, Callable[[Path], str | None]] = {
+    "pyproject.toml": parse_pyproject_toml,
+    "setup.cfg": parse_setup_cfg,
+    "setup.py": parse_setup_py,
+}
+
+
+def parser_for(file_path: Path) -> Callable[[Path], str | None] | None:
+    """The parser for a discovered file, or None for an unknown file type."""
+    if file_path.name in PARSER_MAP:
+        return PARSER_MAP[file_path.name]
+    if file_path.suffix == ".py":
+        return parse_python_module
+    return None
+
+
+class SourceVersion:
+    """What one discovered file declares."""
+
+    def __init__(
+        self,
+        path: Path,
+        relative_path: Path,
+        version: str | None = None,
+        error: Exception | None = None,
+        parsed: bool = True,
+        parser: str | None = None,
+        duration: float = 0.0,
+        span: dict[str, int] | None = None,
+    ):
+        self.path = path
+        self.relative_path = relative_path
+        self.version = version
+        self.error = error
+        # False when no parser applies to the file type.
+        self.parsed = parsed
+        # Name of the parser function that ran, and how long it took.
+        self.parser = parser
+        self.duration = duration
+        # Where the version is declared (see version_span). Only located when the
+        # scan asked for spans (``--format ndjson``); finding it costs a re-read.
+        self.span = span
+        # "miss" when parsed for this scan, "hit" when reused from a ScanCache.
+        self.cache = "miss"
+
+    def __repr__(self) -> str:
+        return f"SourceVersion({str(self.relative_path)!r}, version={self.version!r})"
+
+    @property
+    def source(self) -> str:
+        return str(self.relative_path)
+
+    def to_dict(self) -> dict[str, Any]:
+        """One ``--format ndjson`` record."""
+        return {
+            "type": "source",
+            "path": self.relative_path.as_posix(),
+            "parser": self.parser,
+            "version": self.version,
+            "error": None if self.error is None else str(self.error),
+            "span": self.span,
+            "duration_ms": round(self.duration * 1000, 3),
+            "cache": self.cache if self.parsed else None,
+        }
+
+
+class ScanResult:
+    """Discovered files, their parsed versions, and whether they agree."""
+
+    def __init__(
+        self,
+        project_root: Path,
+        files: list[Path],
+        discovery_stats: DiscoveryStats | None = None,
+    ):
+        self.project_root = project_root
+        self.files = files
+        self.sources: list[SourceVersion] = []
+        # What the directory walk cost (``inspect --stats``).
+        self.discovery_stats = discovery_stats or DiscoveryStats()
+
+    @property
+    def found(self) -> list[SourceVersion]:
+        """Sources that declare a version, in discovery order."""
+        return [source for source in self.sources if source.version]
+
+    @property
+    def versions(self) -> list[str]:
+        return [source.version for source in self.found if source.version]
+
+    @property
+    def unique_versions(self) -> set[str]:
+        # TODO: Add scheme-based normalization (PEP 440, SemVer) before comparison.
+        return set(self.versions)
+
+    @property
+    def agreed_version(self) -> str | None:
+        """The single declared version, or None when there is none or a conflict."""
+        unique = self.unique_versions
+        return next(iter(unique)) if len(unique) == 1 else None
+
+    @property
+    def counters(self) -> dict[str, int]:
+        """Per-stage counts: discovery, parsing, agreement."""
+        return {
+            "files_discovered": len(self.files),
+            "files_parsed": sum(1 for source in self.sources if source.parsed),
+            "files_skipped": sum(1 for source in self.sources if not source.parsed),
+            "parse_errors": sum(1 for source in self.sources if source.error),
+            "versions_found": len(self.found),
+            "unique_versions": len(self.unique_versions),
+        }
+
+
+# ``version = 1.2.3`` / ``version = "1.2.3"`` in pyproject.toml and setup.cfg.
+_KEY_VERSION_RE = (
+    r"""^[ \t]*version[ \t]*=[ \t]*["']?({})["']?[ \t]*(?:[#;][^\r\n]*)?\r?$"""
+)
+# ``[section]`` and TOML ``[[array.of.tables]]`` headers.
+_SECTION_HEADER_RE = re.compile(
+    rb"^[ \t]*\[\[?([^\[\]\r\n]*)\]\]?[ \t]*(?:[#;][^\r\n]*)?\r?$", re.MULTILINE
+)
+# The sections each config parser reads ``version`` from, in priority order.
+_VERSION_SECTIONS: dict[str, tuple[str, ...]] = {
+    "pyproject.toml": ("project", "tool.setuptools"),
+    "setup.cfg": ("metadata",),
+}
+
+
+def _section_bodies(raw: bytes, name: str) -> list[tuple[int, int]]:
+    """``(start, end)`` byte ranges of the bodies of every ``[name]`` section."""
+    headers = list(_SECTION_HEADER_RE.finditer(raw))
+    bodies = []
+    for position, header in enumerate(headers):
+        title = b"".join(header.group(1).split()).decode("utf-8", errors="replace")
+        if title == name:
+            end = (
+                headers[position + 1].start()
+                if position + 1 < len(headers)
+                else len(raw)
+            )
+            bodies.append((header.end(), end))
+    return bodies
+
+
+def version_span(file_path: Path, version: str) -> dict[str, int] | None:
+    """
+    Where ``version`` is declared in ``file_path``.
+
+    Python sources report the first version literal; pyproject.toml and
+    setup.cfg report the ``version`` key that holds it in the sections their
+    parsers read (``[project]``, then ``[tool.setuptools]``; ``[metadata]``).
+    The span covers the version text, without quotes.
+
+    Returns:
+        ``{"start", "end"}`` byte offsets plus 1-based ``line`` and ``column``,
+        or None when the declaration cannot be located.
+    """
+    try:
+        raw = file_path.read_bytes()
+    except OSError:
+        return None
+    start = end = -1
+    if file_path.suffix == ".py":
+        try:
+            spans = find_version_spans(raw, filename=str(file_path))
+        except (SyntaxError, ValueError):
+            spans = []
+        if spans:
+            # Narrow the literal (prefix and quotes) to the version text itself.
+            literal_start, literal_end = spans[0]
+            inner = raw.find(version.encode("utf-8"), literal_start, literal_end)
+            start, end = (
+                (inner, inner + len(version.encode("utf-8")))
+                if inner >= 0
+                else spans[0]
+            )
+    else:
+        pattern = re.compile(
+            _KEY_VERSION_RE.format(re.escape(version)).encode("utf-8"), re.MULTILINE
+        )
+        for section in _VERSION_SECTIONS.get(file_path.name, ()):
+            for body_start, body_end in _section_bodies(raw, section):
+                match = pattern.search(raw, body_start, body_end)
+                if match:
+                    start, end = match.span(1)
+                    break
+            if start >= 0:
+                break
+    if start < 0:
+        return None
+    line_start = raw.rfind(b"\n", 0, start) + 1
+    return {
+        "start": start,
+        "end": end,
+        "line": raw.count(b"\n", 0, start) + 1,
+        "column": start - line_start + 1,
+    }
+
+
+def parse_source(
+    file_path: Path, project_root: Path, spans: bool = False
+) -> SourceVersion:
+    """
+    Runs the matching parser on one file; parse failures are recorded, not raised.
+
+    With ``spans``, the declaration is also located (:func:`version_span`).
+    """
+    relative_path = file_path.relative_to(project_root)
+    parser_func = parser_for(file_path)
+    if parser_func is None:
+        LOGGER.debug("Skipping non‑version file: %s", file_path)
+        return SourceVersion(file_path, relative_path, parsed=False)
+    name = parser_func.__name__
+    started = time.perf_counter()
+    try:
+        with span(name, "parse", path=relative_path):
+            version = parser_func(file_path)
+    except Exception as e:
+        LOGGER.warning(
+            "Failed to parse %s: %s",
+            file_path,
+            e,
+            exc_info=LOGGER.isEnabledFor(logging.DEBUG),
+        )
+        return SourceVersion(
+            file_path,
+            relative_path,
+            error=e,
+            parser=name,
+            duration=time.perf_counter() - started,
+        )
+    duration = time.perf_counter() - started
+    return SourceVersion(
+        file_path,
+        relative_path,
+        version=version,
+        parser=name,
+        duration=duration,
+        span=version_span(file_path, version) if spans and version else None,
+    )
+
+
+# Files and directories modified this recently are not cached: a second write
+# within the same mtime tick would go unnoticed (git calls this "racy clean").
+_RACY_WINDOW_NS = 2_000_000_000
+
+
+def file_stamp(path: Path) -> tuple[int, int] | None:
+    """``(mtime_ns, size)`` of ``path``, or None when it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def stamps_settled(stamps: list[tuple[int, int] | None]) -> bool:
+    """True when nothing stamped was modified inside the racy window."""
+    newest_allowed = time.time_ns() - _RACY_WINDOW_NS
+    return all(stamp is None or stamp[0] < newest_allowed for stamp in stamps)
+
+
+class _Discovery:
+    """A cached file list and the directory mtimes that vouch for it."""
+
+    def __init__(
+        self,
+        spec: Any,
+        directories: list[tuple[Path, tuple[int, int] | None]],
+        files: list[Path],
+    ):
+        self.spec = spec
+        # (path relative to the root, stamp when listed)
+        self.directories = directories
+        self.files = files
+
+
+class ScanCache:
+    """
+    Scan results kept in memory between scans, checked against mtimes.
+
+    - Ignore specs, per project root, are rebuilt when any file they are
+      read from changes, appears or disappears.
+    - File lists, per root and ignore paths, are reused while every listed
+      directory keeps its mtime; adding, removing or renaming an entry
+      changes the mtime of the directory that holds it.
+    - Parse results, per file, are reused while its mtime and size hold.
+    """
+
+    def __init__(self) -> None:
+        self._specs: dict[Path, tuple[list[tuple[int, int] | None], Any]] = {}
+        self._discoveries: dict[tuple[Path, tuple[str, ...]], _Discovery] = {}
+        self._sources: dict[str, tuple[tuple[int, int], SourceVersion]] = {}
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._specs.clear()
+            self._discoveries.clear()
+            self._sources.clear()
+
+    def spec_for(self, project_root: Path, root_key: Path) -> Any:
+        """The compiled ignore spec for ``project_root``, rebuilt if stale."""
+        stamps = [file_stamp(path) for path in ignore_files(project_root)]
+        with self._lock:
+            cached = self._specs.get(root_key)
+        if cached is not None and cached[0] == stamps:
+            return cached[1]
+        spec = collect_default_spec(project_root)
+        if stamps_settled(stamps):
+            with self._lock:
+                self._specs[root_key] = (stamps, spec)
+        return spec
+
+    def find_files(
+        self,
+        project_root: Path,
+        ignore_paths: list[str] | None,
+        stats: DiscoveryStats,
+    ) -> list[Path]:
+        """:func:`find_source_files`, or the cached list when no directory changed."""
+        started = time.perf_counter()
+        root_key = project_root.resolve()
+        spec = self.spec_for(project_root, root_key)
+        key = (root_key, tuple(ignore_paths or ()))
+        with self._lock:
+            cached = self._discoveries.get(key)
+        if cached is not None and cached.spec is spec:
+            stats.stat_calls += len(cached.directories)
+            if all(
+                file_stamp(root_key / relative) == stamp
+                for relative, stamp in cached.directories
+            ):
+                LOGGER.debug("Reusing cached discovery for %s", root_key)
+                stats.seconds = time.perf_counter() - started
+                return [project_root / relative for relative in cached.files]
+
+        visited: list[Path] = []
+        files = find_source_files(
+            project_root, ignore_paths, stats=stats, spec=spec, visited=visited
+        )
+        directories = [
+            (directory.relative_to(project_root), file_stamp(directory))
+            for directory in visited
+        ]
+        if stamps_settled([stamp for _, stamp in directories]):
+            with self._lock:
+                self._discoveries[key] = _Discovery(
+                    spec,
+                    directories,
+                    [path.relative_to(project_root) for path in files],
+                )
+        return files
+
+    def source_for(
+        self, file_path: Path, project_root: Path, spans: bool = False
+    ) -> SourceVersion:
+        """:func:`parse_source`, or the cached result while the file is unchanged."""
+        key = os.path.abspath(file_path)
+        stamp = file_stamp(file_path)
+        with self._lock:
+            cached = self._sources.get(key)
+        if stamp is not None and cached is not None and cached[0] == stamp:
+            previous = cached[1]
+            if spans and previous.version and previous.span is None:
+                # Cached by a scan that did not need spans; locate it once now.
+                previous.span = version_span(file_path, previous.version)
+            hit = SourceVersion(
+                file_path,
+                file_path.relative_to(project_root),
+                version=previous.version,
+                error=previous.error,
+                parsed=previous.parsed,
+                parser=previous.parser,
+                span=previous.span,
+            )
+            hit.cache = "hit"
+            return hit
+        source = parse_source(file_path, project_root, spans)
+        if stamp is not None and stamps_settled([stamp]):
+            with self._lock:
+                self._sources[key] = (stamp, source)
+        return source
+
+
+_CACHE: ScanCache | None = None
+
+
+def set_scan_cache(cache: ScanCache | None) -> ScanCache | None:
+    """Makes :func:`scan_project` use ``cache`` (None: no caching); returns the old one."""
+    global _CACHE
+    previous, _CACHE = _CACHE, cache
+    return previous
+
+
+def scan_project(
+    project_root: Path, ignore_paths: list[str] | None = None, spans: bool = False
+) -> ScanResult:
+    """
+    Discovers and parses every version source under ``project_root``, once.
+
+    ``spans`` also locates each declaration, for ``--format ndjson``.
+
+    Raises:
+        Whatever discovery raises; parse failures are kept on the result.
+    """
+    cache = _CACHE
+    stats = DiscoveryStats()
+    with span("find_source_files", "discovery"):
+        if cache is None:
+            files = find_source_files(project_root, ignore_paths, stats=stats)
+        else:
+            files = cache.find_files(project_root, ignore_paths, stats)
+    result = ScanResult(project_root, files, stats)
+    LOGGER.debug("Discovered files: %s", [str(p) for p in result.files])
+    parse = parse_source if cache is None else cache.source_for
+    result.sources = [parse(path, project_root, spans) for path in result.files]
+    for name, value in result.counters.items():
+        count(name, value)
+    LOGGER.debug("Scan counters: %s", result.counters)
+    return result
@@ -4,8 +4,6 @@ Implements the version bumping logic for different versioning schemes.
 """
 from __future__ import annotations
 
-from packaging.version import InvalidVersion, Version
-
 
 def bump_pep440(version_string: str, increment: str) -> str:
     """
@@ -18,6 +16,9 @@ def bump_pep440(version_string: str, increment: str) -> str:
     Returns:
         The new version string.
     """
+    # Imported here so startup for commands that never bump stays light.
+    from packaging.version import InvalidVersion, Version
+
     try:
         v = Version(version_string)
         major, minor, patch = (
@@ -0,0 +1,320 @@
+# jiggle_version/staged.py
+"""
+``check --staged``: check what the next commit will contain, without a walk.
+
+As a pre-commit hook, ``check`` used to walk the whole repository even when
+the commit touches one file. With ``--staged`` every version source is judged
+by its content in the git index, never the worktree, so unstaged edits do not
+leak into the verdict:
+
+- One ``git diff --cached --name-only -z`` lists the staged paths. Those that
+  are version sources by the same rules the directory walk applies (see
+  :func:`~jiggle_version.discover.is_version_source`) join the source list.
+- One ``git ls-files -s -z`` gives the index blob id of every source. The
+  :class:`SourceIndex`, a small per-project file in the user cache directory,
+  records the blob id each source's version was parsed from; a source whose
+  blob id still matches is not read at all.
+- The others are read from the index with one ``git cat-file --batch`` and
+  parsed. Sources that are no longer in the index leave the list.
+
+The source list is built by a full scan the first time (when the cache is
+unreadable, or when an ignore file changed) and then kept current from the
+staged changes: staged additions join it. A staged deletion only stops the
+source from counting, since it can be undone; the source leaves the list once
+``HEAD`` drops it too. It is keyed to the ``HEAD`` tree id, so
+sources that arrive by a commit, merge, pull or checkout are seen too: when
+``HEAD`` moved, one ``git diff --name-only`` between the old and new tree
+lists the paths to check, and a full scan rebuilds the list when the old tree
+is gone.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import subprocess  # nosec
+import tempfile
+from pathlib import Path, PurePosixPath
+from typing import Any
+
+from . import git
+from .discover import (
+    DiscoveryStats,
+    IgnoreRules,
+    find_source_files,
+    is_version_source,
+    is_version_source_path,
+)
+from .gitignore import ignore_files
+from .pypi_cache import user_cache_dir
+from .scan import (
+    ScanResult,
+    SourceVersion,
+    file_stamp,
+    parse_source,
+    parser_for,
+    stamps_settled,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+# Bumped when the file layout changes; other formats are ignored and rebuilt.
+FORMAT = 3
+
+
+class SourceIndex:
+    """The last known version of every version source in one project."""
+
+    def __init__(
+        self,
+        path: Path,
+        entries: dict[str, dict[str, Any]],
+        tree: str | None = None,
+        ignores: list[list[int] | None] | None = None,
+    ):
+        self.path = path
+        # The HEAD tree id the source list is current for; None on an unborn branch.
+        self.tree = tree
+        # [mtime_ns, size] of every ignore file the list was filtered with, or
+        # None when they were too fresh to trust; a change means a new scan.
+        self.ignores = ignores
+        # relative posix path -> {"blob": index blob id | None, "version": ...,
+        # "parser": ..., "span": ...}; a None blob id means "not parsed yet".
+        # Entries not in the git index (a staged deletion) are kept but do not
+        # count, so undoing the deletion brings them back.
+        self.entries = entries
+        self.changed = False
+
+    @staticmethod
+    def path_for(project_root: Path, ignore_paths: list[str]) -> Path:
+        key = json.dumps([str(project_root.resolve()), sorted(ignore_paths)])
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        return user_cache_dir() / "sources" / f"{digest}.json"
+
+    @classmethod
+    def load(cls, path: Path) -> SourceIndex | None:
+        """The saved index, or None when there is none or it is unreadable."""
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            LOGGER.debug("Ignoring unreadable source index %s: %s", path, exc)
+            return None
+        if not isinstance(data, dict) or data.get("format") != FORMAT:
+            return None
+        return cls(
+            path,
+            dict(data.get("sources", {})),
+            tree=data.get("tree"),
+            ignores=data.get("ignores"),
+        )
+
+    @classmethod
+    def from_files(
+        cls,
+        path: Path,
+        project_root: Path,
+        files: list[Path],
+        previous: SourceIndex | None = None,
+    ) -> SourceIndex:
+        """
+        A new index listing ``files``. Entries of ``previous`` are kept for the
+        files it already knew, so their blobs are not read again if unchanged.
+        """
+        known = previous.entries if previous is not None else {}
+        index = cls(path, {})
+        for file_path in files:
+            relative = file_path.relative_to(project_root).as_posix()
+            index.entries[relative] = known.get(relative, {"blob": None})
+        index.changed = True
+        return index
+
+    def add(self, relative: str) -> None:
+        """Lists a new source; it is read from the index on this scan."""
+        self.entries.setdefault(relative, {"blob": None})
+        self.changed = True
+
+    def record(self, relative: str, blob_id: str, source: SourceVersion) -> None:
+        """Remembers what the index blob ``blob_id`` of ``relative`` declares."""
+        self.entries[relative] = {
+            "blob": blob_id,
+            "version": source.version,
+            "parser": source.parser,
+            "span": source.span,
+        }
+        self.changed = True
+
+    def cached(self, project_root: Path, relative: str) -> SourceVersion:
+        entry = self.entries[relative]
+        source = SourceVersion(
+            project_root / relative,
+            Path(relative),
+            version=entry.get("version"),
+            parser=entry.get("parser"),
+            parsed=entry.get("parser") is not None,
+            span=entry.get("span"),
+        )
+        source.cache = "hit"
+        return source
+
+    def forget(self, relative: str) -> None:
+        if self.entries.pop(relative, None) is not None:
+            self.changed = True
+
+    def save(self) -> None:
+        """Atomically writes the index. Failures are logged, never raised."""
+        data = {
+            "format": FORMAT,
+            "tree": self.tree,
+            "ignores": self.ignores,
+            "sources": self.entries,
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp_name = tempfile.mkstemp(
+                prefix=f".{self.path.name}.", suffix=".tmp", dir=self.path.parent
+            )
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                    json.dump(data, handle)
+                os.replace(temp_name, self.path)
+            except BaseException:
+                Path(temp_name).unlink(missing_ok=True)
+                raise
+        except OSError as exc:
+            LOGGER.warning("Could not write source index %s: %s", self.path, exc)
+            return
+        self.changed = False
+
+
+def parse_blob(
+    project_root: Path, relative: str, content: bytes, spans: bool = False
+) -> SourceVersion:
+    """Parses staged content as if it were the file at ``relative``."""
+    path = project_root / relative
+    parser_func = parser_for(path)
+    if parser_func is None:
+        return SourceVersion(path, Path(relative), parsed=False)
+    with tempfile.TemporaryDirectory(prefix="jiggle_version-") as temp_dir:
+        staged_copy = Path(temp_dir) / path.name
+        staged_copy.write_bytes(content)
+        source = parse_source(staged_copy, Path(temp_dir), spans)
+    return SourceVersion(
+        path,
+        Path(relative),
+        version=source.version,
+        error=source.error,
+        parser=source.parser,
+        duration=source.duration,
+        span=source.span,
+    )
+
+
+def scan_staged(
+    project_root: Path, ignore_paths: list[str] | None = None, spans: bool = False
+) -> ScanResult:
+    """
+    The version sources as the next commit would have them.
+
+    ``spans`` also locates each declaration, for ``--format ndjson``.
+
+    Raises:
+        RuntimeError: When ``project_root`` is not inside a git work tree.
+    """
+    ignore_paths = list(ignore_paths or [])
+    try:
+        staged = git.get_staged_files(project_root)
+    except subprocess.CalledProcessError as exc:
+        stderr = (exc.stderr or b"").decode("utf-8", errors="replace").strip()
+        message = stderr.splitlines()[0] if stderr else f"git exited {exc.returncode}"
+        raise RuntimeError(f"--staged needs a git work tree ({message})") from exc
+
+    head_tree = git.get_head_tree(project_root)
+    stamps = [file_stamp(path) for path in ignore_files(project_root)]
+    ignores = [list(stamp) if stamp else None for stamp in stamps]
+    index_path = SourceIndex.path_for(project_root, ignore_paths)
+    previous = SourceIndex.load(index_path)
+    stats = DiscoveryStats()
+    changed = list(staged)
+    # Paths HEAD's tree changed since the list was current (deletions included).
+    committed: set[str] = set()
+    index = None
+    # Changed ignore files can drop listed sources or bring back unlisted ones,
+    # so, like a missing index, they mean a new scan.
+    if previous is not None and previous.ignores == ignores:
+        if previous.tree == head_tree:
+            index = previous
+        elif previous.tree and head_tree:
+            # HEAD moved (commit, merge, pull, checkout): sources may have
+            # arrived without being staged here. The tree diff says which
+            # paths to check.
+            try:
+                committed.update(
+                    git.get_changed_files(project_root, previous.tree, head_tree)
+                )
+                changed += sorted(committed)
+                index = previous
+            except subprocess.CalledProcessError as exc:
+                LOGGER.debug("Cannot diff against %s: %s", previous.tree, exc)
+    if index is None:
+        LOGGER.info("Scanning %s for version sources", project_root)
+        files = find_source_files(project_root, ignore_paths, stats=stats)
+        index = SourceIndex.from_files(index_path, project_root, files, previous)
+    settled_ignores = ignores if stamps_settled(stamps) else None
+    if index.tree != head_tree or index.ignores != settled_ignores:
+        index.tree = head_tree
+        index.ignores = settled_ignores
+        index.changed = True
+
+    # The naming rule is free; the ignore rules are only built when it passes.
+    candidates = [
+        relative
+        for relative in dict.fromkeys(changed)
+        if is_version_source_path(PurePosixPath(relative))
+        and relative not in index.entries
+    ]
+    if candidates:
+        rules = IgnoreRules(project_root, ignore_paths, stats=stats)
+        for relative in candidates:
+            if is_version_source(PurePosixPath(relative), rules):
+                index.add(relative)
+    LOGGER.debug("Version sources: %s", sorted(index.entries))
+
+    blob_ids = git.read_index_blob_ids(project_root, sorted(index.entries))
+    stale = [
+        relative
+        for relative, blob_id in blob_ids.items()
+        if index.entries[relative].get("blob") != blob_id
+        # Parsed by a run that did not need spans: read once more to locate it.
+        or (
+            spans
+            and index.entries[relative].get("version")
+            and index.entries[relative].get("span") is None
+        )
+    ]
+    blobs = git.read_index_blobs(project_root, stale)
+
+    sources: list[SourceVersion] = []
+    for relative in sorted(index.entries):
+        blob_id = blob_ids.get(relative)
+        content = blobs.get(relative)
+        if blob_id is None or (relative in blobs and content is None):
+            # Not in the index (deleted, or never added): not in the commit.
+            # Unless HEAD dropped it too, the deletion can still be undone.
+            if relative in committed:
+                index.forget(relative)
+            continue
+        if content is None:
+            sources.append(index.cached(project_root, relative))
+            continue
+        source = parse_blob(project_root, relative, content, spans)
+        index.record(relative, blob_id, source)
+        sources.append(source)
+
+    if index.changed:
+        index.save()
+    result = ScanResult(project_root, [source.path for source in sources], stats)
+    result.sources = sources
+    return result
@@ -0,0 +1,240 @@
+# jiggle_version/transaction.py
+"""
+All-or-nothing writes across several files.
+
+A bump touches pyproject.toml, setup.cfg, setup.py and any number of module
+files. Writing them one after another leaves a half-bumped tree behind if the
+third write fails. :class:`WriteTransaction` stages every new file content in
+memory first and then commits in phases:
+
+1. write each new content to a temp file in the target's own directory,
+2. fsync all temp files in one pass,
+3. ``os.replace`` each temp file over its target,
+4. fsync the touched directories once each.
+
+Steps 1 and 2 run on a thread pool when ``max_workers`` allows it; the rename
+step stays sequential so rollback always knows exactly which targets were
+replaced. If anything fails before step 3 completes, targets that were already
+replaced get their original bytes back (files the transaction created are
+removed) and leftover temp files are removed. That includes KeyboardInterrupt
+and SystemExit, which are re-raised unchanged once the tree is restored.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, TypeVar
+
+from jiggle_version.instrument import span
+
+LOGGER = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def default_worker_count() -> int:
+    """Thread count used when the caller asks for "auto" (same rule as ThreadPoolExecutor)."""
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def map_concurrently(
+    func: Callable[[T], R], items: Iterable[T], max_workers: int = 1
+) -> list[R]:
+    """``list(map(func, items))``, on a thread pool when ``max_workers > 1``.
+
+    Results keep input order. The first exception raised by ``func`` is
+    re-raised after all submitted work has finished.
+    """
+    items = list(items)
+    if max_workers <= 1 or len(items) < 2:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(func, items))
+
+
+class TransactionError(Exception):
+    """Raised when a transaction could not be committed; originals have been restored."""
+
+
+class _StagedWrite:
+    """One pending file replacement."""
+
+    def __init__(
+        self, path: Path, content: bytes, original: bytes | None, mode: int | None
+    ):
+        self.path = path
+        self.content = content
+        # None when the file does not exist yet.
+        self.original = original
+        self.mode = mode
+        self.temp_path: Path | None = None
+        self.replaced = False
+        self.elapsed = 0.0
+
+
+def _fsync_path(path: Path) -> None:
+    """fsync a file by path."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync_directory(path: Path) -> None:
+    """Best-effort fsync of a directory entry table (a no-op where unsupported)."""
+    if os.name == "nt":
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_temp(path: Path, content: bytes, mode: int | None) -> Path:
+    """Write ``content`` to a new temp file next to ``path`` and return its path."""
+    fd, temp_name = tempfile.mkstemp(
+        prefix=f".{path.name}.", suffix=".jvtmp", dir=path.parent
+    )
+    temp_path = Path(temp_name)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(content)
+        if mode is not None:
+            os.chmod(temp_path, mode)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    return temp_path
+
+
+class WriteTransaction:
+    """Stage new contents for many files and commit them atomically as a group.
+
+    Example:
+        ```python
+        txn = WriteTransaction()
+        txn.stage(Path("pyproject.toml"), new_bytes)
+        txn.commit()
+        ```
+    """
+
+    def __init__(self, fsync: bool = True, max_workers: int = 1):
+        self.fsync = fsync
+        self.max_workers = max_workers
+        self._staged: dict[Path, _StagedWrite] = {}
+        # Seconds spent writing and syncing each file, filled in by commit().
+        self.latencies: dict[Path, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._staged)
+
+    @property
+    def paths(self) -> list[Path]:
+        """Paths staged so far, in staging order."""
+        return list(self._staged)
+
+    def stage(self, path: Path, content: bytes) -> bool:
+        """Stage ``content`` for ``path``.
+
+        Returns False (and stages nothing) when the file already holds exactly
+        ``content``, so unchanged files are never rewritten. A missing file is
+        created on commit and removed again on rollback.
+        """
+        try:
+            original: bytes | None = path.read_bytes()
+        except FileNotFoundError:
+            original = None
+        if original == content:
+            LOGGER.debug("Skipping unchanged file: %s", path)
+            return False
+        try:
+            mode: int | None = path.stat().st_mode & 0o7777
+        except OSError:
+            mode = None
+        self._staged[path] = _StagedWrite(path, content, original, mode)
+        return True
+
+    def commit(self) -> None:
+        """Write all staged files, or none of them.
+
+        Raises:
+            TransactionError: if any phase fails. Originals are restored first.
+        """
+        staged = list(self._staged.values())
+        if not staged:
+            return
+        with span("commit", "write", files=len(staged)):
+            self._commit(staged)
+        self._staged.clear()
+
+    def _commit(self, staged: list[_StagedWrite]) -> None:
+        try:
+            map_concurrently(self._write_phase, staged, self.max_workers)
+            if self.fsync:
+                map_concurrently(self._fsync_phase, staged, self.max_workers)
+            for item in staged:
+                os.replace(item.temp_path, item.path)  # type: ignore[arg-type]
+                item.temp_path = None
+                item.replaced = True
+        except BaseException as exc:
+            LOGGER.error("Write transaction failed, rolling back: %r", exc)
+            failures = self._rollback(staged)
+            if not isinstance(exc, Exception):
+                # KeyboardInterrupt / SystemExit: the tree is restored, keep unwinding.
+                raise
+            message = f"Could not write {len(staged)} file(s): {exc}"
+            if failures:
+                message += f" (rollback also failed for: {', '.join(failures)})"
+            raise TransactionError(message) from exc
+
+        if self.fsync:
+            for directory in sorted({item.path.parent for item in staged}):
+                _fsync_directory(directory)
+        self.latencies = {item.path: item.elapsed for item in staged}
+
+    @staticmethod
+    def _write_phase(item: _StagedWrite) -> None:
+        """Write one temp file (runs on a worker thread)."""
+        started = time.perf_counter()
+        item.temp_path = _write_temp(item.path, item.content, item.mode)
+        item.elapsed += time.perf_counter() - started
+
+    @staticmethod
+    def _fsync_phase(item: _StagedWrite) -> None:
+        """fsync one temp file (runs on a worker thread)."""
+        started = time.perf_counter()
+        _fsync_path(item.temp_path)  # type: ignore[arg-type]
+        item.elapsed += time.perf_counter() - started
+
+    def _rollback(self, staged: list[_StagedWrite]) -> list[str]:
+        """Restore replaced files and remove temp files. Returns paths that could not be restored."""
+        failures: list[str] = []
+        for item in staged:
+            if item.temp_path is not None:
+                item.temp_path.unlink(missing_ok=True)
+                item.temp_path = None
+            if not item.replaced:
+                continue
+            try:
+                if item.original is None:
+                    item.path.unlink(missing_ok=True)
+                else:
+                    restore_path = _write_temp(item.path, item.original, item.mode)
+                    os.replace(restore_path, item.path)
+                item.replaced = False
+            except OSError as exc:
+                LOGGER.error("Could not restore %s: %s", item.path, exc)
+                failures.append(str(item.path))
+        return failures
@@ -1,23 +1,62 @@
 # jiggle_version/update.py
 """
 Logic for updating version strings in various source files.
+
+Each source type has a ``render_*`` function that computes the new file bytes
+without touching the disk (returning ``None`` when nothing would change) and an
+``update_*`` wrapper that writes the result. ``handle_bump`` uses the render
+functions so all writes can go through a single :class:`WriteTransaction`.
 """
 from __future__ import annotations
 
+import codecs
+import io
 import re
+import tokenize
 from pathlib import Path
 
-import tomlkit
+from jiggle_version.instrument import span
+from jiggle_version.parsers.ast_parser import find_version_spans
 
+# Fallback patterns for Python files that do not parse (e.g. newer syntax than
+# the running interpreter). They run on raw bytes, which is safe for every
+# ASCII-compatible source encoding since the keywords and versions are ASCII.
+#
+# Both patterns scan in linear time: leading indentation is limited to a single
+# line (`^\s*` let every blank line restart a scan over all following blank
+# lines), and the literal body is a bounded run of non-quote characters
+# instead of a lazy `.*?` plus backreference, so each candidate costs at most
+# _MAX_VERSION_LITERAL bytes however long the line is.
+_MAX_VERSION_LITERAL = 256
+_VERSION_LITERAL = (
+    rb"""(?:"(?P<dq>[^"\\\r\n]{0,%d})"|'(?P<sq>[^'\\\r\n]{0,%d})')"""
+    % (_MAX_VERSION_LITERAL, _MAX_VERSION_LITERAL)
+)
 _PYTHON_DUNDER_VERSION_RE = re.compile(
-    r"""(?m)^(\s*__version__\s*=\s*)(['"])(.*?)(\2)"""
+    rb"(?m)^[ \t]*__version__[ \t]*=[ \t]*" + _VERSION_LITERAL
 )
-_PYTHON_SETUP_VERSION_RE = re.compile(r"""(?<![\w.])(version\s*=\s*)(['"])(.*?)(\2)""")
+_PYTHON_SETUP_VERSION_RE = re.compile(rb"(?<![\w.])version\s*=\s*" + _VERSION_LITERAL)
 
 
-def update_pyproject_toml(file_path: Path, new_version: str) -> None:
-    """Updates the version in a pyproject.toml file using tomlkit to preserve formatting."""
-    doc = tomlkit.parse(file_path.read_text(encoding="utf-8"))
+def _decode_utf8(raw: bytes) -> tuple[str, bytes]:
+    """Split an optional UTF-8 BOM off ``raw`` and decode the rest without newline translation."""
+    if raw.startswith(codecs.BOM_UTF8):
+        return raw[len(codecs.BOM_UTF8) :].decode("utf-8"), codecs.BOM_UTF8
+    return raw.decode("utf-8"), b""
+
+
+def _changed(raw: bytes, new_raw: bytes) -> bytes | None:
+    """Return ``new_raw`` if it differs from ``raw``, otherwise ``None``."""
+    return new_raw if new_raw != raw else None
+
+
+def render_pyproject_toml(file_path: Path, new_version: str) -> bytes | None:
+    """Render pyproject.toml with the new version using tomlkit to preserve formatting."""
+    import tomlkit  # deferred: read-only commands never render TOML
+
+    raw = file_path.read_bytes()
+    text, bom = _decode_utf8(raw)
+    doc = tomlkit.parse(text)
 
     updated = False
     if "project" in doc and "version" in doc["project"]:  # type: ignore[operator]
@@ -27,13 +66,16 @@ def update_pyproject_toml(file_path: Path, new_version: str) -> None:
         doc["tool"]["setuptools"]["version"] = new_version  # type: ignore[index]
         updated = True
 
-    if updated:
-        file_path.write_text(tomlkit.dumps(doc), encoding="utf-8")
+    if not updated:
+        return None
+    return _changed(raw, bom + tomlkit.dumps(doc).encode("utf-8"))
 
 
-def update_setup_cfg(file_path: Path, new_version: str) -> None:
-    """Updates the version in the [metadata] section of setup.cfg."""
-    lines = file_path.read_text(encoding="utf-8").splitlines(keepends=True)
+def render_setup_cfg(file_path: Path, new_version: str) -> bytes | None:
+    """Render setup.cfg with the new version in its [metadata] section."""
+    raw = file_path.read_bytes()
+    text, bom = _decode_utf8(raw)
+    lines = text.splitlines(keepends=True)
 
     in_metadata = False
     updated = False
@@ -66,19 +108,154 @@ def update_setup_cfg(file_path: Path, new_version: str) -> None:
         updated = True
         break
 
-    if updated:
-        file_path.write_text("".join(lines), encoding="utf-8")
+    if not updated:
+        return None
+    return _changed(raw, bom + "".join(lines).encode("utf-8"))
 
 
-def update_python_file(file_path: Path, new_version: str) -> None:
-    """Updates the version in a Python file (`__version__` or `setup.py`) using regex."""
-    content = file_path.read_text(encoding="utf-8")
+def _replacement_literal(literal: bytes, new_version: str, encoding: str) -> bytes:
+    """Build a string literal for ``new_version`` that keeps the prefix and quote style of ``literal``."""
+    text = literal.decode(encoding)
+    body = text.lstrip("rRuU")
+    prefix = text[: len(text) - len(body)]
+    quote = body[:3] if body[:3] in ('"""', "'''") else body[:1]
+    if quote[:1] in new_version or "\\" in new_version or "\n" in new_version:
+        return repr(new_version).encode(encoding)
+    return f"{prefix}{quote}{new_version}{quote}".encode(encoding)
+
+
+def apply_edits(raw: bytes, edits: list[tuple[int, int, bytes]]) -> bytes:
+    """Apply sorted, non-overlapping ``(start, end, replacement)`` byte edits to ``raw``."""
+    pieces: list[bytes] = []
+    position = 0
+    for start, end, replacement in edits:
+        pieces.append(raw[position:start])
+        pieces.append(replacement)
+        position = end
+    pieces.append(raw[position:])
+    return b"".join(pieces)
+
+
+def splice_version_spans(
+    raw: bytes, spans: list[tuple[int, int]], new_version: str
+) -> list[tuple[int, int, bytes]]:
+    """Turn ``(start, end)`` string literal spans in ``raw`` into edits that set ``new_version``.
+
+    Only the bytes inside the spans change; encoding, BOM and line endings of
+    the rest of the file are kept exactly. Spans that already hold the new
+    version produce no edit.
+    """
+    encoding, _ = tokenize.detect_encoding(io.BytesIO(raw).readline)
+    if encoding == "utf-8-sig":
+        encoding = "utf-8"
+    edits: list[tuple[int, int, bytes]] = []
+    for start, end in spans:
+        replacement = _replacement_literal(raw[start:end], new_version, encoding)
+        if replacement != raw[start:end]:
+            edits.append((start, end, replacement))
+    return edits
+
+
+def _python_edits(
+    raw: bytes, new_version: str, filename: str
+) -> list[tuple[int, int, bytes]]:
+    """Edits that set the version in Python source ``raw``.
+
+    The version literals are located with the AST parser and only their bytes
+    are swapped. Files that do not parse fall back to a byte-level regex.
+    """
+    try:
+        spans = find_version_spans(raw, filename=filename)
+    except (SyntaxError, ValueError, RecursionError):
+        return _regex_python_edits(raw, new_version)
+    return splice_version_spans(raw, spans, new_version)
+
+
+def _regex_python_edits(raw: bytes, new_version: str) -> list[tuple[int, int, bytes]]:
+    """Regex fallback for Python sources the AST cannot parse."""
+    version = new_version.encode("ascii", errors="backslashreplace")
+    edits = []
+    for pattern in (_PYTHON_DUNDER_VERSION_RE, _PYTHON_SETUP_VERSION_RE):
+        for match in pattern.finditer(raw):
+            group = "dq" if match.group("dq") is not None else "sq"
+            if match.group(group) != version:
+                edits.append((match.start(group), match.end(group), version))
+    return sorted(edits)
 
-    def replacer(match: re.Match[str]) -> str:
-        return f"{match.group(1)}{match.group(2)}{new_version}{match.group(2)}"
 
-    new_content, dunder_count = _PYTHON_DUNDER_VERSION_RE.subn(replacer, content)
-    new_content, setup_count = _PYTHON_SETUP_VERSION_RE.subn(replacer, new_content)
+def render_python_file(file_path: Path, new_version: str) -> bytes | None:
+    """Render a Python file (`__version__` or `setup.py`) with the new version."""
+    raw = file_path.read_bytes()
+    edits = _python_edits(raw, new_version, str(file_path))
+    if not edits:
+        return None
+    return apply_edits(raw, edits)
 
-    if dunder_count > 0 or setup_count > 0:
-        file_path.write_text(new_content, encoding="utf-8")
+
+def _trimmed_edit(raw: bytes, new_raw: bytes) -> list[tuple[int, int, bytes]]:
+    """Describe the difference between two contents as a single edit (common prefix/suffix removed)."""
+    if raw == new_raw:
+        return []
+    limit = min(len(raw), len(new_raw))
+    prefix = 0
+    while prefix < limit and raw[prefix] == new_raw[prefix]:
+        prefix += 1
+    suffix = 0
+    while (
+        suffix < limit - prefix
+        and raw[len(raw) - 1 - suffix] == new_raw[len(new_raw) - 1 - suffix]
+    ):
+        suffix += 1
+    return [(prefix, len(raw) - suffix, new_raw[prefix : len(new_raw) - suffix])]
+
+
+def locate_edits(
+    file_path: Path, new_version: str
+) -> tuple[bytes, list[tuple[int, int, bytes]]]:
+    """Return a source's current bytes and the byte edits that would set ``new_version``.
+
+    Nothing is written. Python sources yield one edit per version literal;
+    pyproject.toml and setup.cfg yield the single region their renderer changes.
+    """
+    if file_path.name in RENDERERS and file_path.name != "setup.py":
+        raw = file_path.read_bytes()
+        new_raw = RENDERERS[file_path.name](file_path, new_version)
+        return raw, [] if new_raw is None else _trimmed_edit(raw, new_raw)
+    raw = file_path.read_bytes()
+    return raw, _python_edits(raw, new_version, str(file_path))
+
+
+# Specialized renderers by file name; every other file is a Python source.
+RENDERERS = {
+    "pyproject.toml": render_pyproject_toml,
+    "setup.cfg": render_setup_cfg,
+    "setup.py": render_python_file,
+}
+
+
+def render_file(file_path: Path, new_version: str) -> bytes | None:
+    """Render any discovered version source with the new version."""
+    renderer = RENDERERS.get(file_path.name, render_python_file)
+    with span(renderer.__name__, "write", path=file_path.name):
+        return renderer(file_path, new_version)
+
+
+def _write_rendered(file_path: Path, rendered: bytes | None) -> None:
+    """Write rendered bytes to ``file_path`` when there is something to write."""
+    if rendered is not None:
+        file_path.write_bytes(rendered)
+
+
+def update_pyproject_toml(file_path: Path, new_version: str) -> None:
+    """Updates the version in a pyproject.toml file using tomlkit to preserve formatting."""
+    _write_rendered(file_path, render_pyproject_toml(file_path, new_version))
+
+
+def update_setup_cfg(file_path: Path, new_version: str) -> None:
+    """Updates the version in the [metadata] section of setup.cfg."""
+    _write_rendered(file_path, render_setup_cfg(file_path, new_version))
+
+
+def update_python_file(file_path: Path, new_version: str) -> None:
+    """Updates the version in a Python file (`__version__` or `setup.py`) in place."""
+    _write_rendered(file_path, render_python_file(file_path, new_version))
@@ -28,7 +28,6 @@ from __future__ import annotations
 
 import argparse
 import sys
-from difflib import get_close_matches
 
 
 class SmartParser(argparse.ArgumentParser):
@@ -77,6 +76,8 @@ class SmartParser(argparse.ArgumentParser):
         """
         # Detect "invalid choice: 'foo' (choose from ...)"
         if "invalid choice" in message and "choose from" in message:
+            from difflib import get_close_matches
+
             bad = message.split("invalid choice:")[1].split("(")[0].strip().strip("'\"")
             choices_str = message.split("choose from")[1]
             choices = [
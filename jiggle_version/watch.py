@@ -0,0 +1,115 @@
+# jiggle_version/watch.py
+"""
+``check --watch``: re-check agreement as version sources change.
+
+After the initial scan, only the discovered version sources are watched; the
+project is never walked again. Each poll is one ``stat`` per source, which
+for the handful of files a project declares its version in costs
+microseconds, so plain mtime polling is used rather than a platform file
+notification API.
+
+A change is acted on once the file's ``(mtime, size)`` has held still for the
+debounce period, so an editor's truncate-then-write or a formatter's rewrite
+is read once, after it finishes. Only the changed files are parsed again.
+
+Files created after the scan are not picked up; restart the watch (or run
+``check``) after adding a version source.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from pathlib import Path
+from typing import Callable
+
+from .scan import ScanResult, SourceVersion, file_stamp, parse_source
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 0.5
+DEFAULT_DEBOUNCE = 0.25
+
+
+class SourceWatcher:
+    """Polls a scan's version sources and re-parses the ones that change."""
+
+    def __init__(
+        self,
+        scan: ScanResult,
+        interval: float = DEFAULT_INTERVAL,
+        debounce: float = DEFAULT_DEBOUNCE,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+        spans: bool = False,
+    ):
+        self.scan = scan
+        # Locate each re-parsed declaration too (``--format ndjson``).
+        self.spans = spans
+        self.interval = interval
+        self.debounce = debounce
+        self._sleep = sleep
+        self._clock = clock
+        self.stamps = {
+            source.path: file_stamp(source.path)
+            for source in scan.sources
+            if source.parsed
+        }
+        # Changed paths waiting for their stamp to hold still: path -> (stamp, since)
+        self._pending: dict[Path, tuple[tuple[int, int] | None, float]] = {}
+
+    def poll(self) -> list[Path]:
+        """
+        One round of stats.
+
+        Returns:
+            The sources whose change has settled for the debounce period, in
+            scan order. Their new stamps are recorded.
+        """
+        now = self._clock()
+        settled = []
+        for path, known in self.stamps.items():
+            current = file_stamp(path)
+            if current == known:
+                self._pending.pop(path, None)
+                continue
+            pending = self._pending.get(path)
+            if pending is None or pending[0] != current:
+                self._pending[path] = (current, now)
+            elif now - pending[1] >= self.debounce:
+                del self._pending[path]
+                self.stamps[path] = current
+                settled.append(path)
+        return settled
+
+    def refresh(self, paths: list[Path]) -> list[SourceVersion]:
+        """Re-parses ``paths`` and swaps the results into the scan."""
+        changed = []
+        for index, source in enumerate(self.scan.sources):
+            if source.path in paths:
+                updated = parse_source(source.path, self.scan.project_root, self.spans)
+                self.scan.sources[index] = updated
+                changed.append(updated)
+        return changed
+
+    def watch(
+        self,
+        on_change: Callable[[list[SourceVersion], list[SourceVersion]], None],
+        rounds: int | None = None,
+    ) -> None:
+        """
+        Polls until interrupted (or for ``rounds`` polls), calling
+        ``on_change(before, after)`` with the sources that changed.
+        """
+        while rounds is None or rounds > 0:
+            if rounds is not None:
+                rounds -= 1
+            settled = self.poll()
+            if settled:
+                before = [s for s in self.scan.sources if s.path in settled]
+                after = self.refresh(settled)
+                LOGGER.debug("Re-parsed %s", [str(s.relative_path) for s in after])
+                on_change(before, after)
+            # Poll faster while a change is settling, so the debounce is honored.
+            self._sleep(
+                min(self.interval, self.debounce) if self._pending else self.interval
+            )
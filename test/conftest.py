@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Iterator
+
+import pytest
+
+from jiggle_version import pypi, pypi_cache, pypi_index
+
+
+class StandInIndex:
+    """A tiny local package index so tests never touch pypi.org.
+
+    Responses are queued per path; the last queued response for a path repeats.
+    Every request is recorded as ``(path, headers, client_port)``.
+    """
+
+    def __init__(self) -> None:
+        self.routes: dict[str, list[tuple[int, dict[str, str], bytes, float]]] = {}
+        self.requests: list[tuple[str, dict[str, str], int]] = []
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add(
+        self,
+        path: str,
+        status: int = 200,
+        body: Any = b"",
+        headers: dict[str, str] | None = None,
+        delay: float = 0.0,
+    ) -> None:
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode("utf-8")
+        with self.lock:
+            self.routes.setdefault(path, []).append(
+                (status, dict(headers or {}), body, delay)
+            )
+
+    def paths(self) -> list[str]:
+        return [path for path, _, _ in self.requests]
+
+    def _next_response(self, path: str) -> tuple[int, dict[str, str], bytes, float]:
+        with self.lock:
+            queue = self.routes.get(path)
+            if not queue:
+                return 404, {}, b"not found", 0.0
+            return queue.pop(0) if len(queue) > 1 else queue[0]
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        index = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out as separate writes; without this, keep-alive
+            # requests stall on Nagle + delayed ACK and timings become noise.
+            disable_nagle_algorithm = True
+
+            def do_GET(self) -> None:
+                path = self.path.split("?", 1)[0]
+                with index.lock:
+                    index.requests.append(
+                        (path, dict(self.headers.items()), self.client_address[1])
+                    )
+                status, headers, body, delay = index._next_response(path)
+                if delay:
+                    time.sleep(delay)
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                if "Content-Type" not in headers:
+                    self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
+
+
+@pytest.fixture(autouse=True)
+def user_cache_dir(tmp_path_factory, monkeypatch: pytest.MonkeyPatch):
+    """Keep every test's PyPI cache out of the real user cache directory."""
+    directory = tmp_path_factory.mktemp("user-cache")
+    monkeypatch.setenv(pypi_cache.CACHE_DIR_ENV, str(directory))
+    return directory
+
+
+@pytest.fixture
+def pypi_server(monkeypatch: pytest.MonkeyPatch) -> Iterator[StandInIndex]:
+    """Serve a stand-in index on localhost and point the PyPI client at it."""
+    index = StandInIndex()
+    index.thread.start()
+    for name in ("HTTP_PROXY", "HTTPS_PROXY", "http_proxy", "https_proxy", "ALL_PROXY"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setitem(pypi_index.DEFAULT_INDEX_URLS, "json", index.url + "/pypi")
+    monkeypatch.setitem(pypi_index.DEFAULT_INDEX_URLS, "simple", index.url + "/simple")
+    pypi.reset_session()
+    try:
+        yield index
+    finally:
+        pypi.reset_session()
+        index.server.shutdown()
+        index.server.server_close()
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import contextlib
+import socket
+import threading
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from jiggle_version import daemon
+from jiggle_version.__main__ import main, scan_command_line
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX"), reason="needs Unix domain sockets"
+)
+
+
+def make_project(root: Path, version: str = "0.1.0") -> Path:
+    (root / "pyproject.toml").write_text(
+        f'[project]\nname = "demo"\nversion = "{version}"\n', encoding="utf-8"
+    )
+    return root
+
+
+@pytest.fixture
+def running_daemon(tmp_path: Path):
+    socket_path = tmp_path / "jv.sock"
+    server = daemon.Daemon(
+        socket_path,
+        run=lambda argv: main(argv, use_daemon=False),
+        accepts=lambda argv: scan_command_line(argv)[0] in daemon.DAEMON_COMMANDS,
+    )
+    ready = threading.Event()
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"ready": ready.set}, daemon=True
+    )
+    thread.start()
+    assert ready.wait(5)
+    try:
+        yield server
+    finally:
+        daemon.send_op("stop", socket_path)
+        thread.join(5)
+
+
+def test_daemon_answers_check_and_replays_output(
+    running_daemon: daemon.Daemon, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+):
+    root = make_project(tmp_path)
+
+    rc = daemon.run_remote(
+        ["--project-root", str(root), "print"], running_daemon.socket_path
+    )
+
+    assert rc == 0
+    assert capsys.readouterr().out == "0.1.0\n"
+    assert running_daemon.requests == 1
+
+
+def test_daemon_declines_other_commands(running_daemon: daemon.Daemon, tmp_path: Path):
+    rc = daemon.run_remote(
+        ["--project-root", str(tmp_path), "bump"], running_daemon.socket_path
+    )
+
+    assert rc is None
+    assert running_daemon.requests == 0
+
+
+def test_stop_removes_the_socket(tmp_path: Path):
+    socket_path = tmp_path / "jv.sock"
+    server = daemon.Daemon(socket_path, run=lambda argv: 0)
+    ready = threading.Event()
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"ready": ready.set}, daemon=True
+    )
+    thread.start()
+    assert ready.wait(5)
+
+    assert daemon.send_op("ping", socket_path)
+    assert daemon.send_op("stop", socket_path)
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert not socket_path.exists()
+    assert daemon.run_remote(["check"], socket_path) is None
+
+
+@contextlib.contextmanager
+def serving(server: daemon.Daemon) -> Iterator[daemon.Daemon]:
+    ready = threading.Event()
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"ready": ready.set}, daemon=True
+    )
+    thread.start()
+    assert ready.wait(5)
+    try:
+        yield server
+    finally:
+        daemon.send_op("stop", server.socket_path)
+        thread.join(5)
+
+
+@pytest.mark.parametrize(
+    "handshake", [{"version": "0.0.1"}, {"prefix": "/some/other/venv"}]
+)
+def test_daemon_declines_another_version_or_environment(
+    tmp_path: Path, handshake: dict[str, str]
+):
+    server = daemon.Daemon(tmp_path / "jv.sock", run=lambda argv: 0, **handshake)
+
+    with serving(server):
+        rc = daemon.run_remote(["print"], server.socket_path)
+
+    assert rc is None
+    assert server.requests == 0
+    assert server.handle({"argv": ["print"]})["declined"] is True
+
+
+def test_command_failures_are_the_commands_exit_code_not_a_bad_request(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+):
+    def run(argv: list[str]) -> int:
+        print("partial output")
+        raise KeyError("missing")
+
+    server = daemon.Daemon(tmp_path / "jv.sock", run=run)
+
+    with serving(server):
+        rc = daemon.run_remote(["print"], server.socket_path)
+
+    captured = capsys.readouterr()
+    assert rc == 1
+    assert captured.out == "partial output\n"
+    assert "Traceback" in captured.err
+    assert "KeyError: 'missing'" in captured.err
+    assert "bad request" not in captured.err
+
+
+def test_malformed_requests_are_still_bad_requests(tmp_path: Path):
+    server = daemon.Daemon(tmp_path / "jv.sock", run=lambda argv: 0)
+
+    with serving(server):
+        reply = daemon._exchange(server.socket_path, {"cwd": "/"}, 5.0)
+
+    assert reply["ok"] is False
+    assert reply["error"].startswith("bad request")
+    assert server.requests == 0
+
+
+def test_daemon_declines_a_client_with_a_different_environment(tmp_path: Path):
+    server = daemon.Daemon(tmp_path / "jv.sock", run=lambda argv: 0)
+    request = {
+        "argv": ["print"],
+        "version": server.version,
+        "prefix": server.prefix,
+        "env": {**daemon.relevant_environment(), "JIGGLE_VERSION_CACHE_DIR": "/x"},
+    }
+
+    reply = server.handle(request)
+
+    assert reply["declined"] is True
+    assert "JIGGLE_VERSION_CACHE_DIR" in reply["reason"]
+    assert server.requests == 0
+    request["env"] = daemon.relevant_environment()
+    assert server.handle(request)["exit_code"] == 0
+
+
+def test_only_check_and_print_look_for_a_daemon(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    asked: list[list[str]] = []
+    monkeypatch.setattr(
+        daemon, "run_remote", lambda argv: asked.append(list(argv)) or None
+    )
+    root = make_project(tmp_path)
+
+    main(["--project-root", str(root), "bump", "--dry-run", "--no-check-pypi"])
+    main(["--project-root", str(root), "print"])
+
+    assert asked == [["--project-root", str(root), "print"]]
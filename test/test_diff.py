@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import difflib
+
+import pytest
+
+from jiggle_version.diff import unified_diff_from_edits
+from jiggle_version.update import apply_edits
+
+
+def difflib_reference(old: bytes, new: bytes) -> list[str]:
+    return list(
+        difflib.unified_diff(
+            old.decode().splitlines(keepends=True),
+            new.decode().splitlines(keepends=True),
+            "a/f",
+            "b/f",
+        )
+    )
+
+
+def edit_for(old: bytes, needle: bytes, replacement: bytes, nth: int = 0):
+    start = -1
+    for _ in range(nth + 1):
+        start = old.index(needle, start + 1)
+    return (start, start + len(needle), replacement)
+
+
+SOURCE = b"".join(f"line {i}\n".encode() for i in range(40))
+
+
+@pytest.mark.parametrize(
+    "edits",
+    [
+        [edit_for(SOURCE, b"line 0", b"first")],
+        [edit_for(SOURCE, b"line 39", b"last")],
+        [edit_for(SOURCE, b"line 10", b"ten"), edit_for(SOURCE, b"line 14", b"14")],
+        [edit_for(SOURCE, b"line 5", b"five"), edit_for(SOURCE, b"line 30", b"x")],
+        [edit_for(SOURCE, b"line 7\n", b"seven\nand a half\n")],
+        [edit_for(SOURCE, b"line 20\nline 21\n", b"")],
+        [edit_for(SOURCE, b"line 10", b"ten"), edit_for(SOURCE, b"line 11", b"11")],
+        [
+            edit_for(SOURCE, b"line 25", b"a"),
+            edit_for(SOURCE, b"line 26", b"b\nc"),
+            edit_for(SOURCE, b"line 27", b"d"),
+        ],
+    ],
+)
+def test_matches_difflib_output(edits):
+    new = apply_edits(SOURCE, edits)
+
+    assert list(unified_diff_from_edits(SOURCE, edits, "a/f", "b/f")) == (
+        difflib_reference(SOURCE, new)
+    )
+
+
+def test_two_edits_on_one_line_form_one_change():
+    old = b'setup(version="1", other_version="1")\n'
+    edits = [(14, 17, b'"2"'), (33, 36, b'"2"')]
+
+    diff = list(unified_diff_from_edits(old, edits, "a/f", "b/f"))
+
+    assert diff[2:] == [
+        "@@ -1 +1 @@\n",
+        '-setup(version="1", other_version="1")\n',
+        '+setup(version="2", other_version="2")\n',
+    ]
+
+
+def test_marks_missing_trailing_newline_and_strips_crlf():
+    old = b'a\r\n__version__ = "1"'
+    edits = [edit_for(old, b'"1"', b'"2"')]
+
+    diff = list(unified_diff_from_edits(old, edits, "a/f", "b/f"))
+
+    assert diff[2:] == [
+        "@@ -1,2 +1,2 @@\n",
+        " a\n",
+        '-__version__ = "1"\n',
+        "\\ No newline at end of file\n",
+        '+__version__ = "2"\n',
+        "\\ No newline at end of file\n",
+    ]
+
+
+def test_no_edits_yields_nothing():
+    assert list(unified_diff_from_edits(SOURCE, [], "a/f", "b/f")) == []
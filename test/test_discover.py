@@ -1,9 +1,15 @@
 # tests/test_discover_integration.py
 from __future__ import annotations
 
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 
-from jiggle_version.discover import find_source_files
+from jiggle_version.discover import (
+    DiscoveryStats,
+    IgnoreRules,
+    find_project_files,
+    find_source_files,
+    is_version_source,
+)
 
 
 def write(p: Path, text: str = "") -> Path:
@@ -104,3 +110,102 @@ def test_skips_venv_roots(tmp_path: Path):
     assert "pyproject.toml" in names
     assert not any(".blerg" in n for n in names), f"venv files leaked: {names}"
     assert not any(".venv" in n for n in names), f"venv files leaked: {names}"
+
+
+def test_discovery_stats_count_each_kind_of_pruning(tmp_path: Path):
+    root = tmp_path
+    write(root / ".gitignore", "build/\n")
+    write(root / "pyproject.toml", '[project]\nversion = "0.1.0"\n')
+    write(root / "pkg" / "_version.py", "__version__='0.1.0'")
+    write(root / "build" / "_version.py", "__version__='bad'")
+    write(root / "vendored" / "_version.py", "__version__='bad'")
+    write(root / "node_modules" / "x.js")
+    write(root / "env" / "pyvenv.cfg", "home = /usr\n")
+    stats = DiscoveryStats()
+
+    files = find_source_files(root, ignore_paths=["vendored"], stats=stats)
+
+    assert {p.relative_to(root).as_posix() for p in files} == {
+        "pyproject.toml",
+        "pkg/_version.py",
+    }
+    # root, pkg and build: "build/" only matches the files inside it, so the
+    # walk still lists the directory. The other pruned ones are never listed.
+    assert stats.directories_listed == 3
+    assert stats.pruned_default == 1
+    assert stats.pruned_gitignore == 1
+    assert stats.pruned_explicit == 1
+    assert stats.venv_roots_skipped == 1
+    # 7 entries at the root, plus one _version.py each in pkg and build
+    assert stats.entries_examined == 9
+    assert stats.stat_calls > 0
+    assert stats.seconds > 0
+
+
+def test_find_project_files_walks_like_source_discovery(tmp_path: Path):
+    root = tmp_path
+    write(root / ".gitignore", "build/\n")
+    write(root / "pyproject.toml")
+    write(root / "packages" / "a" / "pyproject.toml")
+    write(root / "packages" / "b" / "pyproject.toml")
+    write(root / "build" / "pyproject.toml")
+    write(root / "vendored" / "pyproject.toml")
+    write(root / "env" / "pyvenv.cfg")
+    write(root / "env" / "lib" / "pyproject.toml")
+    write(root / "node_modules" / "x" / "pyproject.toml")
+
+    files = find_project_files(root, ignore_paths=["vendored"])
+
+    assert [p.relative_to(root).as_posix() for p in files] == [
+        "packages/a/pyproject.toml",
+        "packages/b/pyproject.toml",
+        "pyproject.toml",
+    ]
+
+
+def test_discovery_stats_are_counted_where_the_calls_happen(tmp_path: Path):
+    root = tmp_path
+    write(root / "pyproject.toml")
+    write(root / "pkg" / "_version.py")
+    write(root / "node_modules" / "x.js")
+    stats = DiscoveryStats()
+
+    find_source_files(root, stats=stats)
+
+    # The root once, then one resolve per entry past the default ignores:
+    # pyproject.toml, pkg and pkg/_version.py.
+    assert stats.path_resolutions == 4
+    # is_dir + is_file for those three, plus the pyvenv.cfg probe in pkg.
+    assert stats.stat_calls == 7
+
+
+def test_is_version_source_agrees_with_the_walk(tmp_path: Path):
+    root = tmp_path
+    write(root / ".gitignore", "build/\n")
+    candidates = [
+        "pyproject.toml",
+        "pkg/__init__.py",
+        "pkg/_version.py",
+        "pkg/sub/__init__.py",
+        "build/_version.py",
+        "vendored/_version.py",
+        "env/lib/_version.py",
+        ".tox/py311/_version.py",
+        "docs/conf.py",
+    ]
+    for relative in candidates:
+        write(root / relative)
+    write(root / "env" / "pyvenv.cfg")
+
+    walked = {
+        p.relative_to(root).as_posix()
+        for p in find_source_files(root, ignore_paths=["vendored"])
+    }
+    rules = IgnoreRules(root, ["vendored"])
+    decided = {
+        relative
+        for relative in candidates
+        if is_version_source(PurePosixPath(relative), rules)
+    }
+
+    assert decided == walked == {"pyproject.toml", "pkg/__init__.py", "pkg/_version.py"}
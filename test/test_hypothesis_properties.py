@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import shutil
 import textwrap
+import time
 from pathlib import Path
 from uuid import uuid4
 
@@ -12,7 +13,11 @@ from hypothesis import strategies as st
 from jiggle_version.parsers.ast_parser import parse_python_module, parse_setup_py
 from jiggle_version.parsers.config_parser import parse_setup_cfg
 from jiggle_version.schemes import bump_pep440, bump_semver
-from jiggle_version.update import update_python_file, update_setup_cfg
+from jiggle_version.update import (
+    render_python_file,
+    update_python_file,
+    update_setup_cfg,
+)
 
 IDENTIFIER = st.from_regex(r"[A-Za-z_][A-Za-z0-9_]{0,10}", fullmatch=True)
 NON_VERSION_IDENTIFIER = IDENTIFIER.filter(
@@ -28,6 +33,39 @@ SAFE_CFG_TEXT = st.text(
     min_size=0,
     max_size=30,
 )
+# Worst-case inputs for the Python updater. Each entry ends with a real
+# `__version__ = "0.1.0"` so correctness is checked alongside speed. Files with
+# an unterminated quote do not parse and exercise the regex fallback.
+ADVERSARIAL_CORPUS = {
+    "very_long_line": b"x = '" + b"a" * 4_000_000 + b"'\n",
+    "unterminated_quote_long_line": b'y = "' + b"b" * 4_000_000 + b"\n",
+    "unterminated_quote_blank_lines": b"z = '\n" + b"\n" * 300_000 + b"pass",
+    "unterminated_quote_indented_lines": b"z = '\n" + b"    \n" * 100_000 + b"pass",
+    "unrelated_version_kwargs": b"".join(
+        b"f(version='0.0.%d')\n" % i for i in range(20_000)
+    ),
+    "unrelated_version_kwargs_unparseable": b"(\n"
+    + b"".join(b"f(version='0.0.%d', x=\"\n" % i for i in range(20_000)),
+    "open_version_kwargs_one_line": b"g(" + b'version="1.0 version=\'' * 50_000,
+}
+# Generous enough for slow CI machines; the old `^\s*...(.*?)\2` patterns
+# needed minutes on the blank-line entries.
+ADVERSARIAL_BUDGET_SECONDS = 5.0
+ADVERSARIAL_FRAGMENT = st.sampled_from(
+    [
+        b"\n",
+        b"    \n",
+        b"x = '",
+        b'"',
+        b"version=",
+        b"version = '1",
+        b'version="2"',
+        b"f(version='3')\n",
+        b"__version__ = '",
+        b"#",
+        b"a" * 64,
+    ]
+)
 SCRATCH_ROOT = Path(__file__).resolve().parents[1] / "tmp_hypothesis_runtime"
 
 
@@ -169,3 +207,42 @@ def test_update_setup_cfg_only_updates_metadata_version(
         assert f"[tool:pytest]\nversion = {other_section_version}" in updated
     finally:
         cleanup_scratch_dir(scratch_dir)
+
+
+@pytest.mark.parametrize("name", sorted(ADVERSARIAL_CORPUS))
+def test_update_python_file_worst_case_corpus_stays_linear(name: str):
+    scratch_dir = make_scratch_dir()
+    try:
+        file_path = scratch_dir / "_version.py"
+        body = ADVERSARIAL_CORPUS[name]
+        file_path.write_bytes(body + b'\n__version__ = "0.1.0"\n')
+
+        started = time.perf_counter()
+        rendered = render_python_file(file_path, "0.2.0")
+        elapsed = time.perf_counter() - started
+
+        assert elapsed < ADVERSARIAL_BUDGET_SECONDS, f"{name} took {elapsed:.2f}s"
+        assert rendered is not None
+        assert rendered.endswith(b'\n__version__ = "0.2.0"\n')
+    finally:
+        cleanup_scratch_dir(scratch_dir)
+
+
+@given(fragments=st.lists(ADVERSARIAL_FRAGMENT, max_size=60), repeat=st.integers(1, 50))
+def test_update_python_file_only_rewrites_version_literals_in_noise(
+    fragments: list[bytes], repeat: int
+):
+    scratch_dir = make_scratch_dir()
+    try:
+        file_path = scratch_dir / "_version.py"
+        noise = b"".join(fragments) * repeat
+        file_path.write_bytes(b'__version__ = "0.1.0"\n' + noise)
+
+        rendered = render_python_file(file_path, "9.9.9")
+
+        # Whatever the noise, the leading declaration is updated and the
+        # bytes before it stay untouched.
+        assert rendered is not None
+        assert rendered.startswith(b'__version__ = "9.9.9"\n')
+    finally:
+        cleanup_scratch_dir(scratch_dir)
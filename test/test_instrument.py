@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from jiggle_version import instrument
+
+
+@pytest.fixture
+def recorder():
+    rec = instrument.enable()
+    try:
+        yield rec
+    finally:
+        instrument.disable()
+
+
+def test_span_is_a_shared_no_op_when_disabled():
+    assert instrument.active() is None
+    assert instrument.span("a", "parse") is instrument.span("b", "git")
+
+
+def test_nested_spans_of_one_phase_count_once(recorder: instrument.Recorder):
+    with instrument.span("lookup", "pypi"), instrument.span("fetch", "pypi"):
+        time.sleep(0.01)
+    with instrument.span("parse_setup_cfg", "parse"):
+        pass
+
+    totals = recorder.phase_totals()
+
+    assert totals["pypi"]["count"] == 1
+    assert totals["parse"]["count"] == 1
+    assert totals["git"]["count"] == 0
+    fetch = next(span for span in recorder.spans if span.name == "fetch")
+    assert fetch.nested
+    assert totals["pypi"]["seconds"] >= fetch.duration
+
+
+def test_spans_from_other_threads_keep_their_thread_id(
+    recorder: instrument.Recorder,
+):
+    def work():
+        with instrument.span("git status", "git"):
+            pass
+
+    thread = threading.Thread(target=work)
+    thread.start()
+    thread.join()
+
+    (span,) = recorder.spans
+    assert span.thread_id == thread.ident
+    assert not span.nested
+
+
+def test_timings_report_formats(recorder: instrument.Recorder):
+    with instrument.span("find_source_files", "discovery"):
+        pass
+
+    text = instrument.format_timings(recorder)
+    data = instrument.timings_to_dict(recorder, command="check")
+
+    assert text.splitlines()[0] == "--- Timings ---"
+    assert "discovery" in text and "1 call" in text
+    assert data["command"] == "check"
+    assert data["phases"]["discovery"]["count"] == 1
+    assert list(data["phases"]) == list(instrument.PHASES)
+
+
+def test_trace_events_are_chrome_trace_format(recorder: instrument.Recorder):
+    with instrument.span("check", "command"), instrument.span(
+        "walk", "discovery", path=Path("src")
+    ):
+        pass
+
+    trace = instrument.trace_events(recorder)
+
+    metadata, outer, inner = trace["traceEvents"]
+    assert metadata["ph"] == "M"
+    assert metadata["args"] == {"name": threading.current_thread().name}
+    assert [outer["name"], inner["name"]] == ["check", "walk"]
+    assert outer["ph"] == inner["ph"] == "X"
+    assert outer["ts"] <= inner["ts"]
+    assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert inner["args"] == {"path": "src"}
+    # Spans outside the known phases are traced but not totaled.
+    assert "command" not in recorder.phase_totals()
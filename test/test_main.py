@@ -1,13 +1,14 @@
 from __future__ import annotations
 
 import io
+import json
 import textwrap
 from pathlib import Path
 
 import pytest
 
 # adjust if your entrypoint lives elsewhere
-from jiggle_version.__main__ import main
+from jiggle_version.__main__ import main, scan_command_line
 
 
 def w(p: Path, body: str) -> Path:
@@ -275,6 +276,47 @@ def test_bump_quiet_write_succeeds_without_stdout(
     assert 'version = "0.1.1"' in (root / "pyproject.toml").read_text(encoding="utf-8")
 
 
+@pytest.mark.parametrize("quiet", [False, True])
+def test_bump_preflight_messages_follow_quiet_and_precede_the_writes(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+    quiet: bool,
+):
+    root = make_basic_project(tmp_path, "0.1.0")
+
+    def cached_preflight(_args, _root, announce):
+        announce("   (from cache created at 2026-01-01 00:00)")
+        return "demo", "0.1.0"
+
+    monkeypatch.setattr("jiggle_version.__main__._pypi_preflight", cached_preflight)
+    rc = main(
+        [
+            "--project-root",
+            str(root),
+            "--config",
+            str(root / "pyproject.toml"),
+            *(["--quiet"] if quiet else []),
+            "bump",
+            "--increment",
+            "patch",
+            "--autogit",
+            "off",
+        ]
+    )
+
+    assert rc == 0
+    out = capsys.readouterr().out
+    if quiet:
+        assert out == ""
+    else:
+        lines = out.splitlines()
+        cache_line = lines.index("   (from cache created at 2026-01-01 00:00)")
+        verdict = lines.index("✅ PyPI version is '0.1.0'. Bump to '0.1.1' is allowed.")
+        updated = next(i for i, line in enumerate(lines) if "Updated" in line)
+        assert cache_line < verdict < updated
+
+
 # ----------------------- hash-all -----------------------
 
 
@@ -458,3 +500,558 @@ def test_help_does_not_crash_when_stderr_is_ascii_only(
         "ascii"
     ) + stderr.buffer.getvalue().decode("ascii")
     assert "usage:" in help_text.lower()
+
+
+def test_bump_write_failure_keeps_every_file_unchanged(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    root = make_basic_project(tmp_path, "0.1.0")
+    w(root / "setup.cfg", "[metadata]\nversion = 0.1.0\n")
+    w(root / "pkg" / "__init__.py", '__version__ = "0.1.0"\n')
+    targets = [
+        root / "pyproject.toml",
+        root / "setup.cfg",
+        root / "pkg" / "__init__.py",
+    ]
+    before = {p: p.read_bytes() for p in targets}
+
+    def fail_replace(src, dst):
+        raise OSError("simulated crash")
+
+    monkeypatch.setattr("jiggle_version.transaction.os.replace", fail_replace)
+    rc = main(
+        [
+            "--project-root",
+            str(root),
+            "--config",
+            str(root / "pyproject.toml"),
+            "bump",
+            "--increment",
+            "patch",
+            "--no-check-pypi",
+        ]
+    )
+
+    assert rc == 5
+    assert {p: p.read_bytes() for p in before} == before
+
+
+def test_bump_reports_per_file_latency_and_skips_unchanged(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+):
+    root = make_basic_project(tmp_path, "0.1.0")
+    w(root / "pkg" / "__init__.py", '__version__ = "0.1.1"\n')
+    rc = main(
+        [
+            "--project-root",
+            str(root),
+            "--config",
+            str(root / "pyproject.toml"),
+            "bump",
+            "--set",
+            "0.1.1",
+            "--force-write",
+            "--jobs",
+            "4",
+            "--no-check-pypi",
+        ]
+    )
+
+    assert rc == 0
+    out = capsys.readouterr().out
+    assert "✅ Updated pyproject.toml (" in out
+    assert "⚪ Unchanged pkg" in out
+    assert " ms)" in out
+
+
+def test_bump_conflict_does_not_wait_for_the_pypi_preflight(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    import threading
+
+    root = make_basic_project(tmp_path, "0.1.0")
+    w(root / "pkg" / "__init__.py", '__version__ = "0.2.0"\n')
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow_preflight(*_args):
+        started.set()
+        release.wait(10)
+        return "demo", None
+
+    monkeypatch.setattr("jiggle_version.__main__._pypi_preflight", slow_preflight)
+    try:
+        rc = main(
+            [
+                "--project-root",
+                str(root),
+                "--config",
+                str(root / "pyproject.toml"),
+                "bump",
+                "--increment",
+                "patch",
+                "--autogit",
+                "off",
+            ]
+        )
+        assert started.wait(5)
+        (worker,) = [t for t in threading.enumerate() if t.name == "pypi-preflight"]
+        # Left running, but it cannot hold the process open.
+        assert worker.daemon
+    finally:
+        release.set()
+
+    assert rc == 102
+
+
+def test_bump_is_blocked_when_the_pypi_lookup_fails(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+):
+    import requests
+
+    root = make_basic_project(tmp_path, "0.1.0")
+
+    def unreachable(*_args):
+        raise requests.ConnectionError("pypi.org unreachable")
+
+    monkeypatch.setattr("jiggle_version.__main__._pypi_preflight", unreachable)
+    rc = main(
+        [
+            "--project-root",
+            str(root),
+            "--config",
+            str(root / "pyproject.toml"),
+            "bump",
+            "--increment",
+            "patch",
+            "--autogit",
+            "off",
+        ]
+    )
+
+    assert rc == 105
+    assert "--no-check-pypi" in capsys.readouterr().err
+    assert 'version = "0.1.0"' in (root / "pyproject.toml").read_text()
+
+
+def test_bump_dry_run_diff_prints_unified_diff_without_writing(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+):
+    root = make_basic_project(tmp_path, "0.1.0")
+    w(root / "pkg" / "__init__.py", '"""Demo."""\n__version__ = "0.1.0"\n')
+    before = (root / "pkg" / "__init__.py").read_bytes()
+    rc = main(
+        [
+            "--project-root",
+            str(root),
+            "--config",
+            str(root / "pyproject.toml"),
+            "bump",
+            "--increment",
+            "minor",
+            "--dry-run",
+            "--diff",
+            "--no-check-pypi",
+        ]
+    )
+
+    assert rc == 0
+    out = capsys.readouterr().out
+    assert "--- a/pkg/__init__.py\n+++ b/pkg/__init__.py\n" in out
+    assert '-__version__ = "0.1.0"\n+__version__ = "0.2.0"\n' in out
+    assert '-version = "0.1.0"\n+version = "0.2.0"\n' in out
+    assert (root / "pkg" / "__init__.py").read_bytes() == before
+
+
+def test_bump_diff_implies_dry_run(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    root = make_basic_project(tmp_path, "0.1.0")
+    before = (root / "pyproject.toml").read_bytes()
+    rc = main(
+        [
+            "--project-root",
+            str(root),
+            "--config",
+            str(root / "pyproject.toml"),
+            "bump",
+            "--increment",
+            "minor",
+            "--diff",
+            "--no-check-pypi",
+        ]
+    )
+
+    assert rc == 0
+    assert '+version = "0.2.0"\n' in capsys.readouterr().out
+    assert (root / "pyproject.toml").read_bytes() == before
+
+
+def _stale_demo_cache(root: Path, pypi_server) -> None:
+    """Cache demo==0.1.0 for the stand-in index, then age it past its TTL."""
+    from jiggle_version.pypi import get_latest_published_version
+    from jiggle_version.pypi_cache import PyPICache
+
+    pypi_server.add("/pypi/demo/json", body={"info": {"version": "0.1.0"}})
+    get_latest_published_version("demo")
+    (entry,) = PyPICache().directory.glob("*.json")
+    data = json.loads(entry.read_text(encoding="utf-8"))
+    data["timestamp"] = "2000-01-01T00:00:00+00:00"
+    entry.write_text(json.dumps(data), encoding="utf-8")
+    w(
+        root / "pyproject.toml",
+        """
+        [project]
+        name = "demo"
+        version = "0.1.0"
+
+        [tool.jiggle_version]
+        pypi_cache_mode = "stale-while-revalidate"
+        pypi_cache_grace = 3153600000
+        """,
+    )
+
+
+@pytest.mark.parametrize("strict", [False, True])
+def test_bump_stale_pypi_cache_mode_and_strict_flag(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], pypi_server, strict: bool
+):
+    root = make_basic_project(tmp_path, "0.1.0")
+    _stale_demo_cache(root, pypi_server)
+    capsys.readouterr()
+    argv = [
+        "--project-root",
+        str(root),
+        "--config",
+        str(root / "pyproject.toml"),
+        "bump",
+        "--increment",
+        "patch",
+    ]
+    rc = main(argv + (["--strict-pypi"] if strict else []))
+
+    assert rc == 0
+    out = capsys.readouterr().out
+    if strict:
+        assert "(querying " in out
+    else:
+        assert "refreshing in background" in out
+    # Either way the refreshed entry is on disk once main() returns.
+    assert len(pypi_server.requests) == 2
+    assert 'version = "0.1.1"' in (root / "pyproject.toml").read_text("utf-8")
+
+
+def test_bump_overlaps_pypi_lookup_with_discovery(
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+    monkeypatch: pytest.MonkeyPatch,
+    pypi_server,
+):
+    import time
+
+    from jiggle_version import scan
+
+    root = make_basic_project(tmp_path, "0.1.0")
+    pypi_server.add("/pypi/demo/json", body={"info": {"version": "0.1.0"}}, delay=0.6)
+    real_find = scan.find_source_files
+
+    def slow_find(*args, **kwargs):
+        time.sleep(0.6)
+        return real_find(*args, **kwargs)
+
+    monkeypatch.setattr(scan, "find_source_files", slow_find)
+    started = time.perf_counter()
+    rc = main(
+        [
+            "--project-root",
+            str(root),
+            "--config",
+            str(root / "pyproject.toml"),
+            "bump",
+            "--increment",
+            "patch",
+        ]
+    )
+    elapsed = time.perf_counter() - started
+
+    assert rc == 0
+    out = capsys.readouterr().out
+    assert out.index("Conducting PyPI publication check") < out.index(
+        "(querying "
+    )
+    assert "✅ PyPI version is '0.1.0'" in out
+    # Sequential would take at least 1.2s; overlapped is about max(0.6, 0.6).
+    assert elapsed < 1.1
+
+
+def test_check_pypi_all_reports_every_project(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], pypi_server
+):
+    from jiggle_version.pypi_cache import PyPICache
+
+    root = make_basic_project(tmp_path, "0.1.0")
+    for name, version in (("alpha", "1.1.0"), ("beta", "1.0.0")):
+        w(
+            root / "libs" / name / "pyproject.toml",
+            f'[project]\nname = "{name}"\nversion = "{version}"\n',
+        )
+    pypi_server.add("/pypi/demo/json", body={"info": {"version": "0.1.0"}})
+    pypi_server.add("/pypi/alpha/json", body={"info": {"version": "1.0.0"}})
+
+    rc = main(
+        [
+            "--project-root",
+            str(root),
+            "--config",
+            str(root / "pyproject.toml"),
+            "check-pypi",
+            "--all",
+            "--jobs",
+            "2",
+        ]
+    )
+
+    assert rc == 105
+    out = capsys.readouterr().out
+    assert "alpha  1.1.0        1.0.0        unpublished" in out
+    assert "beta   1.0.0        -            missing" in out
+    assert "demo   0.1.0        0.1.0        published" in out
+    assert "check-pypi: 2/3 found" in out
+    assert len(list(PyPICache().directory.glob("*.json"))) == 3
+
+
+# ----------------------- argument scan -----------------------
+
+
+@pytest.mark.parametrize(
+    ("argv", "expected"),
+    [
+        (["print"], ("print", "pyproject.toml")),
+        (["--config", "a.toml", "-vv", "-q", "bump", "--dry-run"], ("bump", "a.toml")),
+        (["--config=b.toml", "--log-level", "DEBUG", "check"], ("check", "b.toml")),
+        (
+            ["--ignore", "print", "build", "--project-root", ".", "inspect"],
+            ("inspect", "pyproject.toml"),
+        ),
+        (["--conf", "c.toml", "print"], (None, "pyproject.toml")),
+        (["frobnicate"], (None, "pyproject.toml")),
+        (["--help"], (None, "pyproject.toml")),
+    ],
+)
+def test_scan_command_line_finds_subcommand_without_a_parser(
+    argv: list[str], expected: tuple[str | None, str]
+):
+    assert scan_command_line(argv) == expected
+
+
+def test_abbreviated_config_option_is_still_honored(tmp_path: Path):
+    root = make_basic_project(tmp_path)
+    config = str(root / "pyproject.toml")
+    rc = main(["--project-root", str(root), "--conf", config, "print"])
+    assert rc == 0
+
+
+def test_inspect_discovers_and_parses_once(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    from jiggle_version import scan
+
+    root = make_basic_project(tmp_path)
+    calls = {"find": 0, "parse": 0}
+    real_find, real_parse = scan.find_source_files, scan.parse_source
+
+    def counting_find(*args, **kwargs):
+        calls["find"] += 1
+        return real_find(*args, **kwargs)
+
+    def counting_parse(*args, **kwargs):
+        calls["parse"] += 1
+        return real_parse(*args, **kwargs)
+
+    monkeypatch.setattr(scan, "find_source_files", counting_find)
+    monkeypatch.setattr(scan, "parse_source", counting_parse)
+    rc = main(["--project-root", str(root), "inspect"])
+
+    assert rc == 0
+    assert calls["find"] == 1
+    assert calls["parse"] == len(real_find(root))
+
+
+def test_timings_json_reports_phases_on_stderr(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+):
+    root = make_basic_project(tmp_path, "0.1.0")
+    rc = main(
+        [
+            "--project-root",
+            str(root),
+            "bump",
+            "--no-check-pypi",
+            "--timings=json",
+        ]
+    )
+
+    assert rc == 0
+    captured = capsys.readouterr()
+    data = json.loads(captured.err.strip().splitlines()[-1])
+    assert data["command"] == "bump"
+    assert data["exit_code"] == 0
+    assert data["phases"]["discovery"]["count"] == 1
+    assert data["phases"]["parse"]["count"] >= 1
+    assert data["phases"]["write"]["count"] >= 2  # renders plus the commit
+    assert "Timings" not in captured.out
+
+
+def test_check_ndjson_streams_records_then_summary(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+):
+    root = make_basic_project(tmp_path, "0.1.0")
+    w(root / "demo" / "__about__.py", '__version__ = "0.2.0"\n')
+
+    rc = main(["--project-root", str(root), "check", "--format", "ndjson"])
+
+    assert rc == 102
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    sources, summary = records[:-1], records[-1]
+    assert {record["path"]: record["version"] for record in sources} == {
+        "demo/__about__.py": "0.2.0",
+        "pyproject.toml": "0.1.0",
+    }
+    assert all(record["type"] == "source" for record in sources)
+    assert sources[0]["parser"] == "parse_python_module"
+    assert sources[0]["span"]["line"] == 1
+    assert sources[0]["cache"] == "miss"
+    assert summary["type"] == "summary"
+    assert summary["status"] == "conflict"
+    assert summary["versions"] == ["0.1.0", "0.2.0"]
+    assert summary["exit_code"] == 102
+
+
+def test_check_ndjson_git_tag_without_git_still_writes_a_summary(
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+    monkeypatch: pytest.MonkeyPatch,
+):
+    root = make_basic_project(tmp_path, "0.1.0")
+    monkeypatch.setattr("jiggle_version.git.shutil.which", lambda name: None)
+
+    rc = main(
+        ["--project-root", str(root), "check", "--git-tag", "--format", "ndjson"]
+    )
+
+    assert rc == 0
+    summary = json.loads(capsys.readouterr().out.splitlines()[-1])
+    assert summary["type"] == "summary"
+    assert summary["git_tag"] is None
+    assert "Git command not found" in summary["git_tag_error"]
+    assert summary["status"] == "ok"
+
+
+def test_metrics_file_records_scan_counters_and_exit_code(tmp_path: Path):
+    root = make_basic_project(tmp_path, "0.1.0")
+    metrics_path = tmp_path / "jiggle_version.prom"
+
+    rc = main(
+        ["--project-root", str(root), "check", "--metrics-file", str(metrics_path)]
+    )
+
+    assert rc == 0
+    text = metrics_path.read_text("utf-8")
+    labels = f'command="check",project="{root.name}"'
+    assert f"jiggle_version_files_parsed{{{labels}}} 1" in text
+    assert f"jiggle_version_exit_code{{{labels}}} 0" in text
+
+
+def test_trace_file_has_nested_spans_per_thread(tmp_path: Path):
+    root = make_basic_project(tmp_path, "0.1.0")
+    w(root / "demo" / "__about__.py", '__version__ = "0.1.0"\n')
+    trace_path = tmp_path / "trace.json"
+
+    rc = main(
+        [
+            "--project-root",
+            str(root),
+            "bump",
+            "--no-check-pypi",
+            "--jobs",
+            "2",
+            "--trace-file",
+            str(trace_path),
+        ]
+    )
+
+    assert rc == 0
+    events = json.loads(trace_path.read_text("utf-8"))["traceEvents"]
+    spans = [event for event in events if event["ph"] == "X"]
+    names = {event["name"] for event in spans}
+    assert {"bump", "find_source_files", "walk", "commit"} <= names
+    (command,) = [event for event in spans if event["cat"] == "command"]
+    for event in spans:
+        assert command["ts"] <= event["ts"]
+        assert event["ts"] + event["dur"] <= command["ts"] + command["dur"] + 1
+    threads = {event["tid"] for event in events if event["ph"] == "M"}
+    assert threads == {event["tid"] for event in spans}
+    renders = [event for event in spans if event["name"].startswith("render_")]
+    assert len(renders) == 2
+
+
+def test_profile_cpu_scopes_to_the_handler(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+):
+    root = make_basic_project(tmp_path)
+    output = tmp_path / "print.pstats"
+
+    rc = main(
+        [
+            "--project-root",
+            str(root),
+            "print",
+            "--profile",
+            "cpu",
+            "--profile-output",
+            str(output),
+        ]
+    )
+
+    assert rc == 0
+    captured = capsys.readouterr()
+    assert captured.out.strip() == "0.1.0"
+    assert "handle_print" in captured.err
+    assert output.is_file()
+
+
+def test_unwritable_profile_output_keeps_the_exit_code(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+):
+    root = make_basic_project(tmp_path)
+    output = tmp_path / "missing" / "print.pstats"
+
+    rc = main(
+        [
+            "--project-root",
+            str(root),
+            "print",
+            "--profile",
+            "mem",
+            "--profile-output",
+            str(output),
+        ]
+    )
+
+    assert rc == 0
+    assert "❌ Could not write profile" in capsys.readouterr().err
+
+
+def test_inspect_stats_reports_discovery_cost(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+):
+    root = make_basic_project(tmp_path)
+    w(root / "node_modules" / "pkg.json", "{}")
+
+    rc = main(["--project-root", str(root), "inspect", "--stats"])
+
+    assert rc == 0
+    out = capsys.readouterr().out
+    assert "--- Discovery Statistics ---" in out
+    assert "Pruned (default ignores):  1" in out
+    assert "Wall time:" in out
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import os
+import stat
+from pathlib import Path
+
+import pytest
+
+from jiggle_version import instrument
+from jiggle_version.metrics import render_textfile, write_textfile
+
+
+@pytest.fixture
+def recorder():
+    rec = instrument.enable()
+    try:
+        yield rec
+    finally:
+        instrument.disable()
+
+
+def _samples(text: str) -> dict[str, float]:
+    return {
+        line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+        for line in text.splitlines()
+        if line and not line.startswith("#")
+    }
+
+
+def test_render_textfile_exports_phases_counters_and_cache_ratio(
+    recorder: instrument.Recorder,
+):
+    with instrument.span("lookup", "pypi"), instrument.span("fetch", "pypi"):
+        pass
+    with instrument.span("git status", "git"):
+        pass
+    with instrument.span("git add", "git"):
+        pass
+    instrument.count("files_discovered", 3)
+    instrument.count("pypi_cache_hits", 3)
+    instrument.count("pypi_cache_misses")
+
+    text = render_textfile(recorder, "bump", 0, project='my"repo', timestamp=1.0)
+    samples = _samples(text)
+
+    labels = 'command="bump",project="my\\"repo"'
+    assert samples[f"jiggle_version_files_discovered{{{labels}}}"] == 3
+    assert samples[f"jiggle_version_files_parsed{{{labels}}}"] == 0
+    assert samples[f"jiggle_version_git_subprocesses{{{labels}}}"] == 2
+    assert samples[f"jiggle_version_pypi_cache_hit_ratio{{{labels}}}"] == 0.75
+    assert samples[f"jiggle_version_pypi_fetches{{{labels}}}"] == 1
+    assert samples[f'jiggle_version_phase_calls{{{labels},phase="pypi"}}'] == 1
+    assert samples[f"jiggle_version_exit_code{{{labels}}}"] == 0
+    # One run per file: nothing may claim to be a monotonic counter.
+    assert "counter" not in text and "summary" not in text
+    assert "_total{" not in text
+    assert text.endswith("\n")
+
+
+def test_write_textfile_replaces_atomically_and_is_world_readable(tmp_path: Path):
+    target = tmp_path / "jiggle_version.prom"
+    target.write_text("old\n", encoding="utf-8")
+
+    write_textfile(target, "new 1\n")
+
+    assert target.read_text(encoding="utf-8") == "new 1\n"
+    assert os.listdir(tmp_path) == ["jiggle_version.prom"]
+    if os.name == "posix":
+        assert stat.S_IMODE(target.stat().st_mode) == 0o644
@@ -2,7 +2,11 @@ from __future__ import annotations
 
 from pathlib import Path
 
-from jiggle_version.parsers.ast_parser import parse_dunder_all, parse_python_module
+from jiggle_version.parsers.ast_parser import (
+    find_version_spans,
+    parse_dunder_all,
+    parse_python_module,
+)
 
 
 def test_parse_python_module_honors_pep263_encoding_cookie(tmp_path: Path):
@@ -20,3 +24,12 @@ def test_parse_dunder_all_honors_utf8_bom(tmp_path: Path):
     f.write_text('__all__ = ["alpha", "beta"]\n', encoding="utf-8-sig")
 
     assert parse_dunder_all(f) == {"alpha", "beta"}
+
+
+def test_find_version_spans_returns_raw_byte_offsets_for_cp1252(tmp_path: Path):
+    source = '# -*- coding: cp1252 -*-\nX = "\xe9\xe9"; __version__ = "1.0.0"\n'
+    raw = source.encode("cp1252")
+
+    (span,) = find_version_spans(raw)
+
+    assert raw[span[0] : span[1]] == b'"1.0.0"'
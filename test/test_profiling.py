@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import io
+import pstats
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from jiggle_version.profiling import default_output, run_profiled
+
+
+def allocate() -> list[bytearray]:
+    return [bytearray(1024) for _ in range(200)]
+
+
+def test_cpu_profile_writes_pstats_and_summary(tmp_path: Path):
+    output = tmp_path / "run.pstats"
+    stream = io.StringIO()
+
+    assert len(run_profiled("cpu", allocate, output, stream)) == 200
+
+    assert "CPU profile" in stream.getvalue()
+    assert "allocate" in stream.getvalue()
+    stats = pstats.Stats(str(output))
+    assert any(func[2] == "allocate" for func in stats.stats)  # type: ignore[attr-defined]
+
+
+def test_memory_profile_reports_peak_and_snapshot(tmp_path: Path):
+    output = tmp_path / "run.tracemalloc"
+    stream = io.StringIO()
+
+    # The result is still alive when the final snapshot is taken.
+    assert len(run_profiled("mem", allocate, output, stream)) == 200
+
+    summary = stream.getvalue()
+    assert "Peak traced memory" in summary
+    assert "test_profiling.py" in summary
+    assert tracemalloc.Snapshot.load(str(output)).traces
+    assert not tracemalloc.is_tracing()
+
+
+@pytest.mark.parametrize("kind", ["cpu", "mem"])
+def test_unwritable_output_is_reported_not_raised(tmp_path: Path, kind: str):
+    output = tmp_path / "missing" / "run.out"
+    stream = io.StringIO()
+    errors: list[str] = []
+
+    assert run_profiled(kind, lambda: 7, output, stream, report=errors.append) == 7
+
+    (message,) = errors
+    assert message.startswith(f"❌ Could not write profile {output}")
+    assert "written to" not in stream.getvalue()
+
+
+def test_unknown_kind_is_rejected(tmp_path: Path):
+    with pytest.raises(ValueError, match="Unknown profile kind"):
+        run_profiled("io", allocate, tmp_path / "x")
+
+
+def test_default_output_is_named_after_the_command():
+    assert default_output("cpu", "bump") == Path("jiggle_version-bump.pstats")
+    assert default_output("mem", "check") == Path("jiggle_version-check.tracemalloc")
@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import json
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+import requests
+
+from jiggle_version import pypi
+from jiggle_version.auto import write_digest_data
+from jiggle_version.pypi import (
+    UnpublishedVersionError,
+    check_pypi_publication,
+    get_latest_published_version,
+    request_with_retry,
+)
+from jiggle_version.pypi_cache import PyPICache
+
+
+def release_doc(version: str) -> dict:
+    return {"info": {"name": "demo", "version": version}, "releases": {}}
+
+
+def no_sleep(_: float) -> None:
+    pass
+
+
+def test_latest_version_is_fetched_from_index_and_cached(pypi_server):
+    pypi_server.add("/pypi/demo/json", body=release_doc("1.4.0"))
+
+    assert get_latest_published_version("demo") == "1.4.0"
+    assert get_latest_published_version("demo") == "1.4.0"
+
+    assert pypi_server.paths() == ["/pypi/demo/json"]
+    assert pypi_server.requests[0][1]["User-Agent"].startswith("jiggle_version/")
+
+
+def test_unknown_package_returns_none(pypi_server):
+    assert get_latest_published_version("ghost") is None
+
+
+def test_legacy_config_path_argument_is_accepted_with_a_warning(
+    tmp_path: Path, pypi_server
+):
+    pypi_server.add("/pypi/demo/json", body=release_doc("1.4.0"))
+
+    with pytest.deprecated_call():
+        latest = get_latest_published_version("demo", tmp_path / ".jiggle_version.config")
+
+    assert latest == "1.4.0"
+    assert not (tmp_path / ".jiggle_version.config").exists()
+
+
+def test_pooled_session_reuses_connection(pypi_server):
+    pypi_server.add("/a", body={})
+    pypi_server.add("/b", body={})
+
+    request_with_retry(pypi_server.url + "/a")
+    request_with_retry(pypi_server.url + "/b")
+
+    ports = {port for _, _, port in pypi_server.requests}
+    assert len(ports) == 1
+
+
+def test_transient_errors_are_retried(pypi_server):
+    pypi_server.add("/flaky", status=503)
+    pypi_server.add("/flaky", status=502)
+    pypi_server.add("/flaky", body={"ok": True})
+    sleeps: list[float] = []
+
+    response = request_with_retry(pypi_server.url + "/flaky", sleep=sleeps.append)
+
+    assert response.status_code == 200
+    assert pypi_server.paths() == ["/flaky"] * 3
+    assert len(sleeps) == 2
+    assert all(0 <= s <= pypi.BACKOFF_CAP for s in sleeps)
+
+
+def test_retries_stop_at_max_attempts(pypi_server):
+    pypi_server.add("/down", status=500)
+
+    response = request_with_retry(
+        pypi_server.url + "/down", max_attempts=3, sleep=no_sleep
+    )
+
+    assert response.status_code == 500
+    assert len(pypi_server.requests) == 3
+
+
+def test_retry_after_header_is_honored_within_deadline(pypi_server):
+    pypi_server.add("/busy", status=429, headers={"Retry-After": "30"})
+    sleeps: list[float] = []
+
+    response = request_with_retry(
+        pypi_server.url + "/busy", deadline=2.0, sleep=sleeps.append
+    )
+
+    # Waiting 30s would blow the 2s deadline, so we give up instead of sleeping.
+    assert response.status_code == 429
+    assert sleeps == []
+
+
+def test_overall_deadline_bounds_slow_index(
+    pypi_server, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(pypi, "ATTEMPT_TIMEOUT", 0.2)
+    pypi_server.add("/slow", body={}, delay=1.0)
+
+    with pytest.raises(requests.Timeout):
+        request_with_retry(pypi_server.url + "/slow", deadline=0.5, sleep=no_sleep)
+
+
+def test_server_errors_are_not_cached_as_unpublished(
+    user_cache_dir: Path, pypi_server, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(pypi, "MAX_ATTEMPTS", 1)
+    pypi_server.add("/pypi/demo/json", status=500)
+
+    with pytest.raises(requests.HTTPError):
+        get_latest_published_version("demo")
+    assert not list(user_cache_dir.rglob("*.json"))
+
+
+def test_check_blocks_bump_past_unpublished_version(pypi_server):
+    pypi_server.add("/pypi/demo/json", body=release_doc("1.0.0"))
+
+    with pytest.raises(UnpublishedVersionError):
+        check_pypi_publication("demo", "1.1.0", "1.1.0")
+    check_pypi_publication("demo", "1.0.0", "1.0.1")
+
+
+def cache_entry_file(user_cache_dir: Path) -> Path:
+    (entry,) = (user_cache_dir / "pypi").glob("*.json")
+    return entry
+
+
+def expire_cache(user_cache_dir: Path) -> None:
+    path = cache_entry_file(user_cache_dir)
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["timestamp"] = "2000-01-01T00:00:00+00:00"
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+
+def test_expired_cache_revalidates_with_etag_and_keeps_version_on_304(
+    user_cache_dir: Path, pypi_server
+):
+    pypi_server.add(
+        "/pypi/demo/json",
+        body=release_doc("2.0.0"),
+        headers={"ETag": '"abc123"', "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"},
+    )
+    pypi_server.add("/pypi/demo/json", status=304)
+
+    assert get_latest_published_version("demo") == "2.0.0"
+    expire_cache(user_cache_dir)
+    assert get_latest_published_version("demo") == "2.0.0"
+
+    first, second = (headers for _, headers, _ in pypi_server.requests)
+    assert "If-None-Match" not in first
+    assert second["If-None-Match"] == '"abc123"'
+    assert second["If-Modified-Since"] == "Wed, 01 Jan 2025 00:00:00 GMT"
+    cached = json.loads(cache_entry_file(user_cache_dir).read_text(encoding="utf-8"))
+    assert cached["etag"] == '"abc123"'
+    assert not cached["timestamp"].startswith("2000-01-01")
+
+
+def test_changed_document_replaces_cached_validators(user_cache_dir: Path, pypi_server):
+    pypi_server.add(
+        "/pypi/demo/json", body=release_doc("2.0.0"), headers={"ETag": '"v1"'}
+    )
+    pypi_server.add(
+        "/pypi/demo/json", body=release_doc("2.1.0"), headers={"ETag": '"v2"'}
+    )
+
+    get_latest_published_version("demo")
+    expire_cache(user_cache_dir)
+
+    assert get_latest_published_version("demo") == "2.1.0"
+    assert '\\"v2\\"' in cache_entry_file(user_cache_dir).read_text(encoding="utf-8")
+
+
+def test_cache_survives_digest_rewrite_and_is_shared(tmp_path: Path, pypi_server):
+    pypi_server.add("/pypi/demo/json", body=release_doc("1.0.0"))
+    for checkout in ("main", "worktree"):
+        digest_path = tmp_path / checkout / ".jiggle_version.config"
+        digest_path.parent.mkdir()
+        get_latest_published_version("demo")
+        write_digest_data(digest_path, {"a", "b"})
+
+    assert pypi_server.paths() == ["/pypi/demo/json"]
+
+
+def test_not_found_answers_use_their_own_ttl(pypi_server):
+    pypi_server.add("/pypi/demo/json", status=404)
+    pypi_server.add("/pypi/demo/json", body=release_doc("0.1.0"))
+    cache = PyPICache(hit_ttl=timedelta(days=1), miss_ttl=timedelta(0))
+
+    assert get_latest_published_version("demo", cache=cache) is None
+    assert get_latest_published_version("demo", cache=cache) == "0.1.0"
+    assert get_latest_published_version("demo", cache=cache) == "0.1.0"
+    assert len(pypi_server.requests) == 2
+
+
+def test_cache_entries_are_keyed_by_index_url(user_cache_dir: Path):
+    cache = PyPICache()
+    assert cache.path_for("https://a.example/simple/demo/") != cache.path_for(
+        "https://b.example/simple/demo/"
+    )
+    assert cache.directory == user_cache_dir / "pypi"
+
+
+def test_stale_while_revalidate_answers_from_cache_and_refreshes(
+    user_cache_dir: Path, pypi_server
+):
+    pypi_server.add("/pypi/demo/json", body=release_doc("1.0.0"))
+    pypi_server.add("/pypi/demo/json", body=release_doc("1.1.0"), delay=0.3)
+    get_latest_published_version("demo")
+    expire_cache(user_cache_dir)
+    cache = PyPICache(grace=timedelta(days=365 * 100))
+
+    latest = get_latest_published_version(
+        "demo", cache=cache, mode="stale-while-revalidate"
+    )
+    assert latest == "1.0.0"
+
+    pypi.wait_for_background_refreshes()
+    assert len(pypi_server.requests) == 2
+    assert get_latest_published_version("demo", cache=cache) == "1.1.0"
+    assert len(pypi_server.requests) == 2
+
+
+def test_stale_while_revalidate_blocks_outside_grace_window(
+    user_cache_dir: Path, pypi_server
+):
+    pypi_server.add("/pypi/demo/json", body=release_doc("1.0.0"))
+    pypi_server.add("/pypi/demo/json", body=release_doc("1.1.0"))
+    get_latest_published_version("demo")
+    expire_cache(user_cache_dir)
+
+    latest = get_latest_published_version(
+        "demo", cache=PyPICache(grace=timedelta(days=1)), mode="stale-while-revalidate"
+    )
+
+    assert latest == "1.1.0"
+
+
+def test_stale_not_found_is_always_rechecked(user_cache_dir: Path, pypi_server):
+    pypi_server.add("/pypi/demo/json", status=404)
+    pypi_server.add("/pypi/demo/json", body=release_doc("0.1.0"))
+    get_latest_published_version("demo")
+    expire_cache(user_cache_dir)
+    cache = PyPICache(grace=timedelta(days=365 * 100))
+
+    latest = get_latest_published_version(
+        "demo", cache=cache, mode="stale-while-revalidate"
+    )
+
+    assert latest == "0.1.0"
+
+
+def test_batch_check_is_concurrent_bounded_and_writes_cache_once(
+    pypi_server, monkeypatch: pytest.MonkeyPatch
+):
+    import time
+
+    for name, version in (("a", "1.0"), ("b", "2.0"), ("c", "3.0")):
+        pypi_server.add(f"/pypi/{name}/json", body=release_doc(version), delay=0.3)
+    writes: list[int] = []
+    real_write = PyPICache._write_entries
+
+    def counting_write(self, entries):
+        writes.append(len(entries))
+        real_write(self, entries)
+
+    monkeypatch.setattr(PyPICache, "_write_entries", counting_write)
+    started = time.perf_counter()
+
+    results = pypi.check_publications(
+        [("a", "1.0"), ("b", "2.1"), ("c", "2.0"), ("ghost", "0.1")], max_workers=2
+    )
+
+    elapsed = time.perf_counter() - started
+    assert [r.status for r in results] == [
+        "published",
+        "unpublished",
+        "behind",
+        "missing",
+    ]
+    assert writes == [4]
+    # 4 lookups, 2 at a time, 3 of them slow: more than one round, less than serial.
+    assert 0.55 < elapsed < 1.2
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import shutil
+import time
+from pathlib import Path
+
+import pytest
+import requests
+
+from jiggle_version import pypi
+from jiggle_version.pypi import get_latest_published_version, lookup_latest_version
+from jiggle_version.pypi_index import (
+    SIMPLE_JSON_CONTENT_TYPE,
+    PackageIndex,
+    indexes_from_settings,
+    pick_latest,
+    scan_simple_versions,
+    version_from_filename,
+)
+
+FIXTURES = Path(__file__).parent / "fixtures" / "pypi"
+# Recorded from pypi.org: the JSON API document and the PEP 503 simple page.
+# The *.simple.json files are the PEP 691 rendering of the same simple page.
+RECORDED = {"jiggle-version": "2.2.1", "tomlkit": "0.15.2"}
+
+
+def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+@pytest.mark.parametrize(
+    ("filename", "expected"),
+    [
+        ("jiggle_version-2.2.1-py3-none-any.whl", "2.2.1"),
+        ("jiggle_version-2.2.1.tar.gz", "2.2.1"),
+        ("jiggle-version-1.0.0rc1.zip", "1.0.0rc1"),
+        ("Jiggle.Version-0.9-py2.7.egg", "0.9"),
+        ("jiggle_version_extra-1.0.tar.gz", None),
+        ("other-1.0-py3-none-any.whl", None),
+        ("jiggle_version-1.0.tar.gz.asc", None),
+    ],
+)
+def test_version_from_filename(filename: str, expected: str | None):
+    assert version_from_filename(filename, "jiggle-version") == expected
+
+
+def test_pick_latest_prefers_final_releases():
+    assert pick_latest(["1.0", "2.0rc1", "1.5", "bogus"]) == "1.5"
+    assert pick_latest(["2.0rc1", "2.0b1"]) == "2.0rc1"
+    assert pick_latest([]) is None
+
+
+@pytest.mark.parametrize("name", sorted(RECORDED))
+@pytest.mark.parametrize("chunk_size", [7, 1024, 1 << 20])
+def test_simple_pages_parse_in_any_chunking(name: str, chunk_size: int):
+    html_page = (FIXTURES / f"{name}.simple.html").read_bytes()
+    json_page = (FIXTURES / f"{name}.simple.json").read_bytes()
+
+    from_html = scan_simple_versions(chunked(html_page, chunk_size), name, False)
+    from_json = scan_simple_versions(chunked(json_page, chunk_size), name, True)
+
+    assert pick_latest(from_html) == RECORDED[name]
+    assert pick_latest(from_json) == RECORDED[name]
+
+
+def test_json_versions_key_stops_reading_early():
+    page = b'{"versions": ["1.0", "1.1"], "files": [' + b"x" * 100_000 + b"]}"
+    consumed = []
+
+    def chunks():
+        for chunk in chunked(page, 64):
+            consumed.append(chunk)
+            yield chunk
+
+    assert scan_simple_versions(chunks(), "demo") == ["1.0", "1.1"]
+    assert len(consumed) == 1
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="Unknown PyPI backend"):
+        PackageIndex(backend="xmlrpc")
+
+
+def test_simple_backend_asks_for_pep691_json(pypi_server):
+    pypi_server.add(
+        "/simple/jiggle-version/",
+        body=(FIXTURES / "jiggle-version.simple.json").read_bytes(),
+        headers={"Content-Type": SIMPLE_JSON_CONTENT_TYPE},
+    )
+    index = PackageIndex(backend="simple")
+
+    latest = get_latest_published_version("Jiggle_Version", index=index)
+
+    assert latest == "2.2.1"
+    assert pypi_server.paths() == ["/simple/jiggle-version/"]
+    assert pypi_server.requests[0][1]["Accept"].startswith(SIMPLE_JSON_CONTENT_TYPE)
+
+
+def test_simple_backend_falls_back_to_html(pypi_server):
+    pypi_server.add(
+        "/simple/jiggle-version/",
+        body=(FIXTURES / "jiggle-version.simple.html").read_bytes(),
+        headers={"Content-Type": "text/html"},
+    )
+    index = PackageIndex(backend="simple")
+
+    latest = get_latest_published_version("jiggle-version", index=index)
+
+    assert latest == "2.2.1"
+
+
+@pytest.mark.parametrize("name", sorted(RECORDED))
+def test_benchmark_simple_backend_against_json_api(pypi_server, name: str):
+    """Both backends agree; the simple page is the smaller transfer."""
+    json_doc = (FIXTURES / f"{name}.json").read_bytes()
+    simple_doc = (FIXTURES / f"{name}.simple.json").read_bytes()
+    pypi_server.add(f"/pypi/{name}/json", body=json_doc)
+    pypi_server.add(
+        f"/simple/{name}/",
+        body=simple_doc,
+        headers={"Content-Type": SIMPLE_JSON_CONTENT_TYPE},
+    )
+
+    results = {}
+    for backend in ("json", "simple"):
+        started = time.perf_counter()
+        latest = get_latest_published_version(name, index=PackageIndex(backend=backend))
+        results[backend] = (latest, time.perf_counter() - started)
+
+    assert results["json"][0] == results["simple"][0] == RECORDED[name]
+    assert len(simple_doc) < len(json_doc)
+    print(
+        f"\n{name}: json {len(json_doc)} B {results['json'][1] * 1000:.1f} ms, "
+        f"simple {len(simple_doc)} B {results['simple'][1] * 1000:.1f} ms"
+    )
+
+
+@pytest.mark.parametrize("page", ["index.json", "index.html", None])
+def test_file_index_directory_is_read_directly(tmp_path: Path, page: str | None):
+    project_dir = tmp_path / "simple" / "jiggle-version"
+    project_dir.mkdir(parents=True)
+    if page == "index.json":
+        shutil.copy(FIXTURES / "jiggle-version.simple.json", project_dir / page)
+    elif page == "index.html":
+        shutil.copy(FIXTURES / "jiggle-version.simple.html", project_dir / page)
+    else:
+        for name in (
+            "jiggle_version-2.2.1.tar.gz",
+            "jiggle_version-2.0.0-py3-none-any.whl",
+        ):
+            (project_dir / name).write_bytes(b"")
+    index = PackageIndex((tmp_path / "simple").as_uri(), backend="json")
+
+    assert index.backend == "simple"
+    assert get_latest_published_version("jiggle_version", index=index) == "2.2.1"
+    assert get_latest_published_version("missing", index=index) is None
+
+
+def test_indexes_from_settings():
+    assert [i.url for i in indexes_from_settings(None)] == [PackageIndex().url]
+    indexes = indexes_from_settings(
+        ["https://a.example/simple/", {"url": "https://b.example/pypi"}], "simple"
+    )
+    assert [(i.url, i.backend) for i in indexes] == [
+        ("https://a.example/simple", "simple"),
+        ("https://b.example/pypi", "simple"),
+    ]
+    (single,) = indexes_from_settings({"url": "https://c.example", "backend": "json"})
+    assert single.backend == "json"
+
+
+def two_indexes(pypi_server) -> list[PackageIndex]:
+    return [
+        PackageIndex(pypi_server.url + "/private/pypi"),
+        PackageIndex(pypi_server.url + "/public/pypi"),
+    ]
+
+
+def test_highest_answer_wins_whichever_index_is_faster(pypi_server):
+    pypi_server.add("/private/pypi/demo/json", body={"info": {"version": "3.0"}})
+    pypi_server.add(
+        "/public/pypi/demo/json", body={"info": {"version": "10.0"}}, delay=0.3
+    )
+
+    assert lookup_latest_version("demo", two_indexes(pypi_server)) == "10.0"
+
+
+def test_any_index_failure_is_skipped_when_another_index_answers(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    indexes = [
+        PackageIndex("https://a.example/pypi"),
+        PackageIndex("https://b.example/pypi"),
+    ]
+
+    def fake_lookup(package_name, config_path, index, *args):
+        if index is indexes[0]:
+            raise ValueError("garbled response")
+        return "1.0"
+
+    monkeypatch.setattr(pypi, "get_latest_published_version", fake_lookup)
+
+    assert lookup_latest_version("demo", indexes) == "1.0"
+
+    def failing_lookup(*args):
+        raise ValueError("garbled response")
+
+    monkeypatch.setattr(pypi, "get_latest_published_version", failing_lookup)
+    with pytest.raises(ValueError, match="garbled"):
+        lookup_latest_version("demo", indexes)
+
+
+def test_not_found_on_one_index_waits_for_the_others(pypi_server):
+    pypi_server.add(
+        "/public/pypi/demo/json", body={"info": {"version": "1.0"}}, delay=0.3
+    )
+
+    assert lookup_latest_version("demo", two_indexes(pypi_server)) == "1.0"
+    assert lookup_latest_version("ghost", two_indexes(pypi_server)) is None
+
+
+def test_unreachable_index_is_not_taken_as_not_found(
+    pypi_server, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(pypi, "MAX_ATTEMPTS", 1)
+    pypi_server.add("/private/pypi/demo/json", status=503)
+
+    with pytest.raises(requests.HTTPError):
+        lookup_latest_version("demo", two_indexes(pypi_server))
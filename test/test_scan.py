@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from jiggle_version.scan import (
+    ScanCache,
+    parser_for,
+    scan_project,
+    set_scan_cache,
+    version_span,
+)
+
+
+def write(path: Path, body: str) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(body, encoding="utf-8")
+    return path
+
+
+def test_scan_reports_versions_and_counters(tmp_path: Path):
+    write(tmp_path / "pyproject.toml", '[project]\nname = "demo"\nversion = "1.0.0"\n')
+    write(tmp_path / "demo" / "__init__.py", '__version__ = "1.0.0"\n')
+    write(tmp_path / "demo" / "__about__.py", "def broken(:\n")
+
+    scan = scan_project(tmp_path)
+
+    assert [source.relative_path for source in scan.found] == [
+        Path("demo", "__init__.py"),
+        Path("pyproject.toml"),
+    ]
+    assert scan.agreed_version == "1.0.0"
+    assert scan.counters == {
+        "files_discovered": 3,
+        "files_parsed": 3,
+        "files_skipped": 0,
+        "parse_errors": 0,
+        "versions_found": 2,
+        "unique_versions": 1,
+    }
+
+
+def test_conflicting_versions_have_no_agreed_version(tmp_path: Path):
+    write(tmp_path / "pyproject.toml", '[project]\nname = "demo"\nversion = "1.0.0"\n')
+    write(tmp_path / "setup.cfg", "[metadata]\nversion = 2.0.0\n")
+
+    scan = scan_project(tmp_path)
+
+    assert scan.unique_versions == {"1.0.0", "2.0.0"}
+    assert scan.agreed_version is None
+
+
+def test_parser_for_unknown_file_type_is_none():
+    assert parser_for(Path("README.md")) is None
+    assert parser_for(Path("pkg/_version.py")) is not None
+
+
+def test_version_span_points_at_the_version_text(tmp_path: Path):
+    about = write(tmp_path / "__about__.py", '# demo\n__version__ = u"1.0.0"\n')
+    cfg = write(tmp_path / "setup.cfg", "[metadata]\nversion = 1.0.0 ; pinned\n")
+
+    about_span = version_span(about, "1.0.0")
+    cfg_span = version_span(cfg, "1.0.0")
+
+    assert about_span == {"start": 23, "end": 28, "line": 2, "column": 17}
+    assert cfg.read_bytes()[cfg_span["start"] : cfg_span["end"]] == b"1.0.0"
+    assert cfg_span["line"] == 2
+    assert version_span(cfg, "9.9.9") is None
+
+
+def test_version_span_handles_crlf_line_endings(tmp_path: Path):
+    pyproject = tmp_path / "pyproject.toml"
+    pyproject.write_bytes(b'[project]\r\nname = "demo"\r\nversion = "1.0.0"\r\n')
+    cfg = tmp_path / "setup.cfg"
+    cfg.write_bytes(b"[metadata]\r\nversion = 1.0.0 ; pinned\r\n")
+
+    for path, line in ((pyproject, 3), (cfg, 2)):
+        found = version_span(path, "1.0.0")
+        assert found is not None
+        assert path.read_bytes()[found["start"] : found["end"]] == b"1.0.0"
+        assert found["line"] == line
+
+
+def test_version_span_only_looks_in_the_section_the_parser_reads(tmp_path: Path):
+    pyproject = write(
+        tmp_path / "pyproject.toml",
+        '[tool.other]\nversion = "1.0.0"\n\n'
+        '[[tool.plugins]]\nversion = "1.0.0"\n\n'
+        '[project]\nname = "demo"\nversion = "1.0.0"\n',
+    )
+    cfg = write(
+        tmp_path / "setup.cfg",
+        "[bumpversion]\nversion = 1.0.0\n\n[metadata]\nversion = 1.0.0\n",
+    )
+    stray = write(tmp_path / "other" / "setup.cfg", "[tool]\nversion = 1.0.0\n")
+
+    assert version_span(pyproject, "1.0.0")["line"] == 9
+    assert version_span(cfg, "1.0.0")["line"] == 5
+    assert version_span(stray, "1.0.0") is None
+
+
+def test_span_is_located_at_parse_time(tmp_path: Path):
+    cfg = write(tmp_path / "setup.cfg", "[metadata]\nversion = 1.0.0\n")
+
+    source = scan_project(tmp_path, spans=True).sources[0]
+    cfg.unlink()
+
+    assert source.to_dict()["span"] == {"start": 21, "end": 26, "line": 2, "column": 11}
+
+
+def test_spans_are_only_located_when_asked_for(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    write(tmp_path / "demo" / "__about__.py", '__version__ = "1.0.0"\n')
+
+    def second_parse(*_args, **_kwargs):
+        raise AssertionError("version_span ran without spans=True")
+
+    monkeypatch.setattr("jiggle_version.scan.version_span", second_parse)
+    source = scan_project(tmp_path).sources[0]
+
+    assert source.version == "1.0.0"
+    assert source.span is None
+
+
+def age(*paths: Path, seconds: int = 60) -> None:
+    """Backdate mtimes past the cache's racy window."""
+    stamp = time.time() - seconds
+    for path in paths:
+        os.utime(path, (stamp, stamp))
+
+
+def test_scan_cache_reuses_results_until_mtimes_change(tmp_path: Path):
+    pyproject = write(
+        tmp_path / "pyproject.toml", '[project]\nname = "demo"\nversion = "1.0.0"\n'
+    )
+    about = write(tmp_path / "demo" / "__about__.py", '__version__ = "1.0.0"\n')
+    age(pyproject, about, about.parent, tmp_path)
+    previous = set_scan_cache(ScanCache())
+    try:
+        first = scan_project(tmp_path, spans=True)
+        second = scan_project(tmp_path, spans=True)
+        about.write_text('__version__ = "2.0.0"\n', encoding="utf-8")
+        extra = write(tmp_path / "demo" / "_version.py", '__version__ = "2.0.0"\n')
+        third = scan_project(tmp_path)
+    finally:
+        set_scan_cache(previous)
+
+    assert [source.cache for source in first.sources] == ["miss", "miss"]
+    assert [source.cache for source in second.sources] == ["hit", "hit"]
+    assert [source.span for source in second.sources] == [
+        source.span for source in first.sources
+    ]
+    assert all(source.span for source in second.sources)
+    assert second.discovery_stats.directories_listed == 0
+    assert third.files == [about, extra, pyproject]
+    assert [source.cache for source in third.sources] == ["miss", "miss", "hit"]
+    assert third.unique_versions == {"1.0.0", "2.0.0"}
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess  # nosec
+import time
+from pathlib import Path
+
+import pytest
+
+from jiggle_version.git import (
+    get_staged_files,
+    read_index_blob_ids,
+    read_index_blobs,
+)
+from jiggle_version.staged import SourceIndex, scan_staged
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="needs git")
+
+
+def git(repo: Path, *args: str) -> None:
+    subprocess.run(  # nosec
+        ["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+        cwd=repo,
+        check=True,
+        capture_output=True,
+    )
+
+
+def write(path: Path, body: str) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(body, encoding="utf-8")
+    return path
+
+
+def age(*paths: Path) -> None:
+    """Moves mtimes out of the racy window so stamps are trusted."""
+    stamp = time.time() - 60
+    for path in paths:
+        os.utime(path, (stamp, stamp))
+
+
+@pytest.fixture
+def repo(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setenv("JIGGLE_VERSION_CACHE_DIR", str(tmp_path / "cache"))
+    root = tmp_path / "repo"
+    write(root / "pyproject.toml", '[project]\nname = "demo"\nversion = "1.0.0"\n')
+    write(root / "demo" / "__about__.py", '__version__ = "1.0.0"\n')
+    git(root.parent, "init", "-q", str(root))
+    git(root, "add", ".")
+    git(root, "commit", "-q", "-m", "init")
+    age(root / "pyproject.toml", root / "demo" / "__about__.py")
+    # Ignore files younger than the racy window force a rescan on every run.
+    age(*(path for path in [root / ".git" / "info" / "exclude"] if path.exists()))
+    return root
+
+
+def test_index_blobs_are_read_in_one_batch(repo: Path):
+    write(repo / "demo" / "__about__.py", '__version__ = "2.0.0"\n')
+    git(repo, "add", "demo/__about__.py")
+    git(repo, "rm", "-q", "--cached", "pyproject.toml")
+
+    assert get_staged_files(repo) == ["demo/__about__.py", "pyproject.toml"]
+    blobs = read_index_blobs(repo, ["demo/__about__.py", "pyproject.toml"])
+    assert blobs == {
+        "demo/__about__.py": b'__version__ = "2.0.0"\n',
+        "pyproject.toml": None,
+    }
+
+
+def test_index_blob_ids_are_listed_in_one_call(repo: Path):
+    write(repo / "untracked" / "_version.py", '__version__ = "1.0.0"\n')
+
+    blob_ids = read_index_blob_ids(
+        repo, ["demo/__about__.py", "pyproject.toml", "untracked/_version.py"]
+    )
+
+    assert sorted(blob_ids) == ["demo/__about__.py", "pyproject.toml"]
+    assert all(len(blob_id) >= 40 for blob_id in blob_ids.values())
+
+
+def test_unstaged_edits_to_untouched_sources_do_not_count(repo: Path):
+    scan_staged(repo)
+    # Drift in the worktree only: the next commit still has 1.0.0.
+    write(repo / "demo" / "__about__.py", '__version__ = "2.0.0"\n')
+
+    result = scan_staged(repo)
+
+    assert result.unique_versions == {"1.0.0"}
+    assert {source.cache for source in result.sources} == {"hit"}
+
+
+def test_staged_content_wins_and_untouched_sources_come_from_the_cache(repo: Path):
+    first = scan_staged(repo)
+    assert first.unique_versions == {"1.0.0"}
+
+    about = write(repo / "demo" / "__about__.py", '__version__ = "2.0.0"\n')
+    git(repo, "add", "demo/__about__.py")
+    # An unstaged edit on top of the staged one must not count.
+    about.write_text('__version__ = "3.0.0"\n', encoding="utf-8")
+
+    second = scan_staged(repo)
+    by_path = {source.relative_path.as_posix(): source for source in second.sources}
+    assert by_path["demo/__about__.py"].version == "2.0.0"
+    assert by_path["pyproject.toml"].version == "1.0.0"
+    assert by_path["pyproject.toml"].cache == "hit"
+    assert second.unique_versions == {"1.0.0", "2.0.0"}
+
+
+def test_spans_are_located_when_a_later_run_asks_for_them(repo: Path):
+    assert all(source.span is None for source in scan_staged(repo).sources)
+
+    result = scan_staged(repo, spans=True)
+
+    by_path = {source.relative_path.as_posix(): source for source in result.sources}
+    assert by_path["demo/__about__.py"].span == {
+        "start": 15,
+        "end": 20,
+        "line": 1,
+        "column": 16,
+    }
+    assert by_path["pyproject.toml"].span["line"] == 3
+    assert scan_staged(repo, spans=True).sources[0].cache == "hit"
+
+
+def test_staged_additions_and_deletions_update_the_source_list(repo: Path):
+    scan_staged(repo)
+    write(repo / "demo" / "_version.py", '__version__ = "1.0.0"\n')
+    git(repo, "add", "demo/_version.py")
+    git(repo, "rm", "-q", "demo/__about__.py")
+
+    result = scan_staged(repo)
+
+    assert [source.relative_path.as_posix() for source in result.sources] == [
+        "demo/_version.py",
+        "pyproject.toml",
+    ]
+    assert result.unique_versions == {"1.0.0"}
+
+
+def test_staged_sources_follow_the_walks_ignore_rules(repo: Path):
+    scan_staged(repo)
+    write(repo / ".gitignore", "build/\n")
+    write(repo / "build" / "_version.py", '__version__ = "9.0.0"\n')
+    write(repo / "env" / "pyvenv.cfg", "home = /usr\n")
+    write(repo / "env" / "lib" / "_version.py", '__version__ = "9.0.0"\n')
+    write(repo / "vendored" / "_version.py", '__version__ = "9.0.0"\n')
+    git(repo, "add", "-f", ".")
+
+    result = scan_staged(repo, ignore_paths=["vendored"])
+
+    assert result.unique_versions == {"1.0.0"}
+
+
+def test_sources_that_arrive_by_merge_are_seen(repo: Path):
+    git(repo, "checkout", "-q", "-b", "feature")
+    write(repo / "setup.cfg", "[metadata]\nversion = 2.0.0\n")
+    git(repo, "add", "setup.cfg")
+    git(repo, "commit", "-q", "-m", "add setup.cfg")
+    git(repo, "checkout", "-q", "-")
+    assert scan_staged(repo).unique_versions == {"1.0.0"}
+
+    git(repo, "merge", "-q", "--no-ff", "-m", "merge", "feature")
+    result = scan_staged(repo)
+
+    assert "setup.cfg" in {source.relative_path.as_posix() for source in result.sources}
+    assert result.unique_versions == {"1.0.0", "2.0.0"}
+    # The tree diff found it: no walk.
+    assert result.discovery_stats.directories_listed == 0
+
+
+def test_an_unknown_previous_tree_rebuilds_the_source_list(repo: Path):
+    scan_staged(repo)
+    index_path = SourceIndex.path_for(repo, [])
+    index = SourceIndex.load(index_path)
+    assert index is not None
+    index.tree = "0" * 40
+    index.save()
+    write(repo / "setup.cfg", "[metadata]\nversion = 2.0.0\n")
+    git(repo, "add", "setup.cfg")
+    git(repo, "commit", "-q", "-m", "add setup.cfg")
+
+    result = scan_staged(repo)
+
+    assert result.unique_versions == {"1.0.0", "2.0.0"}
+    assert result.discovery_stats.directories_listed > 0
+    assert [source.cache for source in result.sources] == ["hit", "hit", "miss"]
+
+
+def test_an_undone_staged_deletion_counts_again(repo: Path):
+    write(repo / "sub" / "_version.py", '__version__ = "7.0"\n')
+    git(repo, "add", "sub/_version.py")
+    git(repo, "commit", "-q", "-m", "sub")
+    assert scan_staged(repo).unique_versions == {"1.0.0", "7.0"}
+
+    git(repo, "rm", "-q", "--cached", "sub/_version.py")
+    assert scan_staged(repo).unique_versions == {"1.0.0"}
+    git(repo, "restore", "--staged", "sub/_version.py")
+
+    assert scan_staged(repo).unique_versions == {"1.0.0", "7.0"}
+
+
+def test_a_committed_deletion_leaves_the_source_list(repo: Path):
+    scan_staged(repo)
+    git(repo, "rm", "-q", "demo/__about__.py")
+    git(repo, "commit", "-q", "-m", "drop about")
+
+    scan_staged(repo)
+
+    index = SourceIndex.load(SourceIndex.path_for(repo, []))
+    assert index is not None
+    assert sorted(index.entries) == ["pyproject.toml"]
+
+
+def test_a_changed_ignore_file_refilters_the_source_list(repo: Path):
+    write(repo / "sub" / "_version.py", '__version__ = "7.0"\n')
+    git(repo, "add", "sub/_version.py")
+    git(repo, "commit", "-q", "-m", "sub")
+    assert scan_staged(repo).unique_versions == {"1.0.0", "7.0"}
+
+    write(repo / ".gitignore", "sub/\n")
+    git(repo, "add", ".gitignore")
+    assert scan_staged(repo).unique_versions == {"1.0.0"}
+
+    (repo / ".gitignore").unlink()
+    git(repo, "rm", "-q", "--cached", ".gitignore")
+    assert scan_staged(repo).unique_versions == {"1.0.0", "7.0"}
+
+
+def test_staged_outside_a_work_tree_is_an_error(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setenv("GIT_CEILING_DIRECTORIES", str(tmp_path))
+    with pytest.raises(RuntimeError, match="git work tree"):
+        scan_staged(tmp_path)
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import jiggle_version
+
+# Heavy dependencies that read-only commands must never load.
+FORBIDDEN = (
+    "requests",
+    "urllib3",
+    "certifi",
+    "charset_normalizer",
+    "tomlkit",
+    "packaging",
+    # Only needed to render help or suggest a fix for a typo.
+    "rich",
+    "rich_argparse",
+    "difflib",
+)
+
+
+def imported_modules(args: list[str], cwd: Path) -> set[str]:
+    """Run python under ``-X importtime`` and return every module it imported."""
+    source_root = str(Path(jiggle_version.__file__).resolve().parents[1])
+    pythonpath = os.pathsep.join(
+        filter(None, [source_root, os.environ.get("PYTHONPATH")])
+    )
+    result = subprocess.run(  # nosec
+        [sys.executable, "-X", "importtime", *args],
+        cwd=cwd,
+        env={**os.environ, "PYTHONPATH": pythonpath},
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    modules = set()
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            modules.add(line.rsplit("|", 1)[1].strip())
+    return modules
+
+
+@pytest.mark.parametrize("command", [["print"], ["check"]])
+def test_read_only_commands_do_not_import_heavy_dependencies(
+    tmp_path: Path, command: list[str]
+):
+    (tmp_path / "pyproject.toml").write_text(
+        '[project]\nname = "demo"\nversion = "1.2.3"\n', encoding="utf-8"
+    )
+
+    # Interpreter startup (site, .pth hooks) may import things on its own.
+    baseline = imported_modules(["-c", "pass"], tmp_path)
+    modules = imported_modules(
+        ["-m", "jiggle_version", "--project-root", str(tmp_path), *command], tmp_path
+    )
+
+    loaded = sorted(
+        name for name in modules - baseline if name.split(".")[0] in FORBIDDEN
+    )
+    assert loaded == []
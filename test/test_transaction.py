@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import os
+import stat
+from pathlib import Path
+
+import pytest
+
+from jiggle_version.transaction import TransactionError, WriteTransaction
+
+
+def make_files(tmp_path: Path, count: int = 3) -> list[Path]:
+    paths = []
+    for index in range(count):
+        path = tmp_path / f"file{index}.txt"
+        path.write_bytes(f"old {index}\n".encode())
+        paths.append(path)
+    return paths
+
+
+def leftover_temp_files(tmp_path: Path) -> list[Path]:
+    return [p for p in tmp_path.iterdir() if p.name.endswith(".jvtmp")]
+
+
+def test_commit_writes_every_staged_file(tmp_path: Path):
+    paths = make_files(tmp_path)
+    txn = WriteTransaction()
+    for index, path in enumerate(paths):
+        assert txn.stage(path, f"new {index}\n".encode()) is True
+
+    txn.commit()
+
+    assert [p.read_bytes() for p in paths] == [b"new 0\n", b"new 1\n", b"new 2\n"]
+    assert leftover_temp_files(tmp_path) == []
+    assert len(txn) == 0
+
+
+def test_stage_skips_unchanged_content(tmp_path: Path):
+    (path,) = make_files(tmp_path, 1)
+    txn = WriteTransaction()
+
+    assert txn.stage(path, b"old 0\n") is False
+    assert len(txn) == 0
+
+
+def test_failed_rename_restores_already_replaced_files(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    paths = make_files(tmp_path)
+    txn = WriteTransaction()
+    for path in paths:
+        txn.stage(path, b"new\n")
+
+    real_replace = os.replace
+    calls = {"n": 0}
+
+    def flaky_replace(src, dst):
+        calls["n"] += 1
+        if calls["n"] == 3:
+            raise OSError("disk full")
+        return real_replace(src, dst)
+
+    monkeypatch.setattr("jiggle_version.transaction.os.replace", flaky_replace)
+
+    with pytest.raises(TransactionError, match="disk full"):
+        txn.commit()
+
+    assert [p.read_bytes() for p in paths] == [b"old 0\n", b"old 1\n", b"old 2\n"]
+    assert leftover_temp_files(tmp_path) == []
+
+
+def test_interrupted_commit_rolls_back_and_reraises(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    paths = make_files(tmp_path)
+    created = tmp_path / "new.txt"
+    txn = WriteTransaction()
+    assert txn.stage(created, b"created\n") is True
+    for path in paths:
+        txn.stage(path, b"new\n")
+
+    real_replace = os.replace
+    calls = {"n": 0}
+
+    def interrupted_replace(src, dst):
+        calls["n"] += 1
+        if calls["n"] == 4:
+            raise KeyboardInterrupt
+        return real_replace(src, dst)
+
+    monkeypatch.setattr("jiggle_version.transaction.os.replace", interrupted_replace)
+
+    with pytest.raises(KeyboardInterrupt):
+        txn.commit()
+
+    assert [p.read_bytes() for p in paths] == [b"old 0\n", b"old 1\n", b"old 2\n"]
+    assert not created.exists()
+    assert leftover_temp_files(tmp_path) == []
+
+
+def test_failed_temp_write_leaves_originals_untouched(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    paths = make_files(tmp_path)
+    txn = WriteTransaction()
+    for path in paths:
+        txn.stage(path, b"new\n")
+
+    def no_fsync(fd):
+        raise OSError("fsync failed")
+
+    monkeypatch.setattr("jiggle_version.transaction.os.fsync", no_fsync)
+
+    with pytest.raises(TransactionError):
+        txn.commit()
+
+    assert [p.read_bytes() for p in paths] == [b"old 0\n", b"old 1\n", b"old 2\n"]
+    assert leftover_temp_files(tmp_path) == []
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX permission bits")
+def test_commit_preserves_file_mode(tmp_path: Path):
+    (path,) = make_files(tmp_path, 1)
+    path.chmod(0o640)
+    txn = WriteTransaction()
+    txn.stage(path, b"new\n")
+
+    txn.commit()
+
+    assert stat.S_IMODE(path.stat().st_mode) == 0o640
+
+
+def test_concurrent_commit_writes_all_and_reports_latency(tmp_path: Path):
+    paths = make_files(tmp_path, 12)
+    txn = WriteTransaction(max_workers=4)
+    for path in paths:
+        txn.stage(path, b"new\n")
+
+    txn.commit()
+
+    assert all(p.read_bytes() == b"new\n" for p in paths)
+    assert set(txn.latencies) == set(paths)
+    assert all(latency >= 0 for latency in txn.latencies.values())
+
+
+def test_concurrent_write_failure_rolls_back_every_file(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    paths = make_files(tmp_path, 8)
+    txn = WriteTransaction(max_workers=4)
+    for path in paths:
+        txn.stage(path, b"new\n")
+
+    from jiggle_version import transaction
+
+    real_write_temp = transaction._write_temp
+
+    def flaky_write_temp(path: Path, content: bytes, mode):
+        if path.name == "file5.txt":
+            raise OSError("quota exceeded")
+        return real_write_temp(path, content, mode)
+
+    monkeypatch.setattr(transaction, "_write_temp", flaky_write_temp)
+
+    with pytest.raises(TransactionError, match="quota exceeded"):
+        txn.commit()
+
+    assert [p.read_bytes() for p in paths] == [
+        f"old {index}\n".encode() for index in range(8)
+    ]
+    assert leftover_temp_files(tmp_path) == []
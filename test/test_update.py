@@ -3,10 +3,13 @@ from __future__ import annotations
 import textwrap
 from pathlib import Path
 
+import pytest
+
 from jiggle_version.bump import bump_version
 from jiggle_version.parsers.ast_parser import parse_python_module, parse_setup_py
 from jiggle_version.parsers.config_parser import parse_pyproject_toml
 from jiggle_version.update import (
+    render_python_file,
     update_pyproject_toml,
     update_python_file,
     update_setup_cfg,
@@ -162,3 +165,83 @@ def test_bump_version_rejects_unknown_scheme():
         assert "Unknown versioning scheme" in str(exc)
     else:
         raise AssertionError("Expected ValueError for unknown scheme")
+
+
+def test_render_functions_return_none_when_nothing_changes(tmp_path: Path):
+    file_path = write(
+        tmp_path / "__init__.py",
+        """
+        __version__ = "1.2.3"
+        """,
+    )
+
+    assert render_python_file(file_path, "1.2.3") is None
+    assert render_python_file(file_path, "1.2.4") == b'__version__ = "1.2.4"\n'
+    assert file_path.read_text(encoding="utf-8") == '__version__ = "1.2.3"\n'
+
+
+def test_update_python_file_keeps_pep263_encoding_byte_for_byte(tmp_path: Path):
+    file_path = tmp_path / "module.py"
+    source = '# -*- coding: cp1252 -*-\nLABEL = "caf\xe9"; __version__ = "1.0.0"\n'
+    file_path.write_bytes(source.encode("cp1252"))
+
+    update_python_file(file_path, "1.0.1")
+
+    expected = source.replace("1.0.0", "1.0.1").encode("cp1252")
+    assert file_path.read_bytes() == expected
+    assert parse_python_module(file_path) == "1.0.1"
+
+
+def test_update_python_file_keeps_bom_and_crlf_line_endings(tmp_path: Path):
+    file_path = tmp_path / "__about__.py"
+    raw = b'\xef\xbb\xbf"""Caf\xc3\xa9."""\r\n__version__ = "1.0.0"\r\n'
+    file_path.write_bytes(raw)
+
+    update_python_file(file_path, "2.0.0")
+
+    assert file_path.read_bytes() == raw.replace(b"1.0.0", b"2.0.0")
+
+
+def test_update_python_file_only_touches_setup_call_keywords(tmp_path: Path):
+    file_path = write(
+        tmp_path / "setup.py",
+        """
+        from setuptools import setup
+
+        check(version="0.0.1")
+        setup(name="demo", version=r'1.2.3')
+        """,
+    )
+
+    update_python_file(file_path, "2.0.0")
+
+    updated = file_path.read_text(encoding="utf-8")
+    assert 'check(version="0.0.1")' in updated
+    assert "version=r'2.0.0'" in updated
+
+
+def test_update_python_file_falls_back_to_regex_on_syntax_error(tmp_path: Path):
+    file_path = write(
+        tmp_path / "_version.py",
+        """
+        __version__ = "1.2.3"
+        def broken(:
+        """,
+    )
+
+    update_python_file(file_path, "1.2.4")
+
+    assert '__version__ = "1.2.4"' in file_path.read_text(encoding="utf-8")
+
+
+def test_update_python_file_does_not_write_unchanged_file(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    file_path = write(tmp_path / "_version.py", '__version__ = "1.2.3"\n')
+
+    def fail_write(self, data):
+        raise AssertionError("unchanged file must not be written")
+
+    monkeypatch.setattr(Path, "write_bytes", fail_write)
+
+    update_python_file(file_path, "1.2.3")
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from jiggle_version.scan import scan_project
+from jiggle_version.watch import SourceWatcher
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def write(path: Path, body: str, mtime: int) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(body, encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def make_watcher(tmp_path: Path) -> tuple[SourceWatcher, FakeClock, Path]:
+    write(
+        tmp_path / "pyproject.toml",
+        '[project]\nname = "demo"\nversion = "1.0.0"\n',
+        1_000,
+    )
+    about = write(tmp_path / "demo" / "__about__.py", '__version__ = "1.0.0"\n', 1_000)
+    clock = FakeClock()
+    watcher = SourceWatcher(
+        scan_project(tmp_path),
+        interval=0.5,
+        debounce=0.25,
+        sleep=clock.sleep,
+        clock=clock,
+    )
+    return watcher, clock, about
+
+
+def test_change_is_reported_once_it_settles(tmp_path: Path):
+    watcher, clock, about = make_watcher(tmp_path)
+
+    assert watcher.poll() == []
+    write(about, '__version__ = "2.0.0"\n', 2_000)
+    assert watcher.poll() == []  # first sighting starts the debounce
+    clock.sleep(0.1)
+    write(about, '__version__ = "2.0.1"\n', 2_001)
+    assert watcher.poll() == []  # changed again: the debounce restarts
+    clock.sleep(0.3)
+    assert watcher.poll() == [about]
+    assert watcher.poll() == []
+
+
+def test_watch_reparses_only_the_changed_file(tmp_path: Path):
+    watcher, _, about = make_watcher(tmp_path)
+    reports = []
+    write(about, '__version__ = "2.0.0"\n', 2_000)
+
+    watcher.watch(lambda before, after: reports.append((before, after)), rounds=3)
+
+    ((before, after),) = reports
+    assert [source.version for source in before] == ["1.0.0"]
+    assert [source.version for source in after] == ["2.0.0"]
+    assert watcher.scan.unique_versions == {"1.0.0", "2.0.0"}